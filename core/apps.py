@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from core.search import ensure_search_indexes
+        from core.versions import track_domain_models
+
+        post_migrate.connect(ensure_search_indexes, sender=self)
+        track_domain_models()
@@ -0,0 +1,64 @@
+"""
+Shared pieces of the archive commands (``archive_audit_log``,
+``archive_inventory_ledger``): the ``--months``/``--before`` cutoff options
+and the loop that moves old rows out of a live table one batch at a time.
+"""
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def add_cutoff_arguments(parser, rows="rows created"):
+    parser.add_argument(
+        "--months",
+        type=int,
+        default=12,
+        help="Keep this many whole months live besides the current one (default 12).",
+    )
+    parser.add_argument(
+        "--before",
+        default=None,
+        help=f"Archive {rows} before this date (YYYY-MM-DD); overrides --months.",
+    )
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows moved per transaction (default 5000).")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would move without writing.")
+
+
+def cutoff_from_options(options):
+    """
+    Return ``(cutoff, before)``: the first date kept live and the aware
+    datetime it starts at. Without ``--before`` that is the first day of
+    the month ``--months`` before the current one.
+    """
+    if options["before"]:
+        try:
+            cutoff = parse_date(options["before"])
+        except ValueError:
+            cutoff = None
+        if cutoff is None:
+            raise CommandError(f"Invalid date '{options['before']}', expected YYYY-MM-DD.")
+    else:
+        cutoff = timezone.localdate().replace(day=1)
+        for _ in range(options["months"]):
+            cutoff = (cutoff - timedelta(days=1)).replace(day=1)
+    return cutoff, timezone.make_aware(datetime.combine(cutoff, time.min))
+
+
+def move_in_batches(queryset, batch_size, move):
+    """
+    Call *move* with successive lists of up to *batch_size* rows of
+    *queryset*, each batch in its own transaction, until none are left.
+    *move* must take the rows out of *queryset*. Returns the rows moved.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            batch = list(queryset[:batch_size])
+            if not batch:
+                break
+            move(batch)
+        moved += len(batch)
+    return moved
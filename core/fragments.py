@@ -0,0 +1,130 @@
+"""
+Cache for the HTMX list partials (``#...-table-partial`` and friends).
+
+A partial depends only on the URL (path and query string) and on the data
+behind it, so ``cache_fragment`` keys the rendered response on the template,
+the URL and the current version of each domain it reads (see
+``core.versions``). A repeat request for the same page, sort or cursor is
+answered from the cache without touching the ORM; any committed change in
+one of the domains moves the version and the next request renders afresh.
+
+Entries live in the ``FRAGMENT_CACHE`` cache alias, so any Django cache
+backend (locmem, file, Redis) can hold them.
+
+Detail pages, whose tabs are re-requested as users flip between them, use
+``versioned_etag`` instead: the browser keeps the response and revalidates
+it, and an unchanged page is answered with 304 before the view runs.
+"""
+
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from core.versions import get_versions, object_version, track
+
+FRAGMENT_TIMEOUT = 60 * 60
+
+# Response headers worth replaying (HTMX instructions set by the view).
+_KEPT_HEADERS = ("Content-Type", "HX-Push-Url", "HX-Replace-Url", "HX-Trigger", "HX-Reswap", "HX-Retarget")
+
+# Request headers HTMX views branch on (full page vs. tab partial, etc.).
+_HTMX_HEADERS = ("HX-Request", "HX-Boosted", "HX-Target", "HX-Trigger", "HX-History-Restore-Request")
+
+
+def fragment_key(template, request, versions):
+    raw = "|".join([template, request.get_full_path(), *versions])
+    return f"fragment:{template}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def cache_fragment(template, *domains, timeout=None):
+    """
+    Serve the view's HTMX GET responses from the fragment cache. *template*
+    is the page whose partials the view renders (the URL decides which
+    partial), *domains* the data it reads. Full-page loads are never cached: they include the user's
+    session-specific chrome (navigation, messages, CSRF token). Only use it
+    on views whose partials are the same for every user.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            # Inside a transaction the view may see uncommitted rows whose
+            # version bump has not happened yet, so nothing is cached there.
+            if request.method != "GET" or not request.htmx or connection.in_atomic_block:
+                return view(request, *args, **kwargs)
+
+            store = caches[getattr(settings, "FRAGMENT_CACHE", "default")]
+            key = fragment_key(template, request, get_versions(*domains))
+            hit = store.get(key)
+            if hit is not None:
+                content, headers = hit
+                return HttpResponse(content, headers=headers)
+
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                headers = {h: response[h] for h in _KEPT_HEADERS if h in response}
+                store.set(
+                    key,
+                    (response.content, headers),
+                    FRAGMENT_TIMEOUT if timeout is None else timeout,
+                )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def versioned_etag(*domains, model=None, lookup="pk"):
+    """
+    Conditional GET for a view whose output depends on *domains* and, with
+    *model*, on the row named by the URL kwarg *lookup*. The ETag hashes
+    those versions with the URL, the HTMX headers, the user and the CSRF
+    cookie (full pages embed a token), plus today's date for "days ago"
+    style text. A matching ``If-None-Match`` gets a 304 before the view
+    runs; responses are marked ``private, no-cache`` so browsers (and
+    HTMX's requests through them) always revalidate. *model* is tracked by
+    core.versions even if it belongs to no domain.
+    """
+
+    def etag(request, *args, **kwargs):
+        if len(get_messages(request)):
+            # Pending messages must be rendered, not skipped by a 304.
+            return None
+        parts = [
+            request.get_full_path(),
+            *(request.headers.get(header, "") for header in _HTMX_HEADERS),
+            str(request.user.pk),
+            request.COOKIES.get(settings.CSRF_COOKIE_NAME, ""),
+            timezone.localdate().isoformat(),
+            *get_versions(*domains),
+        ]
+        if model is not None:
+            parts.append(object_version(model, kwargs[lookup]))
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+    if model is not None:
+        track(model)
+
+    def decorator(view):
+        conditional = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD") and response.has_header("ETag"):
+                patch_vary_headers(response, _HTMX_HEADERS)
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapper
+
+    return decorator
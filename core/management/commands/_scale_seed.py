@@ -0,0 +1,488 @@
+"""Bulk generator behind ``seed_demo_data --scale``."""
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from customer.models import (
+    Customer, DepositAccount, Transaction, Sale, BoxedSale, CoupledSale,
+    BoxedSaleLayerConsumption, PurchaseAgreement, PurchaseAgreementLineItem,
+)
+from inventory.models import (
+    Brand, Product, Inventory, InventoryCostLayer, InventoryTransaction,
+    Transformation, TransformationItem,
+)
+from supply_chain.models import (
+    Supplier, PurchaseOrder, PurchaseOrderItem, Payment,
+    GoodsReceipt, GoodsReceiptItem,
+)
+
+# Row counts generated at --scale 1
+SCALE_VOLUMES = {
+    "products": 10_000,
+    "customers": 50_000,
+    "transactions": 1_000_000,
+    "sales": 200_000,
+    "transformation_items": 100_000,
+    "agreements": 10_000,
+}
+
+# Marks generated rows so a second run can detect them
+PREFIX = "SCL"
+
+FIRST_NAMES = [
+    "Ahmed", "Chidi", "Musa", "Fatima", "Oluwaseun", "Ibe", "Aisha", "Emeka",
+    "Zainab", "Yusuf", "Grace", "Ibrahim", "Ngozi", "Tunde", "Hauwa", "Segun",
+]
+LAST_NAMES = [
+    "Ibrahim", "Okafor", "Bello", "Usman", "Adeyemi", "Okonkwo", "Suleiman",
+    "Nwankwo", "Abdullahi", "Adamu", "Tanko", "Balogun", "Eze", "Lawal",
+]
+SERIES = ["CG", "Boxer", "Star", "YBR", "GD", "Ace", "Apache", "FZ", "Pulsar", "HLX"]
+PARTS = ["Clutch Plate", "Brake Pad", "Chain Kit", "Piston", "Carburettor", "Headlamp"]
+
+SERVICE_FEE_PER_ITEM = Decimal("5000.00")
+ITEMS_PER_TRANSFORMATION = 10
+ITEMS_PER_PO = 25
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ScaleSeeder:
+    """
+    Generates SCALE_VOLUMES * scale rows with bulk_create, bypassing save()
+    and signals, so the numbers, inventory, FIFO layers and inventory
+    transactions are filled in here to stay consistent with each other.
+
+    Everything derives from one random.Random(seed) — including primary
+    keys — so the same scale and seed always produce the same data set.
+    Cached deposit balances and the daily sales rollup are rebuilt at the end.
+    """
+
+    def __init__(self, user, scale, seed=42, batch_size=5000, stdout=None):
+        self.user = user
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.stdout = stdout
+        self.volumes = {
+            name: max(1, int(count * scale)) for name, count in SCALE_VOLUMES.items()
+        }
+        self.now = timezone.now()
+
+    def _uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _money(self, low, high, step=1000):
+        return Decimal(self.rng.randrange(low // step, high // step + 1) * step)
+
+    def _days_ago(self, max_days):
+        return self.now - timedelta(
+            days=self.rng.randrange(max_days), seconds=self.rng.randrange(86400)
+        )
+
+    def _write(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def _bulk(self, model, objects):
+        created = 0
+        for chunk in _chunks(objects, self.batch_size):
+            model.objects.bulk_create(chunk, batch_size=self.batch_size)
+            created += len(chunk)
+        self._write(f"    {model.__name__}: {created:,}")
+        return created
+
+    def already_seeded(self):
+        return Product.objects.filter(modelname__startswith=PREFIX).exists()
+
+    def run(self):
+        self._write(
+            "\n  --- Scaled data ("
+            + ", ".join(f"{k}={v:,}" for k, v in self.volumes.items())
+            + ") ---"
+        )
+        with db_transaction.atomic():
+            self._seed_products()
+            self._plan_stock()
+            self._seed_supply_chain()
+            self._seed_transformations()
+            self._seed_customers()
+            self._seed_deposits()
+            self._seed_agreements()
+            self._seed_sales()
+            self._seed_inventory_levels()
+        self._rebuild_rollups()
+
+    # ------------------------------------------------------------------
+    # Products
+    # ------------------------------------------------------------------
+    def _seed_products(self):
+        brands = list(Brand.objects.all()) or [
+            Brand.objects.create(name="Honda", created_by=self.user, updated_by=self.user)
+        ]
+        total = self.volumes["products"]
+        motorcycles = max(1, total * 2 // 5)
+        parts = max(0, total - 2 * motorcycles)
+
+        self.boxed = []      # boxed motorcycles, transformable
+        self.parts = []      # spare parts and engines
+        self.coupled = {}    # boxed pk -> coupled variant
+        self.unit_cost = {}  # boxed pk -> receipt unit cost
+        products = []
+        for i in range(motorcycles):
+            brand = self.rng.choice(brands)
+            modelname = f"{PREFIX} {self.rng.choice(SERIES)} {i:05d}"
+            boxed = Product(
+                pk=self._uuid(), sku=f"{modelname}-boxed", brand=brand, modelname=modelname,
+                category=Product.Category.MOTORCYCLE, type_variant=Product.TypeVariant.BOXED,
+                created_by=self.user, updated_by=self.user,
+            )
+            coupled = Product(
+                pk=self._uuid(), sku=f"{modelname}-coupled", brand=brand, modelname=modelname,
+                category=Product.Category.MOTORCYCLE, type_variant=Product.TypeVariant.COUPLED,
+                base_product=boxed, created_by=self.user, updated_by=self.user,
+            )
+            self.boxed.append(boxed)
+            self.coupled[boxed.pk] = coupled
+            self.unit_cost[boxed.pk] = self._money(300_000, 550_000)
+            coupled.assembly_cost = self.unit_cost[boxed.pk] + SERVICE_FEE_PER_ITEM
+            products += [boxed, coupled]
+
+        for i in range(parts):
+            modelname = f"{PREFIX} {self.rng.choice(PARTS)} {i:05d}"
+            part = Product(
+                pk=self._uuid(), sku=f"{modelname}-boxed", brand=self.rng.choice(brands),
+                modelname=modelname,
+                category=self.rng.choice([Product.Category.SPARE_PART, Product.Category.ENGINE]),
+                type_variant=Product.TypeVariant.BOXED,
+                created_by=self.user, updated_by=self.user,
+            )
+            self.parts.append(part)
+            self.unit_cost[part.pk] = self._money(2_000, 60_000, step=500)
+            products.append(part)
+
+        # Base products first so the self-referencing FK resolves in every batch order
+        products.sort(key=lambda p: p.base_product_id is not None)
+        self._bulk(Product, products)
+
+        self.inventories = {
+            product.pk: Inventory(
+                pk=self._uuid(), product=product,
+                created_by=self.user, updated_by=self.user,
+            )
+            for product in [*self.boxed, *self.parts]
+        }
+        self._bulk(Inventory, self.inventories.values())
+
+    def _plan_stock(self):
+        """Decide how many units each product transforms and sells before generating rows."""
+        self.transform_counts = {p.pk: 0 for p in self.boxed}
+        for _ in range(self.volumes["transformation_items"]):
+            self.transform_counts[self.rng.choice(self.boxed).pk] += 1
+
+        sales = self.volumes["sales"]
+        coupled_sales = min(int(sales * 0.3), int(self.volumes["transformation_items"] * 0.6))
+        self.sale_plan = [("coupled", None, 1)] * coupled_sales
+        sellable = [*self.boxed, *self.parts]
+        self.sold_counts = {p.pk: 0 for p in sellable}
+        for _ in range(sales - coupled_sales):
+            product = self.rng.choice(sellable)
+            quantity = self.rng.choice([1, 1, 1, 2])
+            self.sold_counts[product.pk] += quantity
+            self.sale_plan.append(("boxed", product, quantity))
+        self.rng.shuffle(self.sale_plan)
+
+        # Receipts cover everything consumed plus what is left on hand (some at 0 or low)
+        self.on_hand = {pk: self.rng.choice([0, 2, 5, 10, 20, 40]) for pk in self.sold_counts}
+        self.received = {
+            pk: self.on_hand[pk] + self.sold_counts[pk] + self.transform_counts.get(pk, 0)
+            for pk in self.sold_counts
+        }
+
+    # ------------------------------------------------------------------
+    # Supply chain: POs, payments, receipts, FIFO layers
+    # ------------------------------------------------------------------
+    def _seed_supply_chain(self):
+        suppliers = list(Supplier.objects.all()) or [
+            Supplier.objects.create(
+                company_name="Scaled Supplies Ltd", created_by=self.user, updated_by=self.user
+            )
+        ]
+        receipt_ct = ContentType.objects.get_for_model(GoodsReceiptItem)
+        products = [p for p in [*self.boxed, *self.parts] if self.received[p.pk] > 0]
+
+        pos, po_items, payments, receipts, receipt_items = [], [], [], [], []
+        self.layers = {}
+        inventory_txns = []
+        for n, chunk in enumerate(_chunks(products, ITEMS_PER_PO)):
+            ordered_at = self._days_ago(400)
+            po = PurchaseOrder(
+                pk=self._uuid(), po_number=f"PO-{PREFIX}{n:06d}",
+                supplier=self.rng.choice(suppliers), order_date=ordered_at,
+                delivery_status=PurchaseOrder.DeliveryStatus.RECEIVED,
+                payment_status=PurchaseOrder.PaymentStatus.FULFILLED,
+                status=PurchaseOrder.Status.CLOSED,
+                created_by=self.user, updated_by=self.user,
+            )
+            receipt = GoodsReceipt(
+                pk=self._uuid(), gr_number=f"GR-{PREFIX}{n:06d}", purchase_order=po,
+                delivery_date=ordered_at, received_by=self.user, delivery_cost=Decimal("0"),
+                created_by=self.user, updated_by=self.user,
+            )
+            total = Decimal("0.00")
+            for product in chunk:
+                qty, cost = self.received[product.pk], self.unit_cost[product.pk]
+                po_item = PurchaseOrderItem(
+                    pk=self._uuid(), purchase_order=po, product=product,
+                    ordered_quantity=qty, unit_price_at_order=cost,
+                    status=PurchaseOrderItem.Status.RECEIVED,
+                    created_by=self.user, updated_by=self.user,
+                )
+                receipt_item = GoodsReceiptItem(
+                    pk=self._uuid(), goods_receipt=receipt, purchase_order_item=po_item,
+                    product=product, received_quantity=qty, unit_cost_at_receipt=cost,
+                    created_by=self.user, updated_by=self.user,
+                )
+                # One layer per product; consumption is applied as rows are generated
+                self.layers[product.pk] = InventoryCostLayer(
+                    pk=self._uuid(), product=product, quantity=qty, remaining_quantity=qty,
+                    unit_cost=cost, goods_receipt_item=receipt_item,
+                )
+                inventory_txns.append(InventoryTransaction(
+                    pk=self._uuid(), inventory=self.inventories[product.pk],
+                    transaction_type=InventoryTransaction.TransactionType.RECEIPT,
+                    source_content_type=receipt_ct, source_object_id=receipt_item.pk,
+                    quantity_change=qty, cost_impact=qty * cost,
+                    created_by=self.user, updated_by=self.user,
+                ))
+                po_items.append(po_item)
+                receipt_items.append(receipt_item)
+                total += qty * cost
+            payments.append(Payment(
+                pk=self._uuid(), purchase_order=po, amount_paid=total, payment_date=ordered_at,
+                payment_method=Payment.PaymentMethod.TRANSFER, trxn_ref=f"TXN-{PREFIX}{n:08d}",
+                created_by=self.user, updated_by=self.user,
+            ))
+            pos.append(po)
+            receipts.append(receipt)
+
+        self._bulk(PurchaseOrder, pos)
+        self._bulk(PurchaseOrderItem, po_items)
+        self._bulk(Payment, payments)
+        self._bulk(GoodsReceipt, receipts)
+        self._bulk(GoodsReceiptItem, receipt_items)
+        # Layers are written after sales and transformations have depleted them
+        self._bulk(InventoryTransaction, inventory_txns)
+
+    # ------------------------------------------------------------------
+    # Transformations
+    # ------------------------------------------------------------------
+    def _seed_transformations(self):
+        item_ct = ContentType.objects.get_for_model(TransformationItem)
+        sources = [pk for pk, count in self.transform_counts.items() for _ in range(count)]
+        self.rng.shuffle(sources)
+        boxed_by_pk = {p.pk: p for p in self.boxed}
+
+        transformations, items, inventory_txns = [], [], []
+        for n, chunk in enumerate(_chunks(sources, ITEMS_PER_TRANSFORMATION)):
+            transformation = Transformation(
+                pk=self._uuid(), transformation_number=f"TRF-{PREFIX}{n:07d}",
+                service_fee=SERVICE_FEE_PER_ITEM * len(chunk),
+                transformation_date=self._days_ago(365),
+                created_by=self.user, updated_by=self.user,
+            )
+            transformations.append(transformation)
+            for pk in chunk:
+                serial = len(items)
+                cost = self.unit_cost[pk]
+                layer = self.layers[pk]
+                layer.remaining_quantity -= 1
+                item = TransformationItem(
+                    pk=self._uuid(), item_number=f"ITEM-{PREFIX}{serial:07d}",
+                    transformation=transformation, source_product=boxed_by_pk[pk],
+                    target_product=self.coupled[pk],
+                    engine_number=f"ENG-{PREFIX}{serial:08d}",
+                    chassis_number=f"CHS-{PREFIX}{serial:08d}",
+                    allocated_service_fee=SERVICE_FEE_PER_ITEM,
+                    unit_cost_at_transformation=cost + SERVICE_FEE_PER_ITEM,
+                    consumed_layer=layer,
+                    created_by=self.user, updated_by=self.user,
+                )
+                items.append(item)
+                inventory_txns.append(InventoryTransaction(
+                    pk=self._uuid(), inventory=self.inventories[pk],
+                    transaction_type=InventoryTransaction.TransactionType.TRANSFORMATION,
+                    source_content_type=item_ct, source_object_id=item.pk,
+                    quantity_change=-1, cost_impact=cost,
+                    created_by=self.user, updated_by=self.user,
+                ))
+
+        self.transformation_items = items
+        self._bulk(Transformation, transformations)
+        self._pending_inventory_txns = inventory_txns
+
+    # ------------------------------------------------------------------
+    # Customers, deposits, agreements
+    # ------------------------------------------------------------------
+    def _seed_customers(self):
+        self.customers, accounts = [], []
+        for i in range(self.volumes["customers"]):
+            customer = Customer(
+                pk=self._uuid(), customer_number=f"CUST-{PREFIX}{i:07d}",
+                full_name=f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)} {PREFIX}{i:06d}",
+                phone=f"080{self.rng.randrange(10**8):08d}",
+                created_by=self.user, updated_by=self.user,
+            )
+            accounts.append(DepositAccount(
+                pk=self._uuid(), customer=customer, account_number=f"ACCT-{PREFIX}{i:07d}",
+                created_by=self.user, updated_by=self.user,
+            ))
+            self.customers.append(customer)
+        self._bulk(Customer, self.customers)
+        self._bulk(DepositAccount, accounts)
+        self.accounts = accounts
+
+    def _seed_deposits(self):
+        year = self.now.year
+        self.deposited = {}
+
+        def deposits():
+            for i in range(self.volumes["transactions"]):
+                account = self.rng.choice(self.accounts)
+                amount = self._money(20_000, 1_500_000)
+                self.deposited[account.pk] = self.deposited.get(account.pk, 0) + amount
+                yield Transaction(
+                    pk=self._uuid(), account=account,
+                    transaction_type=Transaction.TransactionType.DEPOSIT, amount=amount,
+                    reference_number=f"DEP-{year}-{PREFIX}{i:08d}",
+                    note="Deposit payment — scaled seed data",
+                    created_by=self.user, updated_by=self.user,
+                )
+
+        self._bulk(Transaction, deposits())
+
+    def _seed_agreements(self):
+        funded = [a for a in self.accounts if self.deposited.get(a.pk)]
+        count = min(self.volumes["agreements"], len(funded))
+        agreements, lines = [], []
+        for n, account in enumerate(self.rng.sample(funded, count)):
+            agreement = PurchaseAgreement(
+                pk=self._uuid(), purchase_agreement_number=f"PUR-{PREFIX}{n:07d}",
+                account=account, date=self._days_ago(180),
+                created_by=self.user, updated_by=self.user,
+            )
+            # Keep every agreement within half the account's deposits
+            budget = self.deposited[account.pk] / 2
+            for j in range(self.rng.choice([1, 1, 2])):
+                quantity = self.rng.choice([1, 1, 2])
+                product = self.rng.choice(self.boxed)
+                price = min(self.unit_cost[product.pk] * Decimal("1.2"), budget / (2 * quantity))
+                lines.append(PurchaseAgreementLineItem(
+                    pk=self._uuid(), purchase_agreement=agreement,
+                    line_number=f"AGR-V1-{j:04d}", product=product,
+                    quantity_ordered=quantity, price_per_unit=price.quantize(Decimal("0.01")),
+                    created_by=self.user, updated_by=self.user,
+                ))
+            agreements.append(agreement)
+        self._bulk(PurchaseAgreement, agreements)
+        self._bulk(PurchaseAgreementLineItem, lines)
+
+    # ------------------------------------------------------------------
+    # Sales
+    # ------------------------------------------------------------------
+    def _seed_sales(self):
+        boxed_ct = ContentType.objects.get_for_model(BoxedSale)
+        available = list(self.transformation_items)
+        self.rng.shuffle(available)
+        sales, boxed_sales, coupled_sales, consumptions = [], [], [], []
+        inventory_txns = self._pending_inventory_txns
+
+        for n, (kind, product, quantity) in enumerate(self.sale_plan):
+            sale = Sale(
+                pk=self._uuid(), sale_number=f"SALE-{PREFIX}{n:07d}",
+                customer=self.rng.choice(self.customers),
+                payment_method=self.rng.choice(
+                    [Sale.PaymentMethod.CASH, Sale.PaymentMethod.BANK_TRANSFER]
+                ),
+                sale_date=self._days_ago(365),
+                created_by=self.user, updated_by=self.user,
+            )
+            sales.append(sale)
+            if kind == "coupled":
+                item = available.pop()
+                item.status = TransformationItem.Status.SOLD
+                markup = self.rng.choice([Decimal("1.15"), Decimal("1.2"), Decimal("1.25")])
+                coupled_sales.append(CoupledSale(
+                    pk=self._uuid(), coupled_sale_number=f"C-SALE-{PREFIX}{n:07d}", sale=sale,
+                    transformation_item=item,
+                    price=(item.unit_cost_at_transformation * markup).quantize(Decimal("1000")),
+                    created_by=self.user, updated_by=self.user,
+                ))
+                continue
+
+            cost = self.unit_cost[product.pk]
+            layer = self.layers[product.pk]
+            layer.remaining_quantity -= quantity
+            markup = self.rng.choice([Decimal("1.15"), Decimal("1.2"), Decimal("1.3")])
+            boxed_sale = BoxedSale(
+                pk=self._uuid(), boxed_sale_number=f"B-SALE-{PREFIX}{n:07d}", sale=sale,
+                product=product, quantity=quantity,
+                price=(cost * markup).quantize(Decimal("100")), cost_basis=cost * quantity,
+                created_by=self.user, updated_by=self.user,
+            )
+            boxed_sales.append(boxed_sale)
+            consumptions.append(BoxedSaleLayerConsumption(
+                boxed_sale=boxed_sale, cost_layer=layer,
+                quantity_consumed=quantity, unit_cost=cost,
+            ))
+            inventory_txns.append(InventoryTransaction(
+                pk=self._uuid(), inventory=self.inventories[product.pk],
+                transaction_type=InventoryTransaction.TransactionType.SALE,
+                source_content_type=boxed_ct, source_object_id=boxed_sale.pk,
+                quantity_change=-quantity, cost_impact=cost * quantity,
+                created_by=self.user, updated_by=self.user,
+            ))
+
+        self._bulk(InventoryCostLayer, self.layers.values())
+        self._bulk(TransformationItem, self.transformation_items)
+        self._bulk(Sale, sales)
+        self._bulk(BoxedSale, boxed_sales)
+        self._bulk(CoupledSale, coupled_sales)
+        self._bulk(BoxedSaleLayerConsumption, consumptions)
+        self._bulk(InventoryTransaction, inventory_txns)
+
+    def _seed_inventory_levels(self):
+        inventories = list(self.inventories.values())
+        for inventory in inventories:
+            layer = self.layers.get(inventory.product_id)
+            inventory.quantity = layer.remaining_quantity if layer else 0
+            inventory.weighted_average_cost = self.unit_cost[inventory.product_id]
+        Inventory.objects.bulk_update(
+            inventories, ["quantity", "weighted_average_cost"], batch_size=self.batch_size
+        )
+
+    # ------------------------------------------------------------------
+    # Derived data
+    # ------------------------------------------------------------------
+    def _rebuild_rollups(self):
+        from customer.services import rebuild_daily_sales_summary, reconcile_cached_balances
+
+        account_ids = [account.pk for account in self.accounts]
+        for chunk in _chunks(account_ids, self.batch_size):
+            reconcile_cached_balances(chunk, fix=True)
+        self._write(f"    Cached balances rebuilt for {len(account_ids):,} accounts")
+
+        rows = rebuild_daily_sales_summary(
+            start=timezone.localdate(self.now) - timedelta(days=366),
+            end=timezone.localdate(self.now),
+        )
+        self._write(f"    DailySalesSummary rows: {rows:,}")
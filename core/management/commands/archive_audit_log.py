@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.archiving import add_cutoff_arguments, cutoff_from_options, move_in_batches
+from core.models import AuditLog, AuditLogArchive
+
+ARCHIVED_FIELDS = [
+    "id",
+    "user_id",
+    "action",
+    "object_type",
+    "object_id",
+    "object_repr",
+    "detail",
+    "timestamp",
+    "ip_address",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves audit log entries from closed months into AuditLogArchive, "
+        "tagging each row with its month so old months can be exported or "
+        "dropped as a unit. By default everything before the first day of the "
+        "month --months ago is archived, keeping the live table (and the audit "
+        "page) small."
+    )
+
+    def add_arguments(self, parser):
+        add_cutoff_arguments(parser, rows="entries logged")
+
+    def handle(self, *args, **options):
+        cutoff, before = cutoff_from_options(options)
+        pending = AuditLog.objects.filter(timestamp__lt=before)
+
+        if options["dry_run"]:
+            self.stdout.write(f"Would archive {pending.count()} audit log entr(ies) before {cutoff}.")
+            return
+
+        moved = move_in_batches(
+            pending.order_by("timestamp", "pk").values(*ARCHIVED_FIELDS),
+            options["batch_size"],
+            self._archive,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {moved} audit log entr(ies) before {cutoff}.")
+        )
+
+    def _archive(self, batch):
+        AuditLogArchive.objects.bulk_create(
+            [
+                AuditLogArchive(
+                    period=timezone.localtime(row["timestamp"]).date().replace(day=1),
+                    **row,
+                )
+                for row in batch
+            ]
+        )
+        AuditLog.objects.filter(pk__in=[row["id"] for row in batch]).delete()
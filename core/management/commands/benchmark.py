@@ -0,0 +1,363 @@
+import json
+import math
+import time
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import CustomUser
+from customer.models import Customer, PurchaseAgreement, Sale, BoxedSale
+from customer.services import create_sale
+from inventory.models import Inventory, Product
+from middleware import QueryStats
+from supply_chain.models import PurchaseOrder, PurchaseOrderItem, Payment, Supplier
+from supply_chain.services import record_supplier_payment
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "baseline.json"
+
+
+def _percentile(values, pct):
+    """Nearest-rank percentile, stable for the small sample sizes used here."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _run_on_commit(pending):
+    """
+    Run the on_commit callbacks registered after the first *pending* ones,
+    including any they register themselves, as a commit would. Callbacks
+    registered with robust=True may fail without stopping the others.
+    """
+    while len(connection.run_on_commit) > pending:
+        callbacks = connection.run_on_commit[pending:]
+        del connection.run_on_commit[pending:]
+        for _sids, func, robust in callbacks:
+            try:
+                func()
+            except Exception:
+                if not robust:
+                    raise
+
+
+class Command(BaseCommand):
+    help = (
+        "Times the key views and services through the Django test client and "
+        "records p50/p95 latency and query counts. Compares against a JSON "
+        "baseline and exits non-zero when a result regresses past the threshold. "
+        "Run it against a database seeded with `seed_demo_data --scale`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20, help="Timed runs per target (default 20).")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed runs per target (default 2).")
+        parser.add_argument(
+            "--only",
+            nargs="+",
+            default=None,
+            help="Benchmark only these targets (e.g. dashboard create_sale).",
+        )
+        parser.add_argument(
+            "--baseline",
+            default=str(DEFAULT_BASELINE),
+            help=f"Baseline JSON path (default {DEFAULT_BASELINE}).",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            action="store_true",
+            help="Write the results as the new baseline instead of comparing.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.25,
+            help="Allowed p95 latency increase as a fraction of the baseline (default 0.25).",
+        )
+        parser.add_argument(
+            "--min-delta-ms",
+            type=float,
+            default=5.0,
+            help="Ignore latency increases smaller than this, to absorb timer noise (default 5).",
+        )
+        parser.add_argument(
+            "--query-tolerance",
+            type=int,
+            default=0,
+            help="Extra queries allowed over the baseline before failing (default 0).",
+        )
+        parser.add_argument("--output", default=None, help="Also write this run's results to a JSON file.")
+        parser.add_argument("--username", default="admin", help="User to run as (default admin).")
+
+    def handle(self, *args, **options):
+        user = CustomUser.objects.filter(username=options["username"]).first()
+        if user is None:
+            raise CommandError(f"User '{options['username']}' not found — run seed_demo_data first.")
+
+        self.user = user
+        self.client = Client()
+        self.client.force_login(user)
+        self.secure = getattr(settings, "SECURE_SSL_REDIRECT", False)
+
+        targets = self._targets()
+        if options["only"]:
+            unknown = set(options["only"]) - set(targets)
+            if unknown:
+                raise CommandError(f"Unknown targets: {', '.join(sorted(unknown))}")
+            targets = {name: targets[name] for name in options["only"]}
+
+        results = {}
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+            for name, target in targets.items():
+                results[name] = self._measure(target, options["iterations"], options["warmup"])
+                r = results[name]
+                self.stdout.write(
+                    f"  {name:<24} p50 {r['p50_ms']:>9.2f} ms   p95 {r['p95_ms']:>9.2f} ms   "
+                    f"{r['queries']:>5} queries"
+                )
+
+        report = {
+            "meta": {
+                "recorded_at": timezone.now().isoformat(),
+                "database": connection.vendor,
+                "iterations": options["iterations"],
+                "rows": {
+                    "products": Product.objects.count(),
+                    "customers": Customer.objects.count(),
+                    "sales": Sale.objects.count(),
+                },
+            },
+            "results": results,
+        }
+
+        if options["output"]:
+            self._write_json(Path(options["output"]), report)
+
+        baseline_path = Path(options["baseline"])
+        if options["save_baseline"]:
+            self._write_json(baseline_path, report)
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            self.stdout.write(
+                self.style.WARNING(f"No baseline at {baseline_path}; run with --save-baseline to record one.")
+            )
+            return
+
+        baseline = json.loads(baseline_path.read_text())["results"]
+        regressions = self._compare(results, baseline, options)
+        if regressions:
+            for line in regressions:
+                self.stdout.write(self.style.ERROR(f"  REGRESSION {line}"))
+            raise CommandError(f"{len(regressions)} benchmark regression(s) against {baseline_path}")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    # ------------------------------------------------------------------
+    # Measurement
+    # ------------------------------------------------------------------
+    def _measure(self, target, iterations, warmup):
+        """
+        Run *target* warmup + iterations times. Every run happens inside a
+        transaction that is rolled back, so service targets leave the data
+        set unchanged and each run sees the same state. The on_commit
+        callbacks the timed request registers (audit writes, cache version
+        bumps) would never fire in that transaction, so they are run and
+        timed as part of the request, as a real commit would.
+        """
+        timings, query_counts = [], []
+        for run in range(warmup + iterations):
+            with transaction.atomic():
+                request = target()
+                stats = QueryStats()
+                with connection.execute_wrapper(stats):
+                    start = time.perf_counter()
+                    pending = len(connection.run_on_commit)
+                    request()
+                    _run_on_commit(pending)
+                    elapsed = time.perf_counter() - start
+                transaction.set_rollback(True)
+            if run >= warmup:
+                timings.append(elapsed * 1000)
+                query_counts.append(stats.count)
+
+        return {
+            "p50_ms": round(_percentile(timings, 50), 2),
+            "p95_ms": round(_percentile(timings, 95), 2),
+            "queries": max(query_counts),
+        }
+
+    def _compare(self, results, baseline, options):
+        regressions = []
+        for name, current in results.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            allowed_ms = previous["p95_ms"] * (1 + options["threshold"])
+            if (
+                current["p95_ms"] > allowed_ms
+                and current["p95_ms"] - previous["p95_ms"] > options["min_delta_ms"]
+            ):
+                regressions.append(
+                    f"{name}: p95 {current['p95_ms']:.2f} ms vs baseline {previous['p95_ms']:.2f} ms"
+                )
+            if current["queries"] > previous["queries"] + options["query_tolerance"]:
+                regressions.append(
+                    f"{name}: {current['queries']} queries vs baseline {previous['queries']}"
+                )
+        return regressions
+
+    def _write_json(self, path, data):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(data, indent=2, sort_keys=True))
+
+    # ------------------------------------------------------------------
+    # Targets
+    # ------------------------------------------------------------------
+    def _targets(self):
+        """
+        Map of target name -> setup callable. Setup runs inside the rolled-back
+        transaction and returns the callable that is actually timed.
+        """
+        return {
+            "dashboard": lambda: self._get(reverse("dashboard")),
+            "inventories": lambda: self._get(reverse("inventories")),
+            "customers": lambda: self._get(reverse("customers")),
+            "sales": lambda: self._get(reverse("sales")),
+            "agreement_detail": self._agreement_detail,
+            "product_detail": self._product_detail,
+            "create_sale": self._create_sale,
+            "void_sale": self._void_sale,
+            "process_receipt": self._process_receipt,
+            "process_transformation": self._process_transformation,
+        }
+
+    def _get(self, url):
+        def run():
+            response = self.client.get(url, secure=self.secure)
+            self._check(response, 200, url)
+        return run
+
+    def _post(self, url, data, expected_status):
+        def run():
+            response = self.client.post(url, data, secure=self.secure)
+            self._check(response, expected_status, url)
+        return run
+
+    @staticmethod
+    def _check(response, expected_status, url):
+        if response.status_code != expected_status:
+            raise CommandError(
+                f"{url} returned {response.status_code}, expected {expected_status}: "
+                f"{response.content[:300]!r}"
+            )
+
+    def _first(self, queryset, label):
+        obj = queryset.first()
+        if obj is None:
+            raise CommandError(f"No {label} to benchmark — run seed_demo_data first.")
+        return obj
+
+    def _stocked_product(self, minimum=1, category=None):
+        inventories = Inventory.objects.filter(quantity__gte=minimum).select_related("product")
+        if category:
+            inventories = inventories.filter(product__category=category)
+        return self._first(inventories.order_by("-quantity", "pk"), "stocked product").product
+
+    def _agreement_detail(self):
+        agreement = self._first(
+            PurchaseAgreement.objects.order_by("purchase_agreement_number"), "purchase agreement"
+        )
+        return self._get(reverse("agreement_detail", args=[agreement.pk]))
+
+    def _product_detail(self):
+        product = self._first(
+            Product.objects.filter(boxed_sales__isnull=False).distinct().order_by("sku"),
+            "sold product",
+        )
+        return self._get(reverse("product_detail", args=[product.pk]))
+
+    def _sale_data(self, customer, product):
+        return {
+            "customer": str(customer.pk),
+            "payment_method": Sale.PaymentMethod.CASH,
+            "boxed-TOTAL_FORMS": "1",
+            "boxed-INITIAL_FORMS": "0",
+            "boxed-MIN_NUM_FORMS": "0",
+            "boxed-MAX_NUM_FORMS": "1000",
+            "boxed-0-product": str(product.pk),
+            "boxed-0-quantity": "1",
+            "boxed-0-price": str(product.inventory.weighted_average_cost + 1000),
+            "coupled-TOTAL_FORMS": "0",
+            "coupled-INITIAL_FORMS": "0",
+            "coupled-MIN_NUM_FORMS": "0",
+            "coupled-MAX_NUM_FORMS": "1000",
+        }
+
+    def _create_sale(self):
+        customer = self._first(Customer.objects.order_by("customer_number"), "customer")
+        product = self._stocked_product()
+        return self._post(reverse("create_normal_sale"), self._sale_data(customer, product), 302)
+
+    def _void_sale(self):
+        customer = self._first(Customer.objects.order_by("customer_number"), "customer")
+        product = self._stocked_product()
+        sale = Sale(customer=customer, payment_method=Sale.PaymentMethod.CASH, created_by=self.user)
+        item = BoxedSale(
+            sale=sale, product=product, quantity=1,
+            price=product.inventory.weighted_average_cost + 1000, created_by=self.user,
+        )
+        create_sale(sale=sale, boxed_items=[item], coupled_items=[], user=self.user)
+        return self._post(
+            reverse("modal_void_sale", args=[sale.pk]), {"void_reason": "Benchmark"}, 204
+        )
+
+    def _process_receipt(self):
+        supplier = self._first(Supplier.objects.order_by("company_name", "pk"), "supplier")
+        product = self._stocked_product(minimum=0)
+        po = PurchaseOrder.objects.create(supplier=supplier, created_by=self.user)
+        po_item = PurchaseOrderItem.objects.create(
+            purchase_order=po, product=product, ordered_quantity=10,
+            unit_price_at_order=Decimal("1000.00"), created_by=self.user,
+        )
+        record_supplier_payment(
+            po=po, amount=Decimal("10000.00"), method=Payment.PaymentMethod.TRANSFER,
+            user=self.user, remark="Benchmark",
+        )
+        return self._post(
+            reverse("add_receipt"),
+            {
+                "purchase_order": str(po.pk),
+                "delivery_date": date.today().isoformat(),
+                "delivery_cost": "0",
+                "items-TOTAL_FORMS": "1",
+                "items-INITIAL_FORMS": "0",
+                "items-MIN_NUM_FORMS": "0",
+                "items-MAX_NUM_FORMS": "1000",
+                "items-0-purchase_order_item": str(po_item.pk),
+                "items-0-product": str(product.pk),
+                "items-0-received_quantity": "10",
+            },
+            302,
+        )
+
+    def _process_transformation(self, items=5):
+        product = self._stocked_product(minimum=items, category=Product.Category.MOTORCYCLE)
+        data = {
+            "service_fee": "10000",
+            "transformation_date": date.today().isoformat(),
+            "items-TOTAL_FORMS": str(items),
+            "items-INITIAL_FORMS": "0",
+            "items-MIN_NUM_FORMS": "0",
+            "items-MAX_NUM_FORMS": "1000",
+        }
+        for i in range(items):
+            data[f"items-{i}-source_product"] = str(product.pk)
+            data[f"items-{i}-engine_number"] = f"ENG-BENCH-{i:04d}"
+            data[f"items-{i}-chassis_number"] = f"CHS-BENCH-{i:04d}"
+        return self._post(reverse("add_transformation"), data, 302)
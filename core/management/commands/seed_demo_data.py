@@ -5,14 +5,13 @@ from decimal import Decimal
 
 from django.core.management.base import BaseCommand
 from django.db import transaction as db_transaction
-from django.db.models import Sum
+from django.db.models import F, Sum
 from django.utils import timezone
 
 from account.models import CustomUser
 from customer.models import (
-    Customer, DepositAccount, Transaction, Sale, BoxedSale, CoupledSale,
-    PurchaseAgreement, PurchaseAgreementLineItem,
-    CfaAgreement, CfaFulfillment,
+    Customer, Transaction, Sale, BoxedSale, CoupledSale,
+    PurchaseAgreement, CfaAgreement, CfaFulfillment,
 )
 from customer.services import (
     record_deposit, create_sale, create_purchase_agreement,
@@ -56,6 +55,29 @@ class Command(BaseCommand):
         "Idempotent — safe to run multiple times."
     )
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scale",
+            type=float,
+            default=0,
+            help=(
+                "Also bulk-generate benchmark volumes; 1.0 = 10k products, 50k customers, "
+                "1M deposit transactions, 200k sales, 100k transformation items."
+            ),
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=42,
+            help="Random seed for --scale, so runs are reproducible (default 42).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per bulk_create for --scale (default 5000).",
+        )
+
     def handle(self, *args, **options):
         admin_user = self._seed_users()
 
@@ -79,9 +101,29 @@ class Command(BaseCommand):
                 )
             )
 
+        if options["scale"] > 0:
+            self._seed_scaled(admin_user, options)
+
         self._print_summary(customers, products, suppliers)
         self.stdout.write(self.style.SUCCESS("\nDemo data seeding complete!"))
 
+    def _seed_scaled(self, user, options):
+        from ._scale_seed import ScaleSeeder
+
+        seeder = ScaleSeeder(
+            user,
+            scale=options["scale"],
+            seed=options["seed"],
+            batch_size=options["batch_size"],
+            stdout=self.stdout,
+        )
+        if seeder.already_seeded():
+            self.stdout.write(
+                self.style.WARNING("  Scaled data already exists — skipping --scale seed.")
+            )
+            return
+        seeder.run()
+
     # ------------------------------------------------------------------
     # Phase 1 — Users
     # ------------------------------------------------------------------
@@ -389,11 +431,8 @@ class Command(BaseCommand):
                     cost_impact=qty * cost,
                 )
 
-                po_item.update_po_item_status()
-
-            po.update_po_delivery_status()
-            po.update_po_payment_status()
-            po.update_po_status()
+            po.po_items.recompute_statuses()
+            po.recompute_statuses()
         self.stdout.write(f"      Received all items → delivery: {po.delivery_status}")
 
     # ------------------------------------------------------------------
@@ -882,9 +921,15 @@ class Command(BaseCommand):
         ).aggregate(total=Sum("amount"))["total"] or Decimal("0.00")
 
         sale_count = Sale.objects.filter(status=Sale.Status.ACTIVE).count()
-        total_sales = Decimal("0.00")
-        for sale in Sale.objects.filter(status=Sale.Status.ACTIVE):
-            total_sales += sale.sales_total
+        total_sales = (
+            BoxedSale.objects.filter(sale__status=Sale.Status.ACTIVE).aggregate(
+                total=Sum(F("price") * F("quantity"))
+            )["total"] or Decimal("0.00")
+        ) + (
+            CoupledSale.objects.filter(sale__status=Sale.Status.ACTIVE).aggregate(
+                total=Sum("price")
+            )["total"] or Decimal("0.00")
+        )
 
         ag_count = PurchaseAgreement.objects.count()
         cfa_count = CfaAgreement.objects.count()
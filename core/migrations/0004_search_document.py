@@ -0,0 +1,24 @@
+# Generated by Django 6.0.4 on 2026-10-18 06:44
+
+import core.search
+from django.db import migrations
+
+
+def fill_search_documents(apps, schema_editor):
+    core.search.refresh_search_documents(apps.get_model("core", "AuditLog").objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_audit_log_indexes_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='search_document',
+            field=core.search.SearchDocumentField(default='', editable=False, sources=['action', 'object_type', 'object_repr']),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
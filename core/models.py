@@ -1,6 +1,9 @@
 import logging
 
 from django.db import models
+from django.utils import timezone
+
+from core.search import SearchDocumentField
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +20,76 @@ class AuditLog(models.Model):
     object_id = models.CharField(max_length=100)
     object_repr = models.CharField(max_length=255)
     detail = models.JSONField(default=dict)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when audit() is called, not when the buffered entry is written.
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
+    search_document = SearchDocumentField(sources=["action", "object_type", "object_repr"])
 
     class Meta:
         ordering = ["-timestamp"]
         verbose_name = "Audit Log"
         verbose_name_plural = "Audit Logs"
+        indexes = [
+            models.Index(fields=["timestamp"]),
+            models.Index(fields=["action", "timestamp"]),
+            models.Index(fields=["user", "timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.timestamp:%Y-%m-%d %H:%M} · {self.user} · {self.action} · {self.object_repr}"
+
+
+class AuditLogArchive(models.Model):
+    """
+    ``AuditLog`` rows from closed months, moved here by the
+    ``archive_audit_log`` command. Rows keep their original id and timestamp;
+    ``period`` (first day of the month) groups them so a whole month can be
+    exported or dropped with one range delete.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    period = models.DateField()
+    user = models.ForeignKey(
+        "account.CustomUser",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    action = models.CharField(max_length=100)
+    object_type = models.CharField(max_length=100)
+    object_id = models.CharField(max_length=100)
+    object_repr = models.CharField(max_length=255)
+    detail = models.JSONField(default=dict)
+    timestamp = models.DateTimeField()
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-timestamp"]
+        verbose_name = "Archived Audit Log"
+        verbose_name_plural = "Archived Audit Logs"
+        indexes = [
+            models.Index(fields=["period", "timestamp"]),
+        ]
+
+    def __str__(self):
+        return f"{self.timestamp:%Y-%m-%d %H:%M} · {self.user} · {self.action} · {self.object_repr}"
+
+
+class DocumentSequence(models.Model):
+    """
+    Last number handed out for one document-number prefix (e.g. ``SALE-2026``).
+    Only ``core.numbering`` writes here, in blocks, so the row is touched once
+    per block rather than once per document.
+    """
+
+    prefix = models.CharField(max_length=40, primary_key=True)
+    last_value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Document Sequence"
+        verbose_name_plural = "Document Sequences"
 
     def __str__(self):
-        return f"{self.timestamp:%Y-%m-%d %H:%M} · {self.user} · {self.action} · {self.object_repr}"
\ No newline at end of file
+        return f"{self.prefix} · {self.last_value}"
@@ -0,0 +1,110 @@
+"""
+Sequential document numbers (``SALE-2026-000123``) backed by the
+``DocumentSequence`` counter table.
+
+Each process reserves numbers in blocks and serves them from memory, so the
+counter row is written once per block instead of once per document and
+concurrent cashiers do not queue on it. Numbers are unique but not gapless:
+a block a process never finishes using is simply skipped.
+
+Blocks are reserved outside the caller's transaction (autocommit, or a side
+connection when called inside ``atomic``), so a rolled-back sale can never
+hand its numbers out twice. SQLite allows a single writer, so there a call
+inside ``atomic`` reserves exactly what it needs on the same connection and
+nothing is cached; those numbers roll back together with the document.
+"""
+
+import os
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+BLOCK_SIZE = 100
+WIDTH = 6
+
+
+def _reserve(connection, key, count):
+    """Bump the counter for *key* by *count*; return the last number reserved."""
+    from core.models import DocumentSequence
+
+    qn = connection.ops.quote_name
+    table = qn(DocumentSequence._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({qn('prefix')}, {qn('last_value')}) VALUES (%s, %s) "
+            f"ON CONFLICT ({qn('prefix')}) DO UPDATE SET "
+            f"{qn('last_value')} = {table}.{qn('last_value')} + excluded.{qn('last_value')} "
+            f"RETURNING {qn('last_value')}",
+            [key, count],
+        )
+        return cursor.fetchone()[0]
+
+
+class NumberAllocator:
+    """Per-process cache of reserved number blocks, keyed by counter prefix."""
+
+    def __init__(self, block_size=BLOCK_SIZE, using=DEFAULT_DB_ALIAS):
+        self.block_size = block_size
+        self.using = using
+        self._lock = threading.Lock()
+        self._blocks = {}
+        self._pid = os.getpid()
+
+    def take(self, key, count=1):
+        """Return *count* fresh numbers for *key*, in ascending order."""
+        connection = connections[self.using]
+        if connection.in_atomic_block and connection.vendor == "sqlite":
+            last = _reserve(connection, key, count)
+            return list(range(last - count + 1, last + 1))
+
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse its parent's blocks.
+                self._blocks.clear()
+                self._pid = os.getpid()
+
+            numbers = []
+            while len(numbers) < count:
+                start, end = self._blocks.get(key, (0, 0))
+                if start >= end:
+                    size = max(self.block_size, count - len(numbers))
+                    last = self._reserve_block(connection, key, size)
+                    start, end = last - size + 1, last + 1
+                take = min(end - start, count - len(numbers))
+                numbers.extend(range(start, start + take))
+                self._blocks[key] = (start + take, end)
+            return numbers
+
+    def _reserve_block(self, connection, key, size):
+        if not connection.in_atomic_block:
+            return _reserve(connection, key, size)
+        side = connections.create_connection(self.using)
+        try:
+            return _reserve(side, key, size)
+        finally:
+            side.close()
+
+    def reset(self):
+        """Forget cached blocks (tests, or after restoring the database)."""
+        with self._lock:
+            self._blocks.clear()
+
+
+allocator = NumberAllocator()
+
+
+def next_number(prefix, yearly=True, label=None):
+    """
+    Next document number for *prefix*, e.g. ``next_number("SALE")`` ->
+    ``"SALE-2026-000124"``. Yearly numbers restart at 1 each January.
+    *label* replaces the prefix in the output while still counting under it.
+    """
+    return next_numbers(prefix, 1, yearly=yearly, label=label)[0]
+
+
+def next_numbers(prefix, count, yearly=True, label=None):
+    """*count* document numbers for *prefix* with a single counter update."""
+    year = f"-{timezone.now().year}" if yearly else ""
+    key, shown = f"{prefix}{year}", f"{label or prefix}{year}"
+    return [f"{shown}-{n:0{WIDTH}d}" for n in allocator.take(key, count)]
@@ -0,0 +1,200 @@
+import base64
+import binascii
+import datetime
+import json
+import logging
+from collections.abc import Sequence
+from functools import cached_property
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from django.db.models.expressions import OrderBy
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder truncates datetimes to milliseconds; seeking needs them exact."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+class CursorPage(Sequence):
+    """
+    One page of a CursorPaginator. Quacks like django.core.paginator.Page
+    where it can, so templates and views can iterate it the same way.
+    """
+
+    is_cursor = True
+
+    def __init__(self, object_list, paginator, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset ("seek") paginator. Pages are addressed by an opaque cursor holding
+    the sort-key values of the row at the page boundary, so fetching any page
+    costs one LIMIT query of per_page + 1 rows, however deep it is.
+
+    The ordering is taken from the queryset (e.g. after core.utils.apply_sorting)
+    and the primary key is appended as a tie-breaker. NULLs sort first for
+    ascending keys and last for descending keys on every database.
+    """
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = self._resolve_ordering(queryset)
+
+    @cached_property
+    def count(self):
+        """Total row count. Only evaluated if something (e.g. a page header) asks for it."""
+        return self.queryset.count()
+
+    def get_page(self, cursor=None):
+        """Return the page for *cursor*, falling back to the first page if it is invalid."""
+        if cursor:
+            try:
+                return self._page(*self.decode_cursor(cursor))
+            except (InvalidCursor, ValidationError, ValueError, TypeError):
+                # Tampered, stale or made under another sort: its values may
+                # not even fit the fields being seeked on.
+                logger.warning("Ignoring invalid pagination cursor %r", cursor)
+        return self._page(None, False)
+
+    def _page(self, position, backwards):
+        ordering = [(name, not desc) for name, desc in self.ordering] if backwards else self.ordering
+        queryset = self.queryset.order_by(*(self._order_expression(n, d) for n, d in ordering))
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(ordering, position))
+
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or backwards:
+                next_cursor = self.encode_cursor(self._position(rows[-1]), backwards=False)
+            if position is not None and (has_more or not backwards):
+                previous_cursor = self.encode_cursor(self._position(rows[0]), backwards=True)
+        return CursorPage(rows, self, next_cursor, previous_cursor)
+
+    # ---- cursor encoding ----
+
+    def encode_cursor(self, position, backwards=False):
+        payload = json.dumps(
+            {"o": self._ordering_key(), "p": position, "b": backwards}, cls=_CursorEncoder
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            ordering, position, backwards = data["o"], data["p"], bool(data["b"])
+        except (ValueError, TypeError, KeyError, binascii.Error, UnicodeDecodeError):
+            raise InvalidCursor(cursor)
+        # A cursor only means something under the ordering it was made in
+        if ordering != self._ordering_key():
+            raise InvalidCursor(cursor)
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise InvalidCursor(cursor)
+        return position, backwards
+
+    def _ordering_key(self):
+        return [("-" if descending else "") + name for name, descending in self.ordering]
+
+    # ---- ordering helpers ----
+
+    @staticmethod
+    def _resolve_ordering(queryset):
+        ordering = []
+        for item in queryset.query.order_by or queryset.model._meta.ordering:
+            if isinstance(item, str):
+                if item == "?":
+                    raise ValueError("CursorPaginator cannot paginate a random ordering.")
+                ordering.append((item.lstrip("-"), item.startswith("-")))
+            elif isinstance(item, OrderBy) and isinstance(item.expression, F):
+                ordering.append((item.expression.name, item.descending))
+            else:
+                raise ValueError(f"CursorPaginator cannot seek on ordering {item!r}.")
+
+        pk_name = queryset.model._meta.pk.name
+        if not any(name in ("pk", pk_name) for name, _ in ordering):
+            descending = ordering[-1][1] if ordering else False
+            ordering.append(("pk", descending))
+        return ordering
+
+    @staticmethod
+    def _order_expression(name, descending):
+        if descending:
+            return F(name).desc(nulls_last=True)
+        return F(name).asc(nulls_first=True)
+
+    @staticmethod
+    def _seek_filter(ordering, position):
+        """Rows strictly after *position* in *ordering* (lexicographic on all keys)."""
+        condition = Q(pk__in=[])
+        equal_so_far = Q()
+        for (name, descending), value in zip(ordering, position):
+            if value is None:
+                # NULL is the smallest value: nothing is below it, everything else is above
+                after = Q(pk__in=[]) if descending else Q(**{f"{name}__isnull": False})
+                same = Q(**{f"{name}__isnull": True})
+            else:
+                lookup = "lt" if descending else "gt"
+                after = Q(**{f"{name}__{lookup}": value})
+                if descending:
+                    after |= Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            condition |= equal_so_far & after
+            equal_so_far &= same
+        return condition
+
+    def _position(self, obj):
+        values = []
+        for name, _ in self.ordering:
+            value = obj
+            parts = name.split("__")
+            for i, part in enumerate(parts):
+                if i == len(parts) - 1 and hasattr(value, f"{part}_id"):
+                    # Ordering on a foreign key sorts by its id; avoid loading the object
+                    part = f"{part}_id"
+                value = getattr(value, part, None)
+                if value is None:
+                    break
+            values.append(value)
+        return json.loads(json.dumps(values, cls=_CursorEncoder))
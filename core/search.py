@@ -0,0 +1,256 @@
+"""
+Shared search for the list pages and HTMX search boxes.
+
+Each searchable model carries a ``SearchDocumentField``: its searchable text
+(including text from related rows, e.g. the customer's name on a deposit)
+folded to lowercase ASCII words and stored in one column, kept current on
+save. A query matches rows where every word of the query starts a word of the
+document, so "jo ade" finds "John Adeyemi". Zero-padded numbers are also
+indexed without their leading zeros, so "123" finds "DEP-2026-000123".
+
+The document column is what a backend indexes:
+
+* ``SQLiteFTSBackend`` keeps an FTS5 table per model, keyed on the primary
+  key, in sync with triggers.
+* ``SearchBackend`` (every other database) filters with ``LIKE '% word%'``;
+  on PostgreSQL a pg_trgm GIN index serves that filter.
+
+Indexes are created by ``ensure_search_indexes`` after every ``migrate``, so
+they come back if SQLite rebuilds a table during a later migration. Set
+``SEARCH_BACKEND`` to a dotted path to use a different backend.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+from django.apps import apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, models
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(value):
+    """Lowercase ASCII words of *value*, separated by single spaces."""
+    value = unicodedata.normalize("NFKD", str(value or ""))
+    value = value.encode("ascii", "ignore").decode("ascii").lower()
+    return _NON_WORD.sub(" ", value).strip()
+
+
+def _with_unpadded_numbers(words):
+    """*words*, plus each zero-padded number again without its leading zeros."""
+    extra = [w.lstrip("0") for w in words.split() if w.isdigit() and w[0] == "0"]
+    return " ".join([words, *(w for w in extra if w)])
+
+
+def search_terms(query):
+    """The words of a search box query, as matched against documents."""
+    return normalize(query).split()
+
+
+class SearchDocumentField(models.TextField):
+    """
+    Read-only TextField holding the normalized text of *sources* (field names,
+    or dotted paths through relations such as ``"account.customer.full_name"``).
+    Filled in pre_save, so both save() and bulk_create() keep it current.
+    """
+
+    def __init__(self, *args, sources=(), **kwargs):
+        self.sources = tuple(sources)
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("default", "")
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["sources"] = list(self.sources)
+        return name, path, args, kwargs
+
+    def document_for(self, instance):
+        words = []
+        for source in self.sources:
+            value = instance
+            for attr in source.split("."):
+                value = getattr(value, attr, None)
+                if value is None:
+                    break
+            words.append(_with_unpadded_numbers(normalize(value)))
+        # Padded with spaces so " word" marks the start of any word.
+        return f" {' '.join(w for w in words if w)} "
+
+    def pre_save(self, model_instance, add):
+        value = self.document_for(model_instance)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+def search_document_field(model):
+    for field in model._meta.concrete_fields:
+        if isinstance(field, SearchDocumentField):
+            return field
+    return None
+
+
+def refresh_search_documents(queryset, batch_size=1000):
+    """
+    Recompute the search documents of *queryset*, writing only rows whose
+    document changed. Call it when text a document copies from a related
+    row is edited (a customer's name, a brand's name). Returns rows written.
+    """
+    field = search_document_field(queryset.model)
+    changed = []
+    for obj in queryset.iterator(chunk_size=batch_size):
+        document = field.document_for(obj)
+        if document != getattr(obj, field.attname):
+            setattr(obj, field.attname, document)
+            changed.append(obj)
+    queryset.model._base_manager.using(queryset.db).bulk_update(
+        changed, [field.name], batch_size=batch_size
+    )
+    return len(changed)
+
+
+class SearchBackend:
+    """Word-prefix LIKE filters on the document column; works everywhere."""
+
+    def __init__(self, using=DEFAULT_DB_ALIAS):
+        self.using = using
+
+    def setup(self, model, field):
+        """Create whatever index serves searches on *model* (idempotent)."""
+        connection = connections[self.using]
+        if connection.vendor != "postgresql":
+            return
+        table = model._meta.db_table
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {qn(table + '_search_trgm')} "
+                f"ON {qn(table)} USING gin ({qn(field.column)} gin_trgm_ops)"
+            )
+
+    def filter(self, queryset, field, terms):
+        return queryset.filter(
+            *[Q(**{f"{field.name}__contains": f" {term}"}) for term in terms]
+        )
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """
+    FTS5 index per model holding each row's document and primary key, kept
+    in sync by triggers so rows changed by update() or raw SQL stay findable.
+
+    Rows are keyed on the primary key itself (indexed as a token, so the
+    triggers find a row's entry with MATCH), never on SQLite's implicit
+    rowid, which VACUUM and table rebuilds are free to renumber.
+    """
+
+    def _names(self, model):
+        table = model._meta.db_table
+        return table, f"{table}_fts"
+
+    def setup(self, model, field):
+        connection = connections[self.using]
+        table, fts = self._names(model)
+        column, pk = field.column, model._meta.pk.column
+        triggers = [f"{fts}_ai", f"{fts}_ad", f"{fts}_au"]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name IN (%s, %s, %s)",
+                triggers,
+            )
+            if cursor.fetchone()[0] == 3:
+                return
+            # Missing or stale (SQLite drops triggers when it rebuilds a table);
+            # also clears the earlier rowid-keyed "<table>_search" index.
+            for name in (fts, f"{table}_search"):
+                for suffix in ("ai", "ad", "au"):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS "{name}_{suffix}"')
+                cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE "{fts}" USING fts5(document, pk, prefix=\'2 3\')'
+            )
+            new = f'INSERT INTO "{fts}"(document, pk) VALUES (new."{column}", new."{pk}");'
+            old = (
+                f'DELETE FROM "{fts}" WHERE "{fts}" MATCH '
+                f"'pk : \"' || old.\"{pk}\" || '\"';"
+            )
+            cursor.execute(f'CREATE TRIGGER "{triggers[0]}" AFTER INSERT ON "{table}" BEGIN {new} END')
+            cursor.execute(f'CREATE TRIGGER "{triggers[1]}" AFTER DELETE ON "{table}" BEGIN {old} END')
+            cursor.execute(
+                f'CREATE TRIGGER "{triggers[2]}" AFTER UPDATE OF "{column}" ON "{table}" '
+                f"BEGIN {old} {new} END"
+            )
+            cursor.execute(
+                f'INSERT INTO "{fts}"(document, pk) SELECT "{column}", "{pk}" FROM "{table}"'
+            )
+
+    def filter(self, queryset, field, terms):
+        _, fts = self._names(queryset.model)
+        match = " AND ".join(f'document : "{term}"*' for term in terms)
+        return queryset.filter(
+            pk__in=RawSQL(f'SELECT pk FROM "{fts}" WHERE "{fts}" MATCH %s', [match])
+        )
+
+
+@lru_cache(maxsize=None)
+def _sqlite_has_fts5(using):
+    with connections[using].cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+def get_search_backend(using=DEFAULT_DB_ALIAS):
+    path = getattr(settings, "SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)(using)
+    if connections[using].vendor == "sqlite" and _sqlite_has_fts5(using):
+        return SQLiteFTSBackend(using)
+    return SearchBackend(using)
+
+
+def search(queryset, query, ranked=False):
+    """
+    Rows of *queryset* matching every word of *query*. With *ranked*, rows
+    are annotated with ``search_rank`` and ordered best match first: the
+    query starting the document, then matching whole words, then prefixes.
+    A query without any words leaves *queryset* unfiltered.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return queryset
+    field = search_document_field(queryset.model)
+    queryset = get_search_backend(queryset.db).filter(queryset, field, terms)
+    if not ranked:
+        return queryset
+
+    phrase = " ".join(terms)
+    return queryset.annotate(
+        search_rank=Case(
+            When(**{f"{field.name}__startswith": f" {phrase}", "then": Value(3)}),
+            When(**{f"{field.name}__contains": f" {phrase} ", "then": Value(2)}),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by("-search_rank", *queryset.model._meta.ordering)
+
+
+def ensure_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    """post_migrate hook: make sure every searchable model has its index."""
+    backend = get_search_backend(using)
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        tables = set(connection.introspection.table_names(cursor))
+        for model in apps.get_models():
+            field = search_document_field(model)
+            if field is None or model._meta.db_table not in tables:
+                continue
+            # Skip models migrated back to before their search column.
+            columns = connection.introspection.get_table_description(cursor, model._meta.db_table)
+            if any(column.name == field.column for column in columns):
+                backend.setup(model, field)
@@ -0,0 +1,40 @@
+from middleware import QueryBudgetMiddleware
+
+
+class QueryBudgetTestMixin:
+    """
+    TestCase mixin for asserting query budgets on views.
+
+    Reads the stats middleware.QueryBudgetMiddleware leaves on the request, so
+    the numbers are the same ones reported in production logs:
+
+        class CustomerViewTest(QueryBudgetTestMixin, TestCase):
+            def test_detail_budget(self):
+                self.assertViewQueryBudget(url, queries=25, duplicates=0)
+    """
+
+    def assertWithinQueryBudget(self, response, queries=None, sql_ms=None, duplicates=None):
+        """
+        Fail if *response* exceeded the given limits, or the URL name's
+        settings.QUERY_BUDGETS entry when no limit is passed.
+        """
+        request = response.wsgi_request
+        stats = request.query_stats
+        if queries is None and sql_ms is None and duplicates is None:
+            budget = QueryBudgetMiddleware.budget_for(request.resolver_match.url_name)
+        else:
+            budget = {"queries": queries, "sql_ms": sql_ms, "duplicates": duplicates}
+
+        breaches = QueryBudgetMiddleware.exceeded(budget, stats)
+        if breaches:
+            detail = ", ".join(f"{m} {actual} > {limit}" for m, (actual, limit) in breaches.items())
+            repeated = stats.most_repeated()
+            if repeated:
+                detail += f"; most repeated ({repeated[1]}x): {repeated[0]}"
+            self.fail(f"{request.path} exceeded its query budget: {detail}")
+
+    def assertViewQueryBudget(self, url, data=None, queries=None, sql_ms=None, duplicates=None, **extra):
+        """GET *url* with self.client and assert it stays within budget. Returns the response."""
+        response = self.client.get(url, data, **extra)
+        self.assertWithinQueryBudget(response, queries=queries, sql_ms=sql_ms, duplicates=duplicates)
+        return response
@@ -1,10 +1,13 @@
-from django.test import TestCase, Client
+import json
+
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.urls import reverse
 from customer.models import Sale, Customer, Transaction
 from inventory.models import Product, Inventory
 from supply_chain.models import PurchaseOrder, Payment
 
 from django.contrib.auth import get_user_model
+from core.testing import QueryBudgetTestMixin
 
 class DashboardViewTest(TestCase):
     def setUp(self):
@@ -29,3 +32,762 @@ class DashboardViewTest(TestCase):
         self.assertIn('total_customers', response.context)
         self.assertIn('low_stock', response.context)
 
+    def test_dashboard_reads_daily_sales_summary(self):
+        from decimal import Decimal
+        from django.utils import timezone
+        from customer.models import DailySalesSummary
+        from inventory.models import Brand
+
+        product = Product.objects.create(
+            brand=Brand.objects.create(name="Summary Brand"), modelname="Summary Model"
+        )
+        DailySalesSummary.objects.create(
+            date=timezone.now().date(),
+            product=product,
+            channel=DailySalesSummary.Channel.BOXED,
+            payment_method=Sale.PaymentMethod.CASH,
+            revenue=Decimal("1000.00"),
+            units=2,
+            cost_of_goods=Decimal("600.00"),
+        )
+        response = self.client.get(self.dashboard_url)
+        self.assertEqual(response.context['daily_sales'], Decimal("1000.00"))
+        self.assertEqual(response.context['period_gross_profit'], Decimal("400.00"))
+        self.assertEqual(response.context['top_products'][0], product)
+
+
+class CursorPaginatorTest(TestCase):
+    def setUp(self):
+        from core.models import AuditLog
+        from django.utils import timezone
+
+        User = get_user_model()
+        self.user = User.objects.create_user(username='pager', password='password')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        # Five entries sharing two timestamps, so the pk tie-breaker matters
+        stamps = [timezone.now(), timezone.now() - timezone.timedelta(hours=1)]
+        for i in range(5):
+            log = AuditLog.objects.create(
+                user=self.user if i % 2 else None,
+                action='test', object_type='Test', object_id=str(i), object_repr=f'Entry {i}',
+            )
+            AuditLog.objects.filter(pk=log.pk).update(timestamp=stamps[i % 2])
+        self.logs = AuditLog.objects.order_by('-timestamp')
+
+    def _walk(self, paginator):
+        page = paginator.get_page()
+        pages = [[log.pk for log in page]]
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            pages.append([log.pk for log in page])
+        return page, pages
+
+    def test_forward_pages_match_offset_ordering(self):
+        from core.pagination import CursorPaginator
+
+        page, pages = self._walk(CursorPaginator(self.logs, 2))
+        expected = list(self.logs.order_by('-timestamp', '-pk').values_list('pk', flat=True))
+        self.assertEqual([pk for chunk in pages for pk in chunk], expected)
+        self.assertEqual([len(chunk) for chunk in pages], [2, 2, 1])
+        self.assertFalse(page.has_next())
+
+    def test_backward_pages_mirror_forward_pages(self):
+        from core.pagination import CursorPaginator
+
+        paginator = CursorPaginator(self.logs, 2)
+        page, pages = self._walk(paginator)
+        back = []
+        while page.has_previous():
+            page = paginator.get_page(page.previous_cursor)
+            back.insert(0, [log.pk for log in page])
+        self.assertEqual(back, pages[:-1])
+
+    def test_nullable_foreign_key_ordering(self):
+        from core.pagination import CursorPaginator
+
+        _, pages = self._walk(CursorPaginator(self.logs.order_by('user', 'timestamp'), 2))
+        seen = [pk for chunk in pages for pk in chunk]
+        self.assertEqual(sorted(seen), sorted(self.logs.values_list('pk', flat=True)))
+        # NULL users sort first when ascending
+        self.assertEqual(len([pk for pk in seen[:3] if self.logs.get(pk=pk).user_id is None]), 3)
+
+    def test_deep_page_costs_one_query(self):
+        from core.pagination import CursorPaginator
+
+        paginator = CursorPaginator(self.logs, 2)
+        cursor = paginator.get_page(paginator.get_page().next_cursor).next_cursor
+        with self.assertNumQueries(1):
+            paginator.get_page(cursor)
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        from core.pagination import CursorPaginator
+
+        paginator = CursorPaginator(self.logs, 2)
+        first = [log.pk for log in paginator.get_page()]
+        self.assertEqual([log.pk for log in paginator.get_page('not-a-cursor')], first)
+
+    def test_cursor_from_another_ordering_is_rejected(self):
+        from core.pagination import CursorPaginator, InvalidCursor
+
+        by_repr = CursorPaginator(self.logs.order_by('-object_repr'), 2)
+        cursor = by_repr.get_page().next_cursor
+        paginator = CursorPaginator(self.logs, 2)
+        with self.assertRaises(InvalidCursor):
+            paginator.decode_cursor(cursor)
+        first = [log.pk for log in paginator.get_page()]
+        self.assertEqual([log.pk for log in paginator.get_page(cursor)], first)
+
+    def test_cursor_values_that_do_not_fit_the_fields_fall_back(self):
+        from core.pagination import CursorPaginator
+
+        paginator = CursorPaginator(self.logs, 2)
+        first = [log.pk for log in paginator.get_page()]
+        cursor = paginator.encode_cursor(['1234.00', 1])
+        self.assertEqual([log.pk for log in paginator.get_page(cursor)], first)
+
+    def test_audit_log_view_follows_cursor(self):
+        from core.pagination import CursorPaginator
+
+        response = self.client.get(reverse('audit_log'))
+        page = response.context['logs']
+        self.assertFalse(page.has_other_pages())
+        self.assertEqual(page.paginator.count, 5)
+
+        cursor = CursorPaginator(self.logs, 2).get_page().next_cursor
+        response = self.client.get(reverse('audit_log'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['logs']), 3)
+        self.assertTrue(response.context['logs'].has_previous())
+
+    def test_cursor_paginated_pages_do_not_count_rows(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for name in ['audit_log', 'customers', 'products', 'transformations',
+                     'inventories', 'suppliers', 'sales', 'purchases']:
+            with self.subTest(page=name), CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(reverse(name))
+                self.assertEqual(response.status_code, 200)
+            counts = [q['sql'] for q in ctx.captured_queries if 'COUNT(*)' in q['sql'].upper()]
+            self.assertEqual(counts, [], name)
+
+
+class QueryBudgetMiddlewareTest(QueryBudgetTestMixin, TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='budget', password='password')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_server_timing_and_request_stats(self):
+        response = self.client.get(reverse('dashboard'))
+        stats = response.wsgi_request.query_stats
+        self.assertGreater(stats.count, 0)
+        self.assertIn(f'db;desc="{stats.count} queries"', response['Server-Timing'])
+        self.assertIn('total;dur=', response['Server-Timing'])
+
+    def test_duplicate_sql_is_counted(self):
+        from middleware import QueryStats
+
+        stats = QueryStats()
+        execute = lambda sql, params, many, context: None
+        for sql in ['SELECT 1', 'SELECT 2', 'SELECT 1', 'SELECT 1']:
+            stats(execute, sql, (), False, {})
+        self.assertEqual(stats.count, 4)
+        self.assertEqual(stats.duplicates, 2)
+        self.assertEqual(stats.most_repeated(), ('SELECT 1', 3))
+
+    @override_settings(QUERY_BUDGETS={'dashboard': 1})
+    def test_breach_is_logged(self):
+        with self.assertLogs('mrms.queries', level='WARNING') as logs:
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['url_name'], 'dashboard')
+        self.assertEqual(record['budget_exceeded']['queries'][1], 1)
+
+    @override_settings(QUERY_BUDGETS={'dashboard': 1000})
+    def test_request_within_budget_logs_at_debug(self):
+        import logging
+
+        with self.assertNoLogs('mrms.queries', level='INFO'):
+            self.client.get(reverse('dashboard'))
+
+        with self.assertLogs('mrms.queries', level='DEBUG') as logs:
+            self.client.get(reverse('dashboard'))
+        self.assertEqual(logs.records[0].levelno, logging.DEBUG)
+        self.assertNotIn('budget_exceeded', json.loads(logs.records[0].getMessage()))
+
+    @override_settings(QUERY_BUDGETS={'dashboard': {'queries': 1}}, QUERY_BUDGET_MODE='raise')
+    def test_breach_raises_in_raise_mode(self):
+        from middleware import QueryBudgetExceeded
+
+        with self.assertLogs('mrms.queries', level='WARNING'), self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('dashboard'))
+
+    def test_budget_helper(self):
+        self.assertViewQueryBudget(reverse('audit_log'), queries=20, duplicates=0)
+        with self.assertRaises(AssertionError):
+            self.assertViewQueryBudget(reverse('dashboard'), queries=1)
+
+
+class ScaledSeedAndBenchmarkTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        from core.management.commands._scale_seed import ScaleSeeder
+
+        cls.user = get_user_model().objects.create_user(username='admin', password='password')
+        ScaleSeeder(cls.user, scale=0.001, seed=7).run()
+
+    def test_stock_matches_ledger_and_layers(self):
+        from django.db.models import Sum
+        from inventory.models import InventoryCostLayer, InventoryTransaction
+
+        for inventory in Inventory.objects.select_related('product'):
+            ledger = InventoryTransaction.objects.filter(inventory=inventory).aggregate(
+                total=Sum('quantity_change'))['total'] or 0
+            layers = InventoryCostLayer.objects.filter(product=inventory.product).aggregate(
+                total=Sum('remaining_quantity'))['total'] or 0
+            self.assertEqual((ledger, layers), (inventory.quantity, inventory.quantity))
+
+    def test_cached_balances_are_consistent(self):
+        from customer.models import DepositAccount
+        from customer.services import reconcile_cached_balances
+
+        self.assertEqual(Customer.objects.count(), 50)
+        ids = list(DepositAccount.objects.values_list('pk', flat=True))
+        self.assertEqual(reconcile_cached_balances(ids), [])
+
+    def test_benchmark_records_baseline_and_flags_regressions(self):
+        import tempfile
+        from io import StringIO
+        from pathlib import Path
+        from django.core.management import call_command
+        from unittest import mock
+        from django.core.management.base import CommandError
+        from core import utils
+
+        sales_before = Sale.objects.count()
+        with tempfile.TemporaryDirectory() as tmp:
+            baseline = Path(tmp) / 'baseline.json'
+            with mock.patch.object(utils, '_write_audit', wraps=utils._write_audit) as write_audit:
+                call_command('benchmark', iterations=1, warmup=0, save_baseline=True,
+                             baseline=str(baseline), stdout=StringIO())
+            results = json.loads(baseline.read_text())['results']
+            self.assertIn('process_transformation', results)
+            self.assertGreater(results['create_sale']['queries'], 0)
+            # on_commit audit writes run inside the timed request
+            self.assertTrue(write_audit.called)
+            # Service targets are rolled back
+            self.assertEqual(Sale.objects.count(), sales_before)
+
+            results['dashboard']['queries'] -= 1
+            baseline.write_text(json.dumps({'results': results}))
+            with self.assertRaises(CommandError):
+                call_command('benchmark', iterations=1, warmup=0, only=['dashboard'],
+                             baseline=str(baseline), stdout=StringIO())
+
+
+class DocumentNumberTest(TransactionTestCase):
+    def test_blocks_are_reserved_once_and_served_from_memory(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.models import DocumentSequence
+        from core.numbering import NumberAllocator
+
+        allocator = NumberAllocator(block_size=10)
+        with CaptureQueriesContext(connection) as reserve:
+            self.assertEqual(allocator.take('T'), [1])
+        with CaptureQueriesContext(connection) as cached:
+            self.assertEqual(allocator.take('T', 9), list(range(2, 11)))
+        self.assertEqual(len(reserve.captured_queries), 1)
+        self.assertEqual(len(cached.captured_queries), 0)
+
+        # A second process shares the counter without overlapping.
+        other = NumberAllocator(block_size=10)
+        self.assertEqual(other.take('T', 3), [11, 12, 13])
+        self.assertEqual(allocator.take('T', 25)[0], 21)
+        self.assertEqual(DocumentSequence.objects.get(prefix='T').last_value, 45)
+
+    def test_numbers_inside_atomic_roll_back_with_the_document(self):
+        from django.db import transaction
+        from core.numbering import next_number, next_numbers
+        from django.utils import timezone
+
+        year = timezone.now().year
+        with transaction.atomic():
+            first = next_number('SALE')
+            with transaction.atomic():
+                rolled_back = next_number('SALE')
+                transaction.set_rollback(True)
+            again = next_number('SALE')
+            batch = next_numbers('ITEM', 3)
+            line = next_number('AGR', yearly=False, label='AGR-V2')
+        self.assertEqual(first, f'SALE-{year}-000001')
+        self.assertEqual(rolled_back, again)
+        self.assertEqual(batch, [f'ITEM-{year}-00000{n}' for n in (1, 2, 3)])
+        self.assertEqual(line, 'AGR-V2-000001')
+
+    def test_models_draw_sequential_numbers(self):
+        from core.numbering import allocator
+
+        allocator.reset()
+        self.addCleanup(allocator.reset)
+        User = get_user_model()
+        user = User.objects.create_user(username='numbers', password='password')
+        customers = [
+            Customer.objects.create(full_name=f'Customer {i}', phone=f'0801234567{i}', created_by=user)
+            for i in range(3)
+        ]
+        numbers = [c.customer_number for c in customers]
+        self.assertEqual(len(set(numbers)), 3)
+        self.assertEqual(sorted(numbers), numbers)
+        self.assertTrue(all(n.startswith('CUST-') for n in numbers))
+
+
+class AuditLogTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='auditor', password='password')
+        self.customer = Customer.objects.create(
+            full_name='Audit Customer', phone='08012345678', created_by=self.user
+        )
+
+    def test_buffered_entries_are_written_once_on_commit(self):
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+        from core.models import AuditLog
+        from core.utils import audit, buffered_audit
+
+        with buffered_audit():
+            with self.captureOnCommitCallbacks(execute=True):
+                with transaction.atomic():
+                    for action in ('void_sale', 'cancel_agreement', 'amend_line_item'):
+                        audit(self.user, action, self.customer, detail={'reason': 'test'})
+            # Committed, but held until the buffer closes.
+            self.assertFalse(AuditLog.objects.exists())
+        self.assertEqual(AuditLog.objects.count(), 3)
+        entry = AuditLog.objects.get(action='void_sale')
+        self.assertEqual(entry.object_type, 'Customer')
+        self.assertEqual(entry.detail, {'reason': 'test'})
+
+        with CaptureQueriesContext(connection) as flush:
+            with buffered_audit():
+                with self.captureOnCommitCallbacks(execute=True):
+                    audit(self.user, 'a', self.customer)
+                    audit(self.user, 'b', self.customer)
+        self.assertEqual(len(flush.captured_queries), 1)
+        self.assertEqual(AuditLog.objects.count(), 5)
+
+    def test_rolled_back_work_is_not_logged(self):
+        from django.db import transaction
+        from core.models import AuditLog
+        from core.utils import audit
+
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    audit(self.user, 'void_sale', self.customer)
+                    raise ValueError
+            except ValueError:
+                pass
+            audit(self.user, 'cancel_agreement', self.customer)
+        self.assertEqual(
+            list(AuditLog.objects.values_list('action', flat=True)), ['cancel_agreement']
+        )
+
+    def test_archive_command_moves_closed_months(self):
+        from datetime import datetime
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+        from core.models import AuditLog, AuditLogArchive
+
+        for month in (1, 1, 2, 3):
+            AuditLog.objects.create(
+                user=self.user,
+                action='void_sale',
+                object_type='Sale',
+                object_id='1',
+                object_repr='Sale 1',
+                timestamp=timezone.make_aware(datetime(2025, month, 15)),
+            )
+
+        out = StringIO()
+        call_command('archive_audit_log', '--before', '2025-03-01', '--dry-run', stdout=out)
+        self.assertIn('Would archive 3 audit log', out.getvalue())
+        self.assertEqual(AuditLogArchive.objects.count(), 0)
+
+        out = StringIO()
+        call_command('archive_audit_log', '--before', '2025-03-01', '--batch-size', '2', stdout=out)
+        self.assertIn('Archived 3 audit log', out.getvalue())
+        self.assertEqual(AuditLog.objects.count(), 1)
+        self.assertEqual(
+            sorted(AuditLogArchive.objects.values_list('period', flat=True)),
+            [datetime(2025, 1, 1).date()] * 2 + [datetime(2025, 2, 1).date()],
+        )
+
+    def test_archive_cutoff_walks_back_whole_months(self):
+        from datetime import date
+        from unittest import mock
+        from django.core.management.base import CommandError
+        from core.archiving import cutoff_from_options
+
+        with mock.patch('django.utils.timezone.localdate', return_value=date(2025, 3, 31)):
+            cutoff, before = cutoff_from_options({'before': None, 'months': 2})
+        self.assertEqual(cutoff, date(2025, 1, 1))
+        self.assertEqual(before.date(), cutoff)
+
+        with self.assertRaises(CommandError):
+            cutoff_from_options({'before': '2025-13-01', 'months': 12})
+
+    def test_audit_page_filters_by_local_day(self):
+        from datetime import datetime
+        from django.utils import timezone
+        from core.models import AuditLog
+
+        for day in (9, 10, 11):
+            AuditLog.objects.create(
+                user=self.user,
+                action='void_sale',
+                object_type='Sale',
+                object_id=str(day),
+                object_repr=f'Sale {day}',
+                timestamp=timezone.make_aware(datetime(2025, 6, day, 23, 30)),
+            )
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('audit_log'), {'start_date': '2025-06-10', 'end_date': '2025-06-10'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([log.object_id for log in response.context['logs']], ['10'])
+        self.assertEqual(list(response.context['distinct_users']), [self.user])
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='searcher', password='password')
+        self.ada = Customer.objects.create(
+            full_name='Adaeze Okafor', phone='08031234567', created_by=self.user
+        )
+        self.okafor = Customer.objects.create(
+            full_name='Okafor Motors', phone='08059876543', created_by=self.user
+        )
+        self.bola = Customer.objects.create(
+            full_name='Bola Ade-Okafor', phone='08070000000', created_by=self.user
+        )
+
+    def _backends(self):
+        from core.search import SearchBackend, get_search_backend
+
+        return [get_search_backend(), SearchBackend()]
+
+    def _names(self, query, **kwargs):
+        from core.search import search
+
+        return [c.full_name for c in search(Customer.objects.all(), query, **kwargs)]
+
+    def test_document_is_normalized(self):
+        from core.search import normalize
+
+        self.assertEqual(normalize('  Bola  Adé-Okafor!'), 'bola ade okafor')
+        number = self.bola.customer_number.split('-')[-1]
+        self.assertEqual(
+            self.bola.search_document,
+            f' bola ade okafor 08070000000 8070000000 cust {number} {number.lstrip("0")} ',
+        )
+
+    def test_every_backend_matches_word_prefixes(self):
+        from unittest import mock
+
+        for backend in self._backends():
+            with self.subTest(backend=type(backend).__name__):
+                with mock.patch('core.search.get_search_backend', return_value=backend):
+                    self.assertEqual(self._names('okaf'), ['Adaeze Okafor', 'Bola Ade-Okafor', 'Okafor Motors'])
+                    self.assertEqual(self._names('ADE  okafor'), ['Bola Ade-Okafor'])
+                    self.assertEqual(self._names('0803'), ['Adaeze Okafor'])
+                    # Matches start at word boundaries only.
+                    self.assertEqual(self._names('kafor'), [])
+                    self.assertEqual(len(self._names('!!')), 3)
+
+    def test_ranked_results_prefer_leading_and_whole_word_matches(self):
+        self.assertEqual(
+            self._names('okafor', ranked=True),
+            ['Okafor Motors', 'Adaeze Okafor', 'Bola Ade-Okafor'],
+        )
+
+    def test_numbers_match_with_or_without_leading_zeros(self):
+        from core.search import search
+
+        number = self.ada.customer_number.split('-')[-1]
+        self.assertTrue(number.startswith('0'))
+        self.assertEqual(self._names(number), ['Adaeze Okafor'])
+        self.assertEqual(self._names(number.lstrip('0')), ['Adaeze Okafor'])
+        self.assertEqual(self._names(self.ada.customer_number), ['Adaeze Okafor'])
+        self.assertEqual(self._names('08031234567'), ['Adaeze Okafor'])
+        self.assertEqual(self._names('8031234567'), ['Adaeze Okafor'])
+        # Word-prefix matching: digits from the middle of a number do not match.
+        self.assertEqual(self._names('1234567'), [])
+
+        self.ada.deposit_account.transactions.create(
+            transaction_type=Transaction.TransactionType.DEPOSIT, amount=100, created_by=self.user
+        )
+        deposit = Transaction.objects.get(account__customer=self.ada)
+        serial = deposit.reference_number.split('-')[-1]
+        self.assertEqual(list(search(Transaction.objects.all(), serial.lstrip('0'))), [deposit])
+
+    def test_customer_save_refreshes_transactions_only_when_the_name_changes(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        customer = Customer.objects.get(pk=self.ada.pk)
+        customer.phone = '08030000000'
+        with CaptureQueriesContext(connection) as queries:
+            customer.save()
+        self.assertFalse([q for q in queries.captured_queries if 'customer_transaction' in q['sql']])
+
+        customer.full_name = 'Adaeze Okafor-Bello'
+        with CaptureQueriesContext(connection) as queries:
+            customer.save()
+        self.assertTrue([q for q in queries.captured_queries if 'customer_transaction' in q['sql']])
+
+    def test_index_is_keyed_on_the_primary_key_not_the_rowid(self):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            # What VACUUM or a table rebuild may do to implicit rowids.
+            cursor.execute('UPDATE customer_customer SET rowid = rowid + 1000')
+        self.assertEqual(self._names('okafor motors'), ['Okafor Motors'])
+        self.okafor.full_name = 'Zenith Motors'
+        self.okafor.save()
+        self.assertEqual(self._names('motors'), ['Zenith Motors'])
+        self.assertEqual(self._names('okafor'), ['Adaeze Okafor', 'Bola Ade-Okafor'])
+
+    def test_index_follows_updates_deletes_and_related_renames(self):
+        from decimal import Decimal
+        from core.search import search
+
+        self.okafor.full_name = 'Zenith Motors'
+        self.okafor.save()
+        self.assertEqual(self._names('okafor'), ['Adaeze Okafor', 'Bola Ade-Okafor'])
+        # Bulk updates bypass save(); the index still follows the column.
+        Customer.objects.filter(pk=self.bola.pk).update(search_document=' bola ')
+        self.assertEqual(self._names('okafor'), ['Adaeze Okafor'])
+
+        from core.models import AuditLog
+
+        entry = AuditLog.objects.create(
+            action='void_sale', object_type='Sale', object_id='1', object_repr='SALE-1'
+        )
+        self.assertEqual(list(search(AuditLog.objects.all(), 'void sale')), [entry])
+        entry.delete()
+        self.assertFalse(search(AuditLog.objects.all(), 'void').exists())
+
+        deposit = Transaction.objects.create(
+            account=self.ada.deposit_account,
+            transaction_type=Transaction.TransactionType.DEPOSIT,
+            amount=Decimal('5000.00'),
+            note='Cash at branch',
+            created_by=self.user,
+        )
+        self.assertEqual(list(search(Transaction.objects.all(), 'adaeze cash')), [deposit])
+        self.ada.full_name = 'Adaeze Nwosu'
+        self.ada.save()
+        self.assertEqual(list(search(Transaction.objects.all(), 'nwosu')), [deposit])
+        self.assertEqual(list(search(Transaction.objects.all(), 'okafor')), [])
+
+    def test_search_box_endpoints(self):
+        self.client.force_login(self.user)
+        response = self.client.get(
+            reverse('search_customers_for_sale'), {'new_customer_name': 'okafor'}
+        )
+        self.assertEqual(
+            [c.full_name for c in response.context['customers']],
+            ['Okafor Motors', 'Adaeze Okafor', 'Bola Ade-Okafor'],
+        )
+
+        brand_model = Product._meta.get_field('brand').related_model
+        brand = brand_model.objects.create(name='Haojue')
+        product = Product.objects.create(
+            brand=brand, modelname='Express 125', category=Product.Category.MOTORCYCLE
+        )
+        response = self.client.get(reverse('products'), {'q': 'haojue express'})
+        self.assertIn(product, list(response.context['products']))
+        brand.name = 'Suzuki'
+        brand.save()
+        response = self.client.get(reverse('products'), {'q': 'suzuki 125'})
+        self.assertIn(product, list(response.context['products']))
+
+
+class FragmentCacheTest(TransactionTestCase):
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches['fragments'].clear()
+        self.addCleanup(caches['fragments'].clear)
+        User = get_user_model()
+        self.user = User.objects.create_user(username='fragments', password='password')
+        self.client.force_login(self.user)
+        brand_model = Product._meta.get_field('brand').related_model
+        self.brand = brand_model.objects.create(name='Fragment Brand')
+        self.product = Product.objects.create(
+            brand=self.brand, modelname='Alpha', category=Product.Category.MOTORCYCLE
+        )
+
+    def _get(self, **params):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('inventories'), {'sort': 'modelname', **params}, HTTP_HX_REQUEST='true'
+            )
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), len(queries.captured_queries)
+
+    def test_repeat_requests_skip_the_view_until_the_domain_changes(self):
+        first, rendered = self._get()
+        again, cached = self._get()
+        self.assertEqual(again, first)
+        # Only the session and user lookups remain.
+        self.assertLess(cached, rendered)
+        self.assertLessEqual(cached, 2)
+
+        # Other query strings are cached separately.
+        _, other = self._get(direction='desc')
+        self.assertGreater(other, cached)
+
+        self.product.modelname = 'Bravo'
+        self.product.save()
+        fresh, queries = self._get()
+        self.assertGreater(queries, cached)
+        self.assertIn('Bravo', fresh)
+
+    def test_rolled_back_writes_and_other_domains_keep_the_cache(self):
+        from django.db import transaction
+        from core.versions import INVENTORY, get_versions
+
+        self._get()
+        version = get_versions(INVENTORY)
+        try:
+            with transaction.atomic():
+                self.product.modelname = 'Charlie'
+                self.product.save()
+                raise ValueError
+        except ValueError:
+            pass
+        Customer.objects.create(full_name='Fragment Customer', phone='0801', created_by=self.user)
+        self.assertEqual(get_versions(INVENTORY), version)
+        _, queries = self._get()
+        self.assertLessEqual(queries, 2)
+
+    def test_full_page_loads_are_not_cached(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for _ in range(2):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('inventories'), {'sort': 'modelname'})
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(len(queries.captured_queries), 2)
+
+    def test_only_domain_models_are_tracked(self):
+        from django.contrib.sessions.models import Session
+        from django.db.models.deletion import Collector
+        from core.models import AuditLog
+        from inventory.models import InventoryTransaction
+
+        collector = Collector('default')
+        for model in [InventoryTransaction, AuditLog, Session]:
+            self.assertTrue(collector.can_fast_delete(model.objects.all()), model)
+        self.assertFalse(collector.can_fast_delete(Customer.objects.all()))
+
+    def test_product_list_follows_sales(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from core.versions import SALES, bump
+
+        def get():
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('products'), HTTP_HX_REQUEST='true')
+            return len(queries.captured_queries)
+
+        rendered = get()
+        self.assertLess(get(), rendered)
+        bump(SALES)
+        self.assertEqual(get(), rendered)
+
+
+class VersionedEtagTest(TransactionTestCase):
+    def setUp(self):
+        from django.core.cache import caches
+
+        caches['fragments'].clear()
+        self.addCleanup(caches['fragments'].clear)
+        User = get_user_model()
+        self.user = User.objects.create_user(username='etags', password='password')
+        self.client.force_login(self.user)
+        self.customer = Customer.objects.create(
+            full_name='Etag Customer', phone='08012345678', created_by=self.user
+        )
+        self.url = reverse('customer_detail', args=[self.customer.pk])
+
+    def _get(self, etag=None, tab='transactions'):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        headers = {'HTTP_HX_REQUEST': 'true', 'HTTP_HX_TARGET': 'tab_area'}
+        if etag:
+            headers['HTTP_IF_NONE_MATCH'] = etag
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'tab': tab}, **headers)
+        return response, len(queries.captured_queries)
+
+    def test_unchanged_tab_is_answered_with_304_before_the_view(self):
+        response, rendered = self._get()
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertIn('HX-Target', response['Vary'])
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        response, queries = self._get(etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertLess(queries, rendered)
+        self.assertLessEqual(queries, 2)
+
+        # Another tab, or the full page, is a different representation.
+        response, _ = self._get(etag, tab='agreements')
+        self.assertEqual(response.status_code, 200)
+        full = self.client.get(self.url, {'tab': 'transactions'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(full.status_code, 200)
+
+    def test_etag_follows_the_object_and_its_domains(self):
+        from supply_chain.models import Supplier
+
+        etag = self._get()[0]['ETag']
+        Supplier.objects.create(full_name='Unrelated Supplier')
+        self.assertEqual(self._get(etag)[0].status_code, 304)
+
+        self.customer.phone = '08099999999'
+        self.customer.save()
+        response, _ = self._get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pending_messages_disable_the_etag(self):
+        from django.contrib.messages import constants
+        from django.contrib.messages.storage.base import Message
+        from django.contrib.messages.storage.cookie import CookieStorage
+        from django.test import RequestFactory
+
+        etag = self._get()[0]['ETag']
+        storage = CookieStorage(RequestFactory().get('/'))
+        self.client.cookies[CookieStorage.cookie_name] = storage._encode(
+            [Message(constants.SUCCESS, 'Saved')]
+        )
+        response, _ = self._get(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
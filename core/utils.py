@@ -1,10 +1,16 @@
 import logging
+import threading
+from contextlib import contextmanager
+from functools import partial
 
-from django.db import DatabaseError, IntegrityError, OperationalError
+from django.db import DatabaseError, IntegrityError, OperationalError, transaction
 from django.db.models import QuerySet
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+_audit_buffer = threading.local()
+
 
 def apply_sorting(queryset: QuerySet, sort_field: str, direction: str = 'asc', allowed_fields: list = None) -> QuerySet:
     """
@@ -36,24 +42,66 @@ def audit(user, action, obj, detail=None, request=None):
     """
     Call this explicitly inside service functions for auditable actions.
     Never call from signals.
+
+    The entry is recorded only once the surrounding transaction commits, so
+    rolled-back work leaves no trace. Inside ``buffered_audit()`` (every
+    request, via AuditBufferMiddleware) committed entries are held and written
+    together with one bulk_create when the block ends.
     """
     from core.models import AuditLog
 
+    ip = None
+    if request:
+        x_forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        ip = x_forwarded.split(',')[0] if x_forwarded else request.META.get('REMOTE_ADDR')
+    entry = AuditLog(
+        user=user,
+        action=action,
+        object_type=type(obj).__name__,
+        object_id=str(obj.pk),
+        object_repr=str(obj)[:255],
+        detail=detail or {},
+        timestamp=timezone.now(),
+        ip_address=ip,
+    )
+    transaction.on_commit(partial(_collect_audit, entry))
+
+
+def _collect_audit(entry):
+    entries = getattr(_audit_buffer, "entries", None)
+    if entries is None:
+        _write_audit([entry])
+    else:
+        entries.append(entry)
+
+
+def _write_audit(entries):
+    from core.models import AuditLog
+
     try:
-        ip = None
-        if request:
-            x_forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
-            ip = x_forwarded.split(',')[0] if x_forwarded else request.META.get('REMOTE_ADDR')
-        AuditLog.objects.create(
-            user=user,
-            action=action,
-            object_type=type(obj).__name__,
-            object_id=str(obj.pk),
-            object_repr=str(obj),
-            detail=detail or {},
-            ip_address=ip,
-        )
+        AuditLog.objects.bulk_create(entries)
     except (DatabaseError, IntegrityError, OperationalError):
         logging.getLogger('core.audit').error(
-            f"AuditLog failed: action={action}", exc_info=True
-        )
\ No newline at end of file
+            "AuditLog failed: actions=%s",
+            ", ".join(entry.action for entry in entries),
+            exc_info=True,
+        )
+
+
+@contextmanager
+def buffered_audit():
+    """
+    Hold audit entries committed inside the block and write them with a
+    single insert on exit. Nested blocks share the outermost buffer.
+    """
+    if getattr(_audit_buffer, "entries", None) is not None:
+        yield
+        return
+
+    _audit_buffer.entries = []
+    try:
+        yield
+    finally:
+        entries, _audit_buffer.entries = _audit_buffer.entries, None
+        if entries:
+            _write_audit(entries)
@@ -0,0 +1,138 @@
+"""
+Change versions for the main data domains (inventory, customers, sales,
+supply chain) and for individual rows, used to key cached fragments and
+ETags.
+
+A domain's version is an opaque token kept in the fragment cache. Every
+committed write to one of its models drops the token and the next reader
+draws a fresh, unique one, so anything cached under the old token is never
+served again. Saves and deletes are picked up by signals; code writing with
+``update()``/``bulk_*`` calls ``bump()`` itself. Unlike a counter, concurrent
+bumps can never collapse into one, and an evicted token just starts afresh.
+
+Only models with a domain (and those handed to ``track``) get the signal
+receivers: any other model keeps Django's fast path for queryset deletes.
+
+A row's own version (``object_version``) moves whenever a tracked row is
+saved or deleted.
+"""
+
+import os
+import time
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+INVENTORY = "inventory"
+CUSTOMERS = "customers"
+SALES = "sales"
+SUPPLY_CHAIN = "supply_chain"
+
+# Most specific entry wins: "app_label.modelname", then "app_label".
+MODEL_DOMAINS = {
+    "inventory": (INVENTORY,),
+    "supply_chain": (SUPPLY_CHAIN,),
+    "customer": (CUSTOMERS,),
+    # Sales lists show the customer's name.
+    "customer.customer": (CUSTOMERS, SALES),
+    "customer.sale": (SALES,),
+    "customer.boxedsale": (SALES,),
+    "customer.coupledsale": (SALES,),
+    "customer.boxedsalelayerconsumption": (SALES,),
+    "customer.dailysalessummary": (SALES,),
+    # Append-only ledger and history tables: they are only ever written next
+    # to a tracked row (or call bump() themselves), and the archive commands
+    # need their bulk deletes to stay fast.
+    "inventory.inventorytransaction": (),
+    "inventory.inventorytransactionarchive": (),
+    "inventory.inventorycostlayerarchive": (),
+    "inventory.inventoryledgersummary": (),
+    "inventory.inventorysnapshot": (),
+}
+
+_tokens = count()
+
+
+def _store():
+    return caches[getattr(settings, "FRAGMENT_CACHE", "default")]
+
+
+def _key(domain):
+    return f"version:{domain}"
+
+
+def _object_key(model, pk):
+    return f"version:{model._meta.label_lower}:{pk}"
+
+
+def _new_token():
+    return f"{time.time_ns():x}.{os.getpid():x}.{next(_tokens):x}"
+
+
+def domains_for(model):
+    meta = model._meta
+    return MODEL_DOMAINS.get(meta.label_lower, MODEL_DOMAINS.get(meta.app_label, ()))
+
+
+def get_versions(*domains):
+    """Current token of each domain, in order; missing tokens are created."""
+    return _tokens_for([_key(domain) for domain in domains])
+
+
+def object_version(model, pk):
+    """Current token of one row of *model*."""
+    return _tokens_for([_object_key(model, pk)])[0]
+
+
+def _tokens_for(keys):
+    store = _store()
+    found = store.get_many(keys)
+    for key in keys:
+        if key not in found:
+            token = _new_token()
+            store.add(key, token, None)
+            found[key] = store.get(key) or token
+    return [found[key] for key in keys]
+
+
+def _bump_keys(keys):
+    if keys:
+        # robust: an unreachable cache must not fail the write that committed.
+        transaction.on_commit(lambda: _store().delete_many(keys), robust=True)
+
+
+def bump(*domains):
+    """Give each domain a new version once the current transaction commits."""
+    _bump_keys([_key(domain) for domain in domains])
+
+
+def bump_for_model(model):
+    bump(*domains_for(model))
+
+
+def track(model):
+    """Connect ``model_changed`` to *model*'s post_save and post_delete."""
+    uid = f"core.versions:{model._meta.label_lower}"
+    post_save.connect(model_changed, sender=model, dispatch_uid=f"{uid}:saved")
+    post_delete.connect(model_changed, sender=model, dispatch_uid=f"{uid}:deleted")
+
+
+def track_domain_models():
+    """Track every model that belongs to a domain (called from CoreConfig.ready)."""
+    from django.apps import apps
+
+    for model in apps.get_models():
+        if domains_for(model):
+            track(model)
+
+
+def model_changed(sender, instance, **kwargs):
+    """post_save / post_delete receiver: bump the row and its domains."""
+    if not kwargs.get("raw"):
+        _bump_keys(
+            [_key(domain) for domain in domains_for(sender)]
+            + [_object_key(sender, instance.pk)]
+        )
@@ -1,23 +1,19 @@
 from core.models import AuditLog
 from account.models import CustomUser
-from django.core.paginator import Paginator
-from django.db.models import Sum, Count, F, Q, DecimalField, Value
-from django.db.models.functions import TruncMonth, TruncDay, Coalesce
+from core.pagination import CursorPaginator
+from core.search import search
+from django.db.models import Sum, F, Value, Exists, OuterRef
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from datetime import timedelta, datetime
-from customer.models import Sale, Customer, Transaction, BoxedSale, CoupledSale, DepositAccount, PurchaseAgreement, CfaAgreement
+from datetime import timedelta, datetime, time
+from django.utils.dateparse import parse_date
+from customer.models import Sale, Customer, Transaction, DepositAccount, PurchaseAgreement, DailySalesSummary
 from inventory.models import Product, Inventory
-from supply_chain.models import PurchaseOrder, Payment, GoodsReceipt
+from supply_chain.models import PurchaseOrder, Payment
 import json
 from decimal import Decimal
 
-from django.shortcuts import render, redirect, get_object_or_404
-from django_htmx.http import replace_url, HttpResponseClientRedirect
-from django_htmx.middleware import HtmxDetails
-from django.http import HttpResponse
-from django.contrib import messages
-from render_block import render_block_to_string
-from django.template.loader import render_to_string
+from django.shortcuts import render
 
 def dashboard(request):
     today = timezone.now().date()
@@ -58,41 +54,27 @@ def dashboard(request):
     def period_filter(queryset, date_field):
         return queryset.filter(**{f'{date_field}__date__gte': start_date, f'{date_field}__date__lte': end_date})
 
-    # --- Safe revenue calculation helpers ---
-    # Use separate aggregates on BoxedSale + CoupledSale to avoid NULL poisoning
-    # and cartesian-product bugs from joining two reverse relations in one Sum expr.
+    # --- Revenue helpers ---
+    # Read from the DailySalesSummary rollup (maintained by create_sale/void_sale)
+    # instead of scanning BoxedSale/CoupledSale with un-indexable __date filters.
+    summaries = DailySalesSummary.objects.all()
+
     def _revenue_in_range(start, end):
         """Total revenue from ACTIVE sales with sale_date in [start, end] (inclusive)."""
-        boxed = BoxedSale.objects.filter(
-            sale__status=Sale.Status.ACTIVE,
-            sale__sale_date__date__gte=start,
-            sale__sale_date__date__lte=end,
-        ).aggregate(
-            total=Coalesce(
-                Sum(F("price") * F("quantity"), output_field=DecimalField()),
-                Value(Decimal("0.00")),
-                output_field=DecimalField(),
-            )
-        )["total"] or Decimal("0.00")
-
-        coupled = CoupledSale.objects.filter(
-            sale__status=Sale.Status.ACTIVE,
-            sale__sale_date__date__gte=start,
-            sale__sale_date__date__lte=end,
-        ).aggregate(
-            total=Coalesce(
-                Sum("price", output_field=DecimalField()),
-                Value(Decimal("0.00")),
-                output_field=DecimalField(),
-            )
-        )["total"] or Decimal("0.00")
+        return summaries.filter(date__gte=start, date__lte=end).aggregate(
+            total=Coalesce(Sum("revenue"), Value(Decimal("0.00")))
+        )["total"]
 
-        return boxed + coupled
+    period_summaries = summaries.filter(date__gte=start_date, date__lte=end_date)
 
     # --- Financial Metrics ---
     daily_sales = _revenue_in_range(today, today)
 
-    period_sales = _revenue_in_range(start_date, end_date)
+    period_totals = period_summaries.aggregate(
+        revenue=Coalesce(Sum("revenue"), Value(Decimal("0.00"))),
+        cost=Coalesce(Sum("cost_of_goods"), Value(Decimal("0.00"))),
+    )
+    period_sales = period_totals["revenue"]
 
     year_start = today.replace(month=1, day=1)
     year_end = today.replace(month=12, day=31)
@@ -104,35 +86,7 @@ def dashboard(request):
     ).aggregate(total=Sum('amount_paid'))['total'] or 0
 
     # --- Gross Profit ---
-    boxed_cost_qs = BoxedSale.objects.filter(sale__status=Sale.Status.ACTIVE)
-    coupled_cost_qs = CoupledSale.objects.filter(sale__status=Sale.Status.ACTIVE)
-    boxed_cost_qs = period_filter(boxed_cost_qs, 'sale__sale_date')
-    coupled_cost_qs = period_filter(coupled_cost_qs, 'sale__sale_date')
-
-    boxed_cost = boxed_cost_qs.aggregate(
-        total=Coalesce(
-            Sum(
-                Coalesce(
-                    "cost_basis",
-                    F("quantity") * F("product__inventory__weighted_average_cost"),
-                    output_field=DecimalField(),
-                ),
-                output_field=DecimalField(),
-            ),
-            Value(Decimal("0.00")),
-            output_field=DecimalField(),
-        )
-    )["total"] or Decimal("0.00")
-
-    coupled_cost = coupled_cost_qs.aggregate(
-        total=Coalesce(
-            Sum("transformation_item__unit_cost_at_transformation", output_field=DecimalField()),
-            Value(Decimal("0.00")),
-            output_field=DecimalField(),
-        )
-    )["total"] or Decimal("0.00")
-
-    cost_of_goods = boxed_cost + coupled_cost
+    cost_of_goods = period_totals["cost"]
 
     period_gross_profit = period_sales - cost_of_goods
     period_net_profit = period_gross_profit
@@ -156,12 +110,18 @@ def dashboard(request):
     last_7_days = today - timedelta(days=6)
     days_labels = []
     days_data = []
+    revenue_by_day = dict(
+        summaries.filter(date__gte=last_7_days, date__lte=today)
+        .values("date")
+        .annotate(total=Sum("revenue"))
+        .order_by()
+        .values_list("date", "total")
+    )
     for i in range(7):
         day = last_7_days + timedelta(days=i)
         day_str = day.strftime("%Y-%m-%d")
         days_labels.append(day_str)
-        rev = _revenue_in_range(day, day)
-        days_data.append(float(rev))
+        days_data.append(float(revenue_by_day.get(day, 0)))
 
     chart_max = max(days_data) if days_data else 1
     if chart_max == 0:
@@ -186,44 +146,12 @@ def dashboard(request):
         })
 
     # --- Top Selling Products ---
-    # Compute using separate per-channel aggregates + python merge to avoid
-    # cross-relation Sum cartesian / date-filter join duplication bugs.
-    boxed_revenue = (
-        BoxedSale.objects.filter(
-            sale__status=Sale.Status.ACTIVE,
-            sale__sale_date__date__gte=start_date,
-            sale__sale_date__date__lte=end_date,
-        )
-        .values("product_id")
-        .annotate(
-            rev=Coalesce(
-                Sum(F("price") * F("quantity"), output_field=DecimalField()),
-                Value(Decimal("0.00")),
-            )
-        )
-    )
-    boxed_map = {item["product_id"]: item["rev"] for item in boxed_revenue}
-
-    coupled_revenue = (
-        CoupledSale.objects.filter(
-            sale__status=Sale.Status.ACTIVE,
-            sale__sale_date__date__gte=start_date,
-            sale__sale_date__date__lte=end_date,
-        )
-        .values("transformation_item__target_product_id")
-        .annotate(
-            rev=Coalesce(Sum("price", output_field=DecimalField()), Value(Decimal("0.00")))
-        )
+    all_revenues = dict(
+        period_summaries.values("product_id")
+        .annotate(rev=Sum("revenue"))
+        .order_by()
+        .values_list("product_id", "rev")
     )
-    coupled_map = {
-        item["transformation_item__target_product_id"]: item["rev"] for item in coupled_revenue
-    }
-
-    all_revenues = {}
-    for pid, rev in boxed_map.items():
-        all_revenues[pid] = all_revenues.get(pid, Decimal("0.00")) + rev
-    for pid, rev in coupled_map.items():
-        all_revenues[pid] = all_revenues.get(pid, Decimal("0.00")) + rev
 
     sorted_items = sorted(all_revenues.items(), key=lambda x: x[1], reverse=True)[:5]
     top_pids = [pid for pid, _ in sorted_items]
@@ -239,26 +167,25 @@ def dashboard(request):
         p.revenue_percent = int((float(p.total_revenue) / max_revenue) * 100)
 
     # --- Sales by Category ---
-    category_qs = BoxedSale.objects.filter(sale__status=Sale.Status.ACTIVE)
-    category_qs = period_filter(category_qs, 'sale__sale_date')
-
-    sales_by_category = category_qs.values('product__category').annotate(
-        total=Sum(F('price') * F('quantity'))
+    sales_by_category = period_summaries.filter(
+        channel=DailySalesSummary.Channel.BOXED
+    ).values('product__category').annotate(
+        total=Sum('revenue')
     ).order_by('-total')
 
     category_labels = [item['product__category'].title() for item in sales_by_category]
     category_data = [float(item['total']) for item in sales_by_category]
 
     # --- Recent Activity ---
-    # Avoid fragile annotate; reuse the model's sales_total property which
-    # safely aggregates boxed + coupled separately.
+    # with_totals() sums boxed and coupled lines in separate subqueries.
     recent_sales = (
-        Sale.objects.filter(status=Sale.Status.ACTIVE)
+        Sale.objects.with_totals()
+        .filter(status=Sale.Status.ACTIVE)
         .select_related("customer")
         .order_by("-sale_date")[:5]
     )
     for sale in recent_sales:
-        sale.calc_total = sale.sales_total
+        sale.calc_total = sale.total_amount
 
     recent_deposits = Transaction.objects.filter(
         status=Transaction.Status.ACTIVE,
@@ -367,11 +294,7 @@ def audit_log(request):
     logs = AuditLog.objects.select_related("user").all()
 
     if search_query:
-        logs = logs.filter(
-            Q(action__icontains=search_query)
-            | Q(object_repr__icontains=search_query)
-            | Q(object_type__icontains=search_query)
-        )
+        logs = search(logs, search_query)
 
     if action_filter:
         logs = logs.filter(action=action_filter)
@@ -379,11 +302,20 @@ def audit_log(request):
     if user_filter:
         logs = logs.filter(user_id=user_filter)
 
-    if start_date:
-        logs = logs.filter(timestamp__date__gte=start_date)
+    # Local-day bounds as timestamp ranges so the (…, timestamp) indexes apply.
+    start_day = parse_date(start_date) if start_date else None
+    if start_day:
+        logs = logs.filter(
+            timestamp__gte=timezone.make_aware(datetime.combine(start_day, time.min))
+        )
 
-    if end_date:
-        logs = logs.filter(timestamp__date__lte=end_date)
+    end_day = parse_date(end_date) if end_date else None
+    if end_day:
+        logs = logs.filter(
+            timestamp__lt=timezone.make_aware(
+                datetime.combine(end_day + timedelta(days=1), time.min)
+            )
+        )
 
     if sort_by == "oldest":
         logs = logs.order_by("timestamp")
@@ -391,9 +323,8 @@ def audit_log(request):
         logs = logs.order_by("-timestamp")
 
     PAGE_SIZE = 50
-    paginator = Paginator(logs, PAGE_SIZE)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(logs, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
 
     distinct_actions = (
         AuditLog.objects.values_list("action", flat=True)
@@ -401,8 +332,8 @@ def audit_log(request):
         .order_by("action")
     )
     distinct_users = CustomUser.objects.filter(
-        auditlog__isnull=False
-    ).distinct().order_by("first_name", "last_name")
+        Exists(AuditLog.objects.filter(user=OuterRef("pk")))
+    ).order_by("first_name", "last_name")
 
     params = {}
     if search_query:
@@ -434,7 +365,7 @@ def audit_log(request):
     if request.htmx:
         if any(
             key in request.GET
-            for key in ["page", "q", "action", "user", "start_date", "end_date", "sort"]
+            for key in ["page", "cursor", "q", "action", "user", "start_date", "end_date", "sort"]
         ):
             return render(
                 request,
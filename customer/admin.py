@@ -17,6 +17,18 @@ from .models import (
 from django.contrib.admin import DateFieldListFilter
 
 
+class AgreementLabelAdminMixin:
+    """
+    Build agreement and line-item choices from ``with_labels()`` querysets so
+    their labels render without per-option queries.
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.related_model in (PurchaseAgreement, PurchaseAgreementLineItem):
+            kwargs.setdefault("queryset", db_field.related_model.objects.with_labels())
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
 class AuditLogAdminMixin:
     """
     Mixin to handle created_by and updated_by fields automatically
@@ -72,6 +84,9 @@ class PurchaseAgreementLineItemInline(admin.TabularInline):
     ]
     show_change_link = True
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_fulfillment().with_labels()
+
     def quantity_fulfilled_display(self, obj):
         return obj.quantity_fulfilled_accross_all_versions
 
@@ -83,7 +98,7 @@ class PurchaseAgreementLineItemInline(admin.TabularInline):
     remaining_quantity_display.short_description = "Remaining Qty"
 
 
-class BoxedSaleInline(admin.StackedInline):
+class BoxedSaleInline(AgreementLabelAdminMixin, admin.StackedInline):
     model = BoxedSale
     extra = 0
     readonly_fields = [
@@ -96,7 +111,7 @@ class BoxedSaleInline(admin.StackedInline):
     autocomplete_fields = ["product", "agreement_line_item"]
 
 
-class CoupledSaleInline(admin.StackedInline):
+class CoupledSaleInline(AgreementLabelAdminMixin, admin.StackedInline):
     model = CoupledSale
     extra = 0
     readonly_fields = [
@@ -264,6 +279,9 @@ class PurchaseAgreementAdmin(AuditLogAdminMixin, admin.ModelAdmin):
     inlines = [PurchaseAgreementLineItemInline]
     autocomplete_fields = ["account"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_fulfillment().with_labels()
+
     def account_link(self, obj):
         url = reverse("admin:customer_depositaccount_change", args=[obj.account.pk])
         return format_html('<a href="{}">{}</a>', url, obj.account.customer.full_name)
@@ -284,7 +302,9 @@ class PurchaseAgreementAdmin(AuditLogAdminMixin, admin.ModelAdmin):
 
 
 @admin.register(PurchaseAgreementLineItem)
-class PurchaseAgreementLineItemAdmin(AuditLogAdminMixin, admin.ModelAdmin):
+class PurchaseAgreementLineItemAdmin(
+    AgreementLabelAdminMixin, AuditLogAdminMixin, admin.ModelAdmin
+):
     list_display = [
         "line_number",
         "purchase_agreement",
@@ -301,9 +321,12 @@ class PurchaseAgreementLineItemAdmin(AuditLogAdminMixin, admin.ModelAdmin):
     ]
     autocomplete_fields = ["product", "purchase_agreement", "superseded_by"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_labels()
+
 
 @admin.register(Sale)
-class SaleAdmin(AuditLogAdminMixin, admin.ModelAdmin):
+class SaleAdmin(AgreementLabelAdminMixin, AuditLogAdminMixin, admin.ModelAdmin):
     list_display = [
         "sale_number",
         "sale_date",
@@ -327,7 +350,7 @@ class SaleAdmin(AuditLogAdminMixin, admin.ModelAdmin):
 
 
 @admin.register(BoxedSale)
-class BoxedSaleAdmin(AuditLogAdminMixin, admin.ModelAdmin):
+class BoxedSaleAdmin(AgreementLabelAdminMixin, AuditLogAdminMixin, admin.ModelAdmin):
     list_display = [
         "boxed_sale_number",
         "get_parent_sale_number",
@@ -374,7 +397,7 @@ class BoxedSaleAdmin(AuditLogAdminMixin, admin.ModelAdmin):
 
 
 @admin.register(CoupledSale)
-class CoupledSaleAdmin(AuditLogAdminMixin, admin.ModelAdmin):
+class CoupledSaleAdmin(AgreementLabelAdminMixin, AuditLogAdminMixin, admin.ModelAdmin):
     list_display = [
         "get_product",
         "coupled_sale_number",
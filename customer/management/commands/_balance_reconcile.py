@@ -0,0 +1,62 @@
+"""Shared batching / process-pool runner for the cached balance commands."""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.db import connection
+
+# Workers are spawned, never forked: a forked child would inherit the parent's
+# open database connections and whatever threads it happened to be running.
+# A spawned worker re-imports this module before its initializer has run, so
+# nothing here may import models at module level.
+MP_CONTEXT = multiprocessing.get_context("spawn")
+
+
+def _init_worker(database_name):
+    from django.conf import settings
+
+    # Read the same database as the parent, which may have switched to a test one
+    settings.DATABASES["default"]["NAME"] = database_name
+    django.setup()
+
+
+def _reconcile_chunk(account_ids, fix):
+    from customer.services import reconcile_cached_balances
+
+    return reconcile_cached_balances(account_ids, fix=fix)
+
+
+def reconcile_in_batches(fix, batch_size, workers=1):
+    """
+    Yield (checked, mismatches) for each batch of accounts.
+    With workers > 1 batches are spread across a pool of spawned processes,
+    each using its own database connection. SQLite allows a single writer,
+    so fixing balances there always runs in-process.
+    """
+    from customer.models import DepositAccount
+
+    if fix and connection.vendor == "sqlite":
+        workers = 1
+
+    account_ids = list(
+        DepositAccount.objects.order_by("pk").values_list("pk", flat=True)
+    )
+    batches = [
+        account_ids[i:i + batch_size] for i in range(0, len(account_ids), batch_size)
+    ]
+
+    if workers <= 1:
+        for batch in batches:
+            yield len(batch), _reconcile_chunk(batch, fix)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=MP_CONTEXT,
+        initializer=_init_worker,
+        initargs=(connection.settings_dict["NAME"],),
+    ) as pool:
+        for batch, mismatches in zip(
+            batches, pool.map(_reconcile_chunk, batches, [fix] * len(batches))
+        ):
+            yield len(batch), mismatches
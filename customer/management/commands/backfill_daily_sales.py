@@ -0,0 +1,40 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from customer.services import rebuild_daily_sales_summary
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailySalesSummary rollup from sale lines"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--start",
+            help="First day to rebuild (YYYY-MM-DD). Defaults to the earliest sale.",
+        )
+        parser.add_argument(
+            "--end",
+            help="Last day to rebuild (YYYY-MM-DD). Defaults to the latest sale.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            start = self._parse(options["start"])
+            end = self._parse(options["end"])
+        except ValueError as e:
+            raise CommandError(f"Invalid date: {e}")
+
+        if start and end and start > end:
+            raise CommandError("--start must be on or before --end")
+
+        rows = rebuild_daily_sales_summary(start=start, end=end)
+        self.stdout.write(
+            self.style.SUCCESS(f"Completed! Wrote {rows} daily sales summary rows.")
+        )
+
+    @staticmethod
+    def _parse(value):
+        if not value:
+            return None
+        return datetime.strptime(value, "%Y-%m-%d").date()
@@ -1,7 +1,11 @@
+import json
+
 from django.core.management.base import BaseCommand
 from customer.models import DepositAccount
 from django.db import transaction, DatabaseError, IntegrityError, OperationalError
 
+from ._balance_reconcile import reconcile_in_batches
+
 
 class Command(BaseCommand):
     help = "Populate cached balances for all deposit accounts"
@@ -13,10 +17,51 @@ class Command(BaseCommand):
             default=100,
             help="Number of accounts to process in each batch",
         )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Split batches across N worker processes (writes stay serial on SQLite)",
+        )
+        parser.add_argument(
+            "--per-account",
+            action="store_true",
+            help="Recalculate one account at a time with the model methods (slow)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the corrections as a JSON report",
+        )
 
     def handle(self, *args, **options):
-        batch_size = options["batch_size"]
+        if options["per_account"]:
+            return self._handle_per_account(options["batch_size"])
+
+        checked = 0
+        corrections = []
+        for batch_checked, mismatches in reconcile_in_batches(
+            fix=True, batch_size=options["batch_size"], workers=options["workers"]
+        ):
+            checked += batch_checked
+            corrections.extend(mismatches)
+            if not options["json"]:
+                self.stdout.write(f"Progress: {checked} accounts checked...")
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps({"checked": checked, "corrections": corrections}, indent=2)
+            )
+            return
+
+        corrected = len({c["account_id"] for c in corrections})
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\nCompleted! Checked: {checked}, Corrected: {corrected}"
+            )
+        )
 
+    def _handle_per_account(self, batch_size):
         accounts = DepositAccount.objects.all()
         total = accounts.count()
 
@@ -1,12 +1,86 @@
+import json
+
 from django.core.management.base import BaseCommand
 from customer.models import DepositAccount
 from decimal import Decimal
 
+from ._balance_reconcile import reconcile_in_batches
+
 
 class Command(BaseCommand):
     help = "Verify that cached balances match calculated balances"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of accounts to verify in each batch",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Split batches across N worker processes (writes stay serial on SQLite)",
+        )
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Write corrected balances for mismatched accounts",
+        )
+        parser.add_argument(
+            "--per-account",
+            action="store_true",
+            help="Verify one account at a time with the model methods (slow)",
+        )
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Print the mismatches as a JSON report",
+        )
+
     def handle(self, *args, **options):
+        if options["per_account"]:
+            return self._handle_per_account()
+
+        checked = 0
+        mismatches = []
+        for batch_checked, batch_mismatches in reconcile_in_batches(
+            fix=options["fix"],
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+        ):
+            checked += batch_checked
+            mismatches.extend(batch_mismatches)
+
+        if options["json"]:
+            self.stdout.write(
+                json.dumps(
+                    {"checked": checked, "fixed": options["fix"], "mismatches": mismatches},
+                    indent=2,
+                )
+            )
+            return
+
+        for m in mismatches:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"MISMATCH {m['account_number']} - {m['field'].title()}: "
+                    f"Cached={m['cached']}, Calculated={m['calculated']}"
+                )
+            )
+
+        if not mismatches:
+            self.stdout.write(
+                self.style.SUCCESS(f"✓ All {checked} accounts verified successfully!")
+            )
+        else:
+            suffix = " (fixed)" if options["fix"] else ""
+            self.stdout.write(
+                self.style.ERROR(f"✗ Found {len(mismatches)} mismatches{suffix}")
+            )
+
+    def _handle_per_account(self):
         accounts = DepositAccount.objects.all()
         total = accounts.count()
 
@@ -18,7 +92,7 @@ class Command(BaseCommand):
             # Calculate fresh values
             calc_total = account._calculate_total_balance()
             calc_allocated = account._calculate_allocated_balance()
-            calc_available = account._calculate_available_balance()
+            calc_available = calc_total - calc_allocated
 
             # Compare with cached
             if account.cached_total_balance != calc_total:
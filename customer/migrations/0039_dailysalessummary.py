@@ -0,0 +1,36 @@
+# Generated by Django 6.0.4 on 2026-10-18 05:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0038_alter_customer_options_alter_depositaccount_options'),
+        ('inventory', '0012_alter_inventory_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('channel', models.CharField(choices=[('boxed', 'Boxed'), ('coupled', 'Coupled')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('bank transfer', 'Bank Transfer'), ('cash', 'Cash'), ('from deposit', 'From Deposit')], max_length=50)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('units', models.IntegerField(default=0)),
+                ('cost_of_goods', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales_summaries', to='inventory.product')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily Sales Summaries',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['date', 'channel'], name='customer_da_date_dcbc4d_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'product', 'channel', 'payment_method'), name='unique_daily_sales_summary')],
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.4 on 2026-10-18 06:44
+
+import core.search
+from django.db import migrations
+
+
+def fill_search_documents(apps, schema_editor):
+    core.search.refresh_search_documents(apps.get_model("customer", "Customer").objects.all())
+    core.search.refresh_search_documents(apps.get_model("customer", "Transaction").objects.select_related("account__customer"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0039_dailysalessummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='search_document',
+            field=core.search.SearchDocumentField(default='', editable=False, sources=['full_name', 'phone', 'customer_number']),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='search_document',
+            field=core.search.SearchDocumentField(default='', editable=False, sources=['reference_number', 'account.customer.full_name', 'note']),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 6.0.4 on 2026-10-18 09:12
+
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, DecimalField, F, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate
+
+# Literal values as of this migration: Sale.Status.ACTIVE and
+# DailySalesSummary.Channel.BOXED / COUPLED.
+ACTIVE = "active"
+BOXED = "boxed"
+COUPLED = "coupled"
+
+
+def fill_daily_sales_summary(apps, schema_editor):
+    """Build the rollup from the existing sale lines, one row per day x product x channel x payment method."""
+    BoxedSale = apps.get_model("customer", "BoxedSale")
+    CoupledSale = apps.get_model("customer", "CoupledSale")
+    DailySalesSummary = apps.get_model("customer", "DailySalesSummary")
+
+    money = DecimalField(max_digits=15, decimal_places=2)
+    zero = Value(Decimal("0.00"), output_field=money)
+
+    boxed = (
+        BoxedSale.objects.filter(sale__status=ACTIVE)
+        .annotate(day=TruncDate("sale__sale_date"))
+        .order_by()
+        .values("day", "product_id", "sale__payment_method")
+        .annotate(
+            revenue=Coalesce(Sum(F("price") * F("quantity"), output_field=money), zero),
+            units=Sum("quantity"),
+            cost=Coalesce(
+                Sum(
+                    Coalesce(
+                        "cost_basis",
+                        F("quantity") * F("product__inventory__weighted_average_cost"),
+                        output_field=money,
+                    ),
+                    output_field=money,
+                ),
+                zero,
+            ),
+        )
+    )
+    coupled = (
+        CoupledSale.objects.filter(
+            sale__status=ACTIVE,
+            transformation_item__target_product__isnull=False,
+        )
+        .annotate(day=TruncDate("sale__sale_date"))
+        .order_by()
+        .values("day", "transformation_item__target_product_id", "sale__payment_method")
+        .annotate(
+            revenue=Coalesce(Sum("price", output_field=money), zero),
+            units=Count("pk"),
+            cost=Coalesce(
+                Sum("transformation_item__unit_cost_at_transformation", output_field=money),
+                zero,
+            ),
+        )
+    )
+
+    rows = [
+        DailySalesSummary(
+            date=r["day"],
+            product_id=r["product_id"],
+            channel=BOXED,
+            payment_method=r["sale__payment_method"],
+            revenue=r["revenue"],
+            units=r["units"],
+            cost_of_goods=r["cost"],
+        )
+        for r in boxed
+    ] + [
+        DailySalesSummary(
+            date=r["day"],
+            product_id=r["transformation_item__target_product_id"],
+            channel=COUPLED,
+            payment_method=r["sale__payment_method"],
+            revenue=r["revenue"],
+            units=r["units"],
+            cost_of_goods=r["cost"],
+        )
+        for r in coupled
+    ]
+    DailySalesSummary.objects.all().delete()
+    DailySalesSummary.objects.bulk_create(rows, batch_size=500)
+
+
+def clear_daily_sales_summary(apps, schema_editor):
+    apps.get_model("customer", "DailySalesSummary").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0040_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_daily_sales_summary, clear_daily_sales_summary),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.4 on 2026-10-18 10:05
+
+import core.search
+from django.db import migrations
+
+
+def refresh_search_documents(apps, schema_editor):
+    # Index zero-padded numbers without their leading zeros as well
+    core.search.refresh_search_documents(apps.get_model("customer", "Customer").objects.all())
+    core.search.refresh_search_documents(apps.get_model("customer", "Transaction").objects.select_related("account__customer"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer', '0041_fill_dailysalessummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(refresh_search_documents, migrations.RunPython.noop),
+    ]
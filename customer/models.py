@@ -14,6 +14,8 @@ from django.db.models import (
     ExpressionWrapper,
     fields,
     Count,
+    IntegerField,
+    Prefetch,
 )
 from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
@@ -24,6 +26,8 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from inventory.models import Product, TransformationItem, Inventory, InventoryCostLayer
 from django.urls import reverse
+from core.numbering import next_number
+from core.search import SearchDocumentField, refresh_search_documents
 
 
 class Customer(models.Model):
@@ -33,6 +37,7 @@ class Customer(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     email = models.EmailField(blank=True)
     address = models.TextField(blank=True)
+    search_document = SearchDocumentField(sources=["full_name", "phone", "customer_number"])
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -64,12 +69,33 @@ class Customer(models.Model):
     def get_absolute_url(self):
         return reverse("customer_detail", kwargs={"pk": self.pk})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets save() tell whether the name changed since it was loaded
+        instance._loaded_full_name = dict(zip(field_names, values)).get("full_name")
+        return instance
+
     def save(self, *args, **kwargs):
         if not self.customer_number:
-            self.customer_number = f"CUST-{uuid.uuid4().hex[:8].upper()}"
+            self.customer_number = next_number("CUST", yearly=False)
 
+        adding = self._state.adding
         super().save(*args, **kwargs)
 
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "full_name" not in update_fields:
+            return
+        loaded_name = getattr(self, "_loaded_full_name", None)
+        if not adding and loaded_name != self.full_name:
+            # Deposit and withdrawal search documents carry the customer's name.
+            refresh_search_documents(
+                Transaction.objects.filter(account__customer=self).select_related(
+                    "account__customer"
+                )
+            )
+        self._loaded_full_name = self.full_name
+
 
 class DepositAccount(models.Model):
     account_id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
@@ -135,7 +161,7 @@ class DepositAccount(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.account_number:
-            self.account_number = f"ACCT-{uuid.uuid4().hex[:8].upper()}"
+            self.account_number = next_number("ACCT", yearly=False)
         super().save(*args, **kwargs)
 
     # Use cache if available, otherwise calculate
@@ -188,12 +214,14 @@ class DepositAccount(models.Model):
         withdrawals = result["withdrawals"]
         return deposits - withdrawals
 
-    def _calculate_purchase_allocated_balance(self):
-        """Calculate allocated balance from purchase agreements"""
+    def _calculate_purchase_allocated_balance(self, agreements=None):
+        """Calculate allocated balance from purchase agreements (optionally a subset)"""
+        if agreements is None:
+            agreements = self.purchase_agreements.all()
         total_boxed_and_coupled_delivered_subquery = (
             PurchaseAgreementLineItem.objects.filter(
                 line_number=OuterRef("line_number"),
-                purchase_agreement__in=self.purchase_agreements.all(),
+                purchase_agreement__in=agreements,
             )
             .values("line_number")  # group across all versions
             .annotate(
@@ -220,7 +248,7 @@ class DepositAccount(models.Model):
 
         annotated_items = (
             PurchaseAgreementLineItem.objects.filter(
-                purchase_agreement__in=self.purchase_agreements.all(),
+                purchase_agreement__in=agreements,
                 is_current_version=True,
             )
             .exclude(purchase_agreement__status=PurchaseAgreement.Status.CANCELLED)
@@ -243,9 +271,11 @@ class DepositAccount(models.Model):
 
         return purchase_total_allocated
 
-    def _calculate_cfa_allocated_balance(self):
-        """Calculate allocated balance from CFA agreements"""
-        annotated_agreements = self.cfa_agreements.exclude(
+    def _calculate_cfa_allocated_balance(self, agreements=None):
+        """Calculate allocated balance from CFA agreements (optionally a subset)"""
+        if agreements is None:
+            agreements = self.cfa_agreements.all()
+        annotated_agreements = agreements.exclude(
             status__in=[CfaAgreement.Status.CANCELLED, CfaAgreement.Status.FULFILLED]
         ).annotate(
             fulfilled_value_naira=Coalesce(
@@ -328,6 +358,9 @@ class Transaction(models.Model):
     source_object_id = models.UUIDField(null=True, blank=True)
     source = GenericForeignKey("source_content_type", "source_object_id")
     note = models.TextField(blank=True)
+    search_document = SearchDocumentField(
+        sources=["reference_number", "account.customer.full_name", "note"]
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     created_by = models.ForeignKey(
@@ -441,21 +474,132 @@ class Transaction(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.reference_number:
-            year = timezone.now().year
-
             type_prefix = {
                 self.TransactionType.DEPOSIT: "DEP",
                 self.TransactionType.WITHDRAWAL: "WTH",
                 self.TransactionType.FULFILLMENT_WITHDRAWAL: "FUL",
             }.get(self.transaction_type, "TXN")
 
-            unique_id = uuid.uuid4().hex[:3].upper()
-            self.reference_number = f"{type_prefix}-{year}-{unique_id}"
+            self.reference_number = next_number(type_prefix)
 
         self.full_clean()
         super().save(*args, **kwargs)
 
 
+def _sum_subquery(queryset, group_by, expression, output_field):
+    """Correlated single-row aggregate of *expression* over *queryset*, 0 when empty."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(total=expression)
+            .values("total"),
+            output_field=output_field,
+        ),
+        0,
+        output_field=output_field,
+    )
+
+
+class PurchaseAgreementQuerySet(models.QuerySet):
+    def with_fulfillment(self):
+        """
+        Annotate each agreement with ``allocated_amount``, ``ordered_quantity``
+        and ``fulfilled_quantity``.
+
+        Every total is an independent correlated subquery, so boxed quantities
+        are never multiplied by the coupled-sale join. The matching properties
+        read these annotations instead of running their own aggregates.
+        """
+        money = DecimalField(max_digits=15, decimal_places=2)
+        current_items = PurchaseAgreementLineItem.objects.filter(
+            purchase_agreement=OuterRef("pk"), is_current_version=True
+        )
+        active_boxed = BoxedSale.objects.filter(
+            sale__agreement=OuterRef("pk"), sale__status=Sale.Status.ACTIVE
+        )
+        active_coupled = CoupledSale.objects.filter(
+            sale__agreement=OuterRef("pk"), sale__status=Sale.Status.ACTIVE
+        )
+
+        return self.annotate(
+            allocated_amount=_sum_subquery(
+                current_items,
+                "purchase_agreement",
+                Sum(F("quantity_ordered") * F("price_per_unit")),
+                money,
+            ),
+            ordered_quantity=_sum_subquery(
+                current_items, "purchase_agreement", Sum("quantity_ordered"), IntegerField()
+            ),
+            fulfilled_quantity=_sum_subquery(
+                active_boxed, "sale__agreement", Sum("quantity"), IntegerField()
+            )
+            + _sum_subquery(
+                active_coupled, "sale__agreement", Count("pk"), IntegerField()
+            ),
+        )
+
+    def with_labels(self):
+        """
+        Load everything ``__str__`` needs: the customer in the same query and
+        the current line items, with remaining quantity computed in SQL, in one
+        prefetch. Use for choice fields, autocompletes and admin lists.
+        """
+        return self.select_related("account__customer").prefetch_related(
+            Prefetch(
+                "agreement_line_items",
+                queryset=PurchaseAgreementLineItem.objects.label_lines(),
+                to_attr="label_line_items",
+            )
+        )
+
+
+class PurchaseAgreementLineItemQuerySet(models.QuerySet):
+    def with_fulfillment(self):
+        """
+        Annotate each line item with ``fulfilled_quantity`` (ACTIVE boxed and
+        coupled sales across every version of its line number) and
+        ``remaining_qty``.
+        """
+        same_line = {
+            "agreement_line_item__purchase_agreement": OuterRef("purchase_agreement"),
+            "agreement_line_item__line_number": OuterRef("line_number"),
+            "sale__status": Sale.Status.ACTIVE,
+        }
+        group_by = "agreement_line_item__purchase_agreement"
+
+        return self.annotate(
+            fulfilled_quantity=_sum_subquery(
+                BoxedSale.objects.filter(**same_line), group_by, Sum("quantity"), IntegerField()
+            )
+            + _sum_subquery(
+                CoupledSale.objects.filter(**same_line), group_by, Count("pk"), IntegerField()
+            ),
+        ).annotate(remaining_qty=F("quantity_ordered") - F("fulfilled_quantity"))
+
+    def label_lines(self):
+        """Current-version lines as shown in ``PurchaseAgreement.__str__``."""
+        return (
+            self.filter(is_current_version=True)
+            .with_fulfillment()
+            .select_related("product")
+            .order_by("line_number")
+        )
+
+    def with_labels(self):
+        """Line items whose ``__str__`` (agreement label included) needs no queries."""
+        return self.select_related(
+            "purchase_agreement__account__customer", "product__brand"
+        ).prefetch_related(
+            Prefetch(
+                "purchase_agreement__agreement_line_items",
+                queryset=self.model.objects.label_lines(),
+                to_attr="label_line_items",
+            )
+        )
+
+
 class PurchaseAgreement(models.Model):
     class Status(models.TextChoices):
         ACTIVE = "ACTIVE", "Active"
@@ -491,14 +635,21 @@ class PurchaseAgreement(models.Model):
         related_name="updated_%(class)ss",
     )
 
+    objects = PurchaseAgreementQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
 
     def __str__(self):
         date_str = self.date.strftime("%d/%m")
 
+        # with_labels() prefetches these; otherwise fetch them in one query.
+        line_items = getattr(self, "label_line_items", None)
+        if line_items is None:
+            line_items = self.agreement_line_items.label_lines()
+
         remaining_items = []
-        for item in self.agreement_line_items.all():
+        for item in line_items:
             if item.remaining_quantity > 0:
                 remaining_items.append(
                     f"{item.product.modelname.upper()} ({item.remaining_quantity:.0f})"
@@ -514,30 +665,38 @@ class PurchaseAgreement(models.Model):
 
         return f"{self.account.customer.full_name} - {self.purchase_agreement_number} [{date_str}] • {items_str}"
 
+    def _fulfillment_totals(self):
+        """Fresh allocated/ordered/fulfilled totals in a single query."""
+        if self._state.adding:
+            return {
+                "allocated_amount": Decimal("0.00"),
+                "ordered_quantity": 0,
+                "fulfilled_quantity": 0,
+            }
+        return (
+            PurchaseAgreement.objects.filter(pk=self.pk)
+            .with_fulfillment()
+            .values("allocated_amount", "ordered_quantity", "fulfilled_quantity")
+            .get()
+        )
+
+    def _fulfillment_value(self, name):
+        # Prefer the with_fulfillment() annotation; fall back to one query.
+        if hasattr(self, name):
+            return getattr(self, name)
+        return self._fulfillment_totals()[name]
+
     @property
     def total_allocated_amount(self):
-        amount = self.agreement_line_items.filter(is_current_version=True).aggregate(
-            total=Sum(F("quantity_ordered") * F("price_per_unit"))
-        )
-        return amount["total"] or Decimal("0.00")
+        return self._fulfillment_value("allocated_amount") or Decimal("0.00")
 
     @property
     def total_quantity_ordered(self):
-        amount = self.agreement_line_items.filter(is_current_version=True).aggregate(
-            total=Sum(F("quantity_ordered"))
-        )["total"]
-        return amount or Decimal("0.00")
+        return self._fulfillment_value("ordered_quantity") or Decimal("0.00")
 
     @property
     def total_quantity_fulfilled(self):
-        total_boxed_and_coupled_sale = self.agreement_sales.filter(
-            status=Sale.Status.ACTIVE
-        ).aggregate(
-            total=Sum(F("boxed_sales__quantity"), default=0)
-            + Count("coupled_sales", distinct=True)
-        )["total"]
-
-        return total_boxed_and_coupled_sale or Decimal("0.00")
+        return self._fulfillment_value("fulfilled_quantity") or Decimal("0.00")
 
     @property
     def total_quantity_remaining(self):
@@ -546,11 +705,7 @@ class PurchaseAgreement(models.Model):
 
     @property
     def total_received_percent(self):
-        fulfilled = (
-            Decimal(str(self.total_quantity_fulfilled))
-            if self.total_quantity_fulfilled is not None
-            else Decimal("0.00")
-        )
+        fulfilled = Decimal(str(self.total_quantity_fulfilled))
         ordered = self.total_quantity_ordered
 
         if ordered == Decimal("0.00"):
@@ -573,12 +728,16 @@ class PurchaseAgreement(models.Model):
         return False
 
     def update_status(self):
+        # Always recompute: annotations on this instance may predate the sale.
+        totals = self._fulfillment_totals()
+        fulfilled = totals["fulfilled_quantity"]
+        ordered = totals["ordered_quantity"]
 
-        if self.total_quantity_fulfilled == Decimal("0.00"):
+        if fulfilled == 0:
             self.status = self.Status.ACTIVE
-        elif self.total_quantity_fulfilled < self.total_quantity_ordered:
+        elif fulfilled < ordered:
             self.status = self.Status.PARTIALLY_FULFILLED
-        elif self.total_quantity_fulfilled == self.total_quantity_ordered:
+        elif fulfilled == ordered:
             self.status = self.Status.FULFILLED
         else:
             self.status = self.Status.CANCELLED
@@ -587,7 +746,7 @@ class PurchaseAgreement(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.purchase_agreement_number:
-            self.purchase_agreement_number = f"PUR-{uuid.uuid4().hex[:8].upper()}"
+            self.purchase_agreement_number = next_number("PUR")
 
         super().save(*args, **kwargs)
 
@@ -643,6 +802,8 @@ class PurchaseAgreementLineItem(models.Model):
         related_name="updated_%(class)ss",
     )
 
+    objects = PurchaseAgreementLineItemQuerySet.as_manager()
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
@@ -658,7 +819,11 @@ class PurchaseAgreementLineItem(models.Model):
     @property
     def quantity_fulfilled_accross_all_versions(self):
         """Sum ACTIVE fulfillments for this line number across all versions"""
+        if hasattr(self, "fulfilled_quantity"):
+            return self.fulfilled_quantity
+        return self._calculate_quantity_fulfilled()
 
+    def _calculate_quantity_fulfilled(self):
         total_boxed_sale = (
             BoxedSale.objects.filter(
                 agreement_line_item__line_number=self.line_number,
@@ -681,6 +846,8 @@ class PurchaseAgreementLineItem(models.Model):
         """Current version quantity - all historical fulfillments"""
         if self.quantity_ordered is None:
             return 0
+        if hasattr(self, "remaining_qty"):
+            return self.remaining_qty
         return self.quantity_ordered - self.quantity_fulfilled_accross_all_versions
 
     @property
@@ -690,12 +857,13 @@ class PurchaseAgreementLineItem(models.Model):
         return self.quantity_ordered * self.price_per_unit
 
     def update_status(self):
+        fulfilled = self._calculate_quantity_fulfilled()
 
-        if self.quantity_fulfilled_accross_all_versions == 0:
+        if fulfilled == 0:
             self.status = self.Status.ACTIVE
-        elif self.quantity_fulfilled_accross_all_versions < self.quantity_ordered:
+        elif fulfilled < self.quantity_ordered:
             self.status = self.Status.PARTIALLY_FULFILLED
-        elif self.quantity_fulfilled_accross_all_versions == self.quantity_ordered:
+        elif fulfilled == self.quantity_ordered:
             self.status = self.Status.FULFILLED
         else:
             self.status = self.Status.VOIDED
@@ -704,7 +872,9 @@ class PurchaseAgreementLineItem(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.line_number:
-            self.line_number = f"AGR-V{self.version}-{uuid.uuid4().hex[:4].upper()}"
+            self.line_number = next_number(
+                "AGR", yearly=False, label=f"AGR-V{self.version}"
+            )
 
         self.full_clean()
         super().save(*args, **kwargs)
@@ -839,7 +1009,7 @@ class CfaAgreement(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.cfa_agreement_number:
-            self.cfa_agreement_number = f"CFA-{uuid.uuid4().hex[:4].upper()}"
+            self.cfa_agreement_number = next_number("CFA")
 
         super().save(*args, **kwargs)
 
@@ -913,11 +1083,34 @@ class CfaFulfillment(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.fulfillment_number:
-            self.fulfillment_number = f"CFA-FUL-{uuid.uuid4().hex[:4].upper()}"
+            self.fulfillment_number = next_number("CFA-FUL")
         self.full_clean()
         super().save(*args, **kwargs)
 
 
+class SaleQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotate each sale with ``total_amount`` and ``item_count`` plus the
+        ``boxed_units`` / ``coupled_units`` they are built from.
+
+        Boxed and coupled lines are summed in separate subqueries so neither
+        side is multiplied by the other's join. Safe to filter and sort on.
+        """
+        money = DecimalField(max_digits=15, decimal_places=2)
+        boxed = BoxedSale.objects.filter(sale=OuterRef("pk"))
+        coupled = CoupledSale.objects.filter(sale=OuterRef("pk"))
+
+        return self.annotate(
+            boxed_units=_sum_subquery(boxed, "sale", Sum("quantity"), IntegerField()),
+            coupled_units=_sum_subquery(coupled, "sale", Count("pk"), IntegerField()),
+            total_amount=_sum_subquery(
+                boxed, "sale", Sum(F("price") * F("quantity")), money
+            )
+            + _sum_subquery(coupled, "sale", Sum("price"), money),
+        ).annotate(item_count=F("boxed_units") + F("coupled_units"))
+
+
 class Sale(models.Model):
     class Status(models.TextChoices):
         ACTIVE = "active", "Active"
@@ -970,6 +1163,8 @@ class Sale(models.Model):
         related_name="updated_%(class)s_set",
     )
 
+    objects = SaleQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
 
@@ -978,6 +1173,8 @@ class Sale(models.Model):
 
     @property
     def sales_total(self):
+        if hasattr(self, "total_amount"):
+            return self.total_amount
         coupled_sale_total = self.coupled_sales.aggregate(total=Sum("price"))[
             "total"
         ] or Decimal("0.00")
@@ -990,6 +1187,8 @@ class Sale(models.Model):
 
     @property
     def sales_items_count(self):
+        if hasattr(self, "item_count"):
+            return self.item_count
         coupled_sale_total = self.coupled_sales.count() or 0
         boxed_sale_total = (
             self.boxed_sales.aggregate(total=Sum("quantity"))["total"] or 0
@@ -1020,7 +1219,7 @@ class Sale(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.sale_number:
-            self.sale_number = f"SALE-{uuid.uuid4().hex[:8].upper()}"
+            self.sale_number = next_number("SALE")
 
         self.full_clean()
         super().save(*args, **kwargs)
@@ -1116,7 +1315,7 @@ class CoupledSale(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.coupled_sale_number:
-            self.coupled_sale_number = f"C-SALE-{uuid.uuid4().hex[:8].upper()}"
+            self.coupled_sale_number = next_number("C-SALE")
 
         if self.sale.payment_method == Sale.PaymentMethod.FROM_DEPOSIT:
             if self.agreement_line_item:
@@ -1294,7 +1493,7 @@ class BoxedSale(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.boxed_sale_number:
-            self.boxed_sale_number = f"B-SALE-{uuid.uuid4().hex[:8].upper()}"
+            self.boxed_sale_number = next_number("B-SALE")
 
         if self.sale.payment_method == Sale.PaymentMethod.FROM_DEPOSIT:
             if self.agreement_line_item:
@@ -1310,3 +1509,46 @@ class BoxedSale(models.Model):
             return (price * self.quantity) - self.cost_basis
         wac = self.product.inventory.weighted_average_cost or Decimal("0.00")
         return (price - wac) * self.quantity
+
+
+class DailySalesSummary(models.Model):
+    """Pre-aggregated sales per day × product × channel × payment method.
+
+    Maintained by customer.services.create_sale / void_sale and rebuilt with
+    the backfill_daily_sales command. Only ACTIVE sales are counted.
+    """
+
+    class Channel(models.TextChoices):
+        BOXED = "boxed", "Boxed"
+        COUPLED = "coupled", "Coupled"
+
+    date = models.DateField()
+    product = models.ForeignKey(
+        "inventory.Product",
+        on_delete=models.CASCADE,
+        related_name="daily_sales_summaries",
+    )
+    channel = models.CharField(max_length=20, choices=Channel)
+    payment_method = models.CharField(max_length=50, choices=Sale.PaymentMethod)
+    revenue = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    units = models.IntegerField(default=0)
+    cost_of_goods = models.DecimalField(
+        max_digits=15, decimal_places=2, default=Decimal("0.00")
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-date"]
+        verbose_name_plural = "Daily Sales Summaries"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["date", "product", "channel", "payment_method"],
+                name="unique_daily_sales_summary",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["date", "channel"]),
+        ]
+
+    def __str__(self):
+        return f"{self.date} · {self.product} · {self.channel} · {self.payment_method}"
@@ -1,11 +1,12 @@
 import logging
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from django.db import DatabaseError, IntegrityError, OperationalError
 from django.db import transaction as db_transaction
 from django.db.models import F
 from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ValidationError
 from core.utils import audit
+from core.versions import CUSTOMERS, INVENTORY, SALES, bump
 
 logger = logging.getLogger(__name__)
 
@@ -25,8 +26,9 @@ class InsufficientStockError(BusinessRuleViolation):
 
 def _refresh_balances(account):
     """
-    Private helper. Recalculates and saves all three cached balance fields.
-    Call at the end of any service that changes transactions, agreements, or sales.
+    Private helper. Recalculates and saves all three cached balance fields from scratch.
+    Services apply incremental deltas via _apply_balance_delta(); this full
+    recompute is the verifier and the fallback for accounts with no cache yet.
     """
     from customer.models import DepositAccount
 
@@ -56,6 +58,407 @@ def _refresh_balances(account):
         raise
 
 
+CACHED_BALANCE_FIELDS = {
+    "total": "cached_total_balance",
+    "allocated": "cached_allocated_balance",
+    "available": "cached_available_balance",
+}
+
+
+def calculate_account_balances(account_ids):
+    """
+    Set-based equivalent of DepositAccount._calculate_* for many accounts.
+    Returns {account_id: {"total": ..., "allocated": ..., "available": ...}},
+    computed with three grouped aggregate queries regardless of account count.
+    """
+    from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum, Value
+    from django.db.models.functions import Coalesce
+    from customer.models import (
+        BoxedSale, CfaAgreement, CfaFulfillment, CoupledSale,
+        PurchaseAgreement, PurchaseAgreementLineItem, Sale, Transaction,
+    )
+
+    money = DecimalField(max_digits=15, decimal_places=2)
+    zero = Value(Decimal("0.00"), output_field=money)
+    account_ids = list(account_ids)
+
+    totals = (
+        Transaction.objects.filter(
+            account_id__in=account_ids, status=Transaction.Status.ACTIVE
+        )
+        .order_by()
+        .values("account_id")
+        .annotate(
+            deposits=Coalesce(
+                Sum("amount", filter=Q(transaction_type=Transaction.TransactionType.DEPOSIT)),
+                zero,
+            ),
+            withdrawals=Coalesce(
+                Sum(
+                    "amount",
+                    filter=Q(
+                        transaction_type__in=[
+                            Transaction.TransactionType.FULFILLMENT_WITHDRAWAL,
+                            Transaction.TransactionType.WITHDRAWAL,
+                        ]
+                    ),
+                ),
+                zero,
+            ),
+        )
+    )
+
+    # Deliveries are counted across every version of a line number
+    line_filter = dict(
+        agreement_line_item__line_number=OuterRef("line_number"),
+        agreement_line_item__purchase_agreement=OuterRef("purchase_agreement"),
+        sale__status=Sale.Status.ACTIVE,
+    )
+    boxed_delivered = (
+        BoxedSale.objects.filter(**line_filter)
+        .order_by()
+        .values("agreement_line_item__purchase_agreement")
+        .annotate(n=Sum("quantity"))
+        .values("n")
+    )
+    coupled_delivered = (
+        CoupledSale.objects.filter(**line_filter)
+        .order_by()
+        .values("agreement_line_item__purchase_agreement")
+        .annotate(n=Count("pk"))
+        .values("n")
+    )
+    purchase_allocated = (
+        PurchaseAgreementLineItem.objects.filter(
+            purchase_agreement__account_id__in=account_ids,
+            is_current_version=True,
+        )
+        .exclude(purchase_agreement__status=PurchaseAgreement.Status.CANCELLED)
+        .annotate(
+            delivered=Coalesce(Subquery(boxed_delivered), 0)
+            + Coalesce(Subquery(coupled_delivered), 0)
+        )
+        .order_by()
+        .values("purchase_agreement__account_id")
+        .annotate(
+            total=Sum(
+                (F("quantity_ordered") - F("delivered")) * F("price_per_unit"),
+                output_field=money,
+            )
+        )
+    )
+
+    fulfilled_naira = (
+        CfaFulfillment.objects.filter(
+            cfa_agreement=OuterRef("pk"), status=CfaFulfillment.Status.ACTIVE
+        )
+        .order_by()
+        .values("cfa_agreement")
+        .annotate(
+            value=Sum(
+                F("cfa_amount_disbursed") * (F("cfa_agreement__exchange_rate") / 1000),
+                output_field=money,
+            )
+        )
+        .values("value")
+    )
+    cfa_allocated = (
+        CfaAgreement.objects.filter(account_id__in=account_ids)
+        .exclude(status__in=[CfaAgreement.Status.CANCELLED, CfaAgreement.Status.FULFILLED])
+        .annotate(fulfilled=Coalesce(Subquery(fulfilled_naira, output_field=money), zero))
+        .order_by()
+        .values("account_id")
+        .annotate(total=Sum(F("amount_allocated") - F("fulfilled"), output_field=money))
+    )
+
+    cents = Decimal("0.01")
+    total_by_account = {
+        row["account_id"]: row["deposits"] - row["withdrawals"] for row in totals
+    }
+    allocated_by_account = {}
+    for row in purchase_allocated:
+        account_id = row["purchase_agreement__account_id"]
+        allocated_by_account[account_id] = row["total"] or Decimal("0.00")
+    for row in cfa_allocated:
+        allocated_by_account[row["account_id"]] = (
+            allocated_by_account.get(row["account_id"], Decimal("0.00"))
+            + (row["total"] or Decimal("0.00"))
+        )
+
+    balances = {}
+    for account_id in account_ids:
+        total = Decimal(total_by_account.get(account_id, 0)).quantize(cents, ROUND_HALF_UP)
+        allocated = Decimal(allocated_by_account.get(account_id, 0)).quantize(cents, ROUND_HALF_UP)
+        balances[account_id] = {
+            "total": total,
+            "allocated": allocated,
+            "available": total - allocated,
+        }
+    return balances
+
+
+def reconcile_cached_balances(account_ids, fix=False):
+    """
+    Compare cached balances with calculate_account_balances() for *account_ids*.
+    Returns a list of mismatch dicts (JSON-serialisable). With fix=True the
+    accounts are locked first and all corrections are written with one bulk_update.
+    """
+    from django.utils import timezone
+    from customer.models import DepositAccount
+
+    with db_transaction.atomic():
+        accounts = DepositAccount.objects.filter(pk__in=account_ids).only(
+            "account_number", *CACHED_BALANCE_FIELDS.values()
+        )
+        if fix:
+            accounts = accounts.select_for_update()
+        accounts = list(accounts)
+        calculated = calculate_account_balances([a.pk for a in accounts])
+
+        mismatches = []
+        corrections = []
+        now = timezone.now()
+        for account in accounts:
+            changed = False
+            for name, field in CACHED_BALANCE_FIELDS.items():
+                cached = getattr(account, field)
+                value = calculated[account.pk][name]
+                if cached != value:
+                    mismatches.append({
+                        "account_id": str(account.pk),
+                        "account_number": account.account_number,
+                        "field": name,
+                        "cached": None if cached is None else str(cached),
+                        "calculated": str(value),
+                    })
+                    setattr(account, field, value)
+                    changed = True
+            if changed:
+                account.balances_last_updated = now
+                corrections.append(account)
+
+        if fix and corrections:
+            DepositAccount.objects.bulk_update(
+                corrections,
+                [*CACHED_BALANCE_FIELDS.values(), "balances_last_updated"],
+            )
+            bump(CUSTOMERS)
+    return mismatches
+
+
+def _apply_balance_delta(account, total=Decimal("0.00"), allocated=Decimal("0.00")):
+    """
+    Private helper. Applies signed deltas to the cached balance fields with a
+    single F() update, so the cost no longer grows with the account's history.
+    Call inside the same transaction as the change that caused the delta.
+    Accounts whose cache has never been populated fall back to _refresh_balances().
+    """
+    from django.utils import timezone
+    from customer.models import DepositAccount
+
+    total = Decimal(total)
+    allocated = Decimal(allocated)
+    if not total and not allocated:
+        return
+
+    updated = DepositAccount.objects.filter(
+        pk=account.pk,
+        cached_total_balance__isnull=False,
+        cached_allocated_balance__isnull=False,
+        cached_available_balance__isnull=False,
+    ).update(
+        cached_total_balance=F("cached_total_balance") + total,
+        cached_allocated_balance=F("cached_allocated_balance") + allocated,
+        cached_available_balance=F("cached_available_balance") + (total - allocated),
+        balances_last_updated=timezone.now(),
+    )
+    if not updated:
+        _refresh_balances(account)
+    bump(CUSTOMERS)
+
+
+def _agreement_allocations(purchase_agreements=(), cfa_agreements=()):
+    """
+    Private helper. Returns {account: allocated} for the given agreements only,
+    using the same calculation as the full recompute. Take one snapshot before
+    and one after a change and pass both to _apply_allocation_change().
+    """
+    from customer.models import PurchaseAgreement, CfaAgreement
+
+    allocations = {}
+    for agreement in {a.pk: a for a in purchase_agreements}.values():
+        account = agreement.account
+        allocations[account] = allocations.get(account, Decimal("0.00")) + (
+            account._calculate_purchase_allocated_balance(
+                PurchaseAgreement.objects.filter(pk=agreement.pk)
+            )
+        )
+    for agreement in {a.pk: a for a in cfa_agreements}.values():
+        account = agreement.account
+        allocations[account] = allocations.get(account, Decimal("0.00")) + (
+            account._calculate_cfa_allocated_balance(
+                CfaAgreement.objects.filter(pk=agreement.pk)
+            )
+        )
+    return allocations
+
+
+def _apply_allocation_change(before, after):
+    """Private helper. Applies the allocated delta between two _agreement_allocations() snapshots."""
+    for account in set(before) | set(after):
+        delta = after.get(account, Decimal("0.00")) - before.get(account, Decimal("0.00"))
+        _apply_balance_delta(account, allocated=delta)
+
+
+def _record_daily_sales(sale, sign=1):
+    """
+    Private helper. Adds (sign=1) or removes (sign=-1) a sale's lines from the
+    DailySalesSummary rollup with F() increments, one row per
+    day × product × channel × payment method.
+    """
+    from django.utils import timezone
+    from customer.models import DailySalesSummary
+
+    day = timezone.localdate(sale.sale_date)
+    deltas = {}
+
+    def _add(product_id, channel, revenue, units, cost):
+        key = (product_id, channel)
+        current = deltas.get(key, (Decimal("0.00"), 0, Decimal("0.00")))
+        deltas[key] = (current[0] + revenue, current[1] + units, current[2] + cost)
+
+    for item in sale.boxed_sales.select_related("product__inventory"):
+        cost = item.cost_basis
+        if cost is None:
+            # Legacy lines without a FIFO cost basis fall back to the current WAC
+            cost = item.quantity * item.product.inventory.weighted_average_cost
+        _add(
+            item.product_id,
+            DailySalesSummary.Channel.BOXED,
+            (item.price or Decimal("0.00")) * item.quantity,
+            item.quantity,
+            cost,
+        )
+    for item in sale.coupled_sales.select_related("transformation_item"):
+        ti = item.transformation_item
+        if ti.target_product_id is None:
+            continue
+        _add(
+            ti.target_product_id,
+            DailySalesSummary.Channel.COUPLED,
+            item.price or Decimal("0.00"),
+            1,
+            ti.unit_cost_at_transformation or Decimal("0.00"),
+        )
+
+    for (product_id, channel), (revenue, units, cost) in deltas.items():
+        row, _ = DailySalesSummary.objects.get_or_create(
+            date=day,
+            product_id=product_id,
+            channel=channel,
+            payment_method=sale.payment_method,
+        )
+        DailySalesSummary.objects.filter(pk=row.pk).update(
+            revenue=F("revenue") + sign * revenue,
+            units=F("units") + sign * units,
+            cost_of_goods=F("cost_of_goods") + sign * cost,
+        )
+
+
+def rebuild_daily_sales_summary(start=None, end=None):
+    """
+    Rebuild DailySalesSummary rows for [start, end] (inclusive, either may be None)
+    from the sale lines with two grouped aggregate queries. Returns the row count.
+    """
+    from django.db.models import Count, DecimalField, Sum, Value
+    from django.db.models.functions import Coalesce, TruncDate
+    from customer.models import BoxedSale, CoupledSale, DailySalesSummary, Sale
+
+    money = DecimalField(max_digits=15, decimal_places=2)
+    zero = Value(Decimal("0.00"), output_field=money)
+
+    def _in_range(queryset, field):
+        if start:
+            queryset = queryset.filter(**{f"{field}__gte": start})
+        if end:
+            queryset = queryset.filter(**{f"{field}__lte": end})
+        return queryset
+
+    boxed = (
+        _in_range(
+            BoxedSale.objects.filter(sale__status=Sale.Status.ACTIVE)
+            .annotate(day=TruncDate("sale__sale_date")),
+            "day",
+        )
+        .order_by()
+        .values("day", "product_id", "sale__payment_method")
+        .annotate(
+            revenue=Coalesce(Sum(F("price") * F("quantity"), output_field=money), zero),
+            units=Sum("quantity"),
+            cost=Coalesce(
+                Sum(
+                    Coalesce(
+                        "cost_basis",
+                        F("quantity") * F("product__inventory__weighted_average_cost"),
+                        output_field=money,
+                    ),
+                    output_field=money,
+                ),
+                zero,
+            ),
+        )
+    )
+    coupled = (
+        _in_range(
+            CoupledSale.objects.filter(
+                sale__status=Sale.Status.ACTIVE,
+                transformation_item__target_product__isnull=False,
+            )
+            .annotate(day=TruncDate("sale__sale_date")),
+            "day",
+        )
+        .order_by()
+        .values("day", "transformation_item__target_product_id", "sale__payment_method")
+        .annotate(
+            revenue=Coalesce(Sum("price", output_field=money), zero),
+            units=Count("pk"),
+            cost=Coalesce(
+                Sum("transformation_item__unit_cost_at_transformation", output_field=money),
+                zero,
+            ),
+        )
+    )
+
+    rows = [
+        DailySalesSummary(
+            date=r["day"],
+            product_id=r["product_id"],
+            channel=DailySalesSummary.Channel.BOXED,
+            payment_method=r["sale__payment_method"],
+            revenue=r["revenue"],
+            units=r["units"],
+            cost_of_goods=r["cost"],
+        )
+        for r in boxed
+    ] + [
+        DailySalesSummary(
+            date=r["day"],
+            product_id=r["transformation_item__target_product_id"],
+            channel=DailySalesSummary.Channel.COUPLED,
+            payment_method=r["sale__payment_method"],
+            revenue=r["revenue"],
+            units=r["units"],
+            cost_of_goods=r["cost"],
+        )
+        for r in coupled
+    ]
+
+    with db_transaction.atomic():
+        _in_range(DailySalesSummary.objects.all(), "date").delete()
+        DailySalesSummary.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
 def _update_agreement_status(line_item):
     """Helper to update line item and parent agreement status."""
     line_item.update_status()
@@ -78,7 +481,7 @@ def record_deposit(account, amount, note, user, request=None, created_at=None):
         if created_at is not None:
             txn.created_at = created_at
             txn.save(update_fields=["created_at"])
-        _refresh_balances(account)
+        _apply_balance_delta(account, total=txn.amount)
 
         audit(user, 'create_deposit', txn, detail={
             'amount': str(amount),
@@ -106,7 +509,7 @@ def record_withdrawal(account, amount, note, user, request=None, created_at=None
         if created_at is not None:
             txn.created_at = created_at
             txn.save(update_fields=["created_at"])
-        _refresh_balances(account)
+        _apply_balance_delta(account, total=-txn.amount)
 
         audit(user, 'create_withdrawal', txn, detail={
             'amount': str(amount),
@@ -136,7 +539,10 @@ def void_deposit(transaction_id, void_reason, user, request=None):
         txn.updated_by = user
         txn.save(update_fields=['status', 'updated_by'])
 
-        _refresh_balances(txn.account)
+        if txn.transaction_type == Transaction.TransactionType.DEPOSIT:
+            _apply_balance_delta(txn.account, total=-txn.amount)
+        else:
+            _apply_balance_delta(txn.account, total=txn.amount)
 
         audit_action = (
             'void_deposit'
@@ -167,6 +573,7 @@ def create_purchase_agreement(account, line_items_data, user, request=None):
         )
         agreement.save()
 
+        allocated = Decimal("0.00")
         for item_data in line_items_data:
             line_item = PurchaseAgreementLineItem(
                 purchase_agreement=agreement,
@@ -177,8 +584,9 @@ def create_purchase_agreement(account, line_items_data, user, request=None):
                 updated_by=user,
             )
             line_item.save()
+            allocated += line_item.quantity_ordered * line_item.price_per_unit
 
-        _refresh_balances(account)
+        _apply_balance_delta(account, allocated=allocated)
     return agreement
 
 
@@ -192,6 +600,7 @@ def cancel_agreement(agreement_id, user, request=None):
         if not agreement.can_cancel:
             raise BusinessRuleViolation("This agreement cannot be cancelled.")
 
+        before = _agreement_allocations(purchase_agreements=[agreement])
         agreement.status = PurchaseAgreement.Status.CANCELLED
         agreement.save(update_fields=["status"])
 
@@ -199,7 +608,7 @@ def cancel_agreement(agreement_id, user, request=None):
             item.status = PurchaseAgreementLineItem.Status.CANCELLED
             item.save(update_fields=["status"])
 
-        _refresh_balances(agreement.account)
+        _apply_allocation_change(before, {})
 
         audit(user, 'cancel_agreement', agreement, detail={
             'agreement_number': agreement.purchase_agreement_number,
@@ -222,7 +631,7 @@ def create_cfa_agreement(account, amount_naira, exchange_rate, user, request=Non
             updated_by=user,
         )
         cfa.save()
-        _refresh_balances(account)
+        _apply_balance_delta(account, allocated=cfa.amount_allocated)
     return cfa
 
 
@@ -233,6 +642,7 @@ def record_cfa_fulfillment(agreement_id, cfa_amount, notes, user, request=None,
     with db_transaction.atomic():
         agreement = CfaAgreement = __import__('customer.models', fromlist=['CfaAgreement']).CfaAgreement
         agreement = agreement.objects.select_for_update().get(pk=agreement_id)
+        before = _agreement_allocations(cfa_agreements=[agreement])
 
         fulfillment = CfaFulfillment(
             cfa_agreement=agreement,
@@ -262,10 +672,11 @@ def record_cfa_fulfillment(agreement_id, cfa_amount, notes, user, request=None,
             if created_at is not None:
                 txn.created_at = created_at
                 txn.save(update_fields=["created_at"])
+            _apply_balance_delta(agreement.account, total=-txn.amount)
 
         # Update CFA agreement status (replaces update_cfa_statuses_after_fulfillment signal)
         agreement.update_status()
-        _refresh_balances(agreement.account)
+        _apply_allocation_change(before, _agreement_allocations(cfa_agreements=[agreement]))
     return fulfillment
 
 
@@ -279,6 +690,7 @@ def void_cfa_fulfillment(fulfillment_id, void_reason, user, request=None):
         if fulfillment.status == CfaFulfillment.Status.VOIDED:
             raise BusinessRuleViolation("Fulfillment is already voided.")
 
+        before = _agreement_allocations(cfa_agreements=[fulfillment.cfa_agreement])
         fulfillment.status = CfaFulfillment.Status.VOIDED
         fulfillment.updated_by = user
         fulfillment.save(update_fields=['status', 'updated_by'])
@@ -297,10 +709,13 @@ def void_cfa_fulfillment(fulfillment_id, void_reason, user, request=None):
             withdrawal_txn.status = Transaction.Status.VOIDED
             withdrawal_txn.updated_by = user
             withdrawal_txn.save(update_fields=['status', 'updated_by'])
+            _apply_balance_delta(withdrawal_txn.account, total=withdrawal_txn.amount)
 
         # Update CFA agreement status
         fulfillment.cfa_agreement.update_status()
-        _refresh_balances(fulfillment.cfa_agreement.account)
+        _apply_allocation_change(
+            before, _agreement_allocations(cfa_agreements=[fulfillment.cfa_agreement])
+        )
 
         audit(user, 'void_cfa_fulfillment', fulfillment, detail={
             'fulfillment_number': fulfillment.fulfillment_number,
@@ -318,12 +733,15 @@ def update_cfa_agreement(agreement, amount_allocated, exchange_rate, user, reque
 
     with db_transaction.atomic():
         agreement_locked = CfaAgreement.objects.select_for_update().get(pk=agreement.pk)
+        before = _agreement_allocations(cfa_agreements=[agreement_locked])
         agreement_locked.amount_allocated = amount_allocated
         agreement_locked.exchange_rate = exchange_rate
         agreement_locked.updated_by = user
         agreement_locked.full_clean()
         agreement_locked.save()
-        _refresh_balances(agreement_locked.account)
+        _apply_allocation_change(
+            before, _agreement_allocations(cfa_agreements=[agreement_locked])
+        )
 
         audit(user, 'update_cfa_agreement', agreement_locked, detail={
             'cfa_agreement_number': agreement_locked.cfa_agreement_number,
@@ -345,10 +763,11 @@ def cancel_cfa_agreement(agreement_id, user, request=None):
         if not agreement.can_cancel:
             raise BusinessRuleViolation("This CFA agreement cannot be cancelled.")
 
+        before = _agreement_allocations(cfa_agreements=[agreement])
         agreement.status = CfaAgreement.Status.CANCELLED
         agreement.save(update_fields=["status"])
 
-        _refresh_balances(agreement.account)
+        _apply_allocation_change(before, {})
 
         audit(user, 'cancel_cfa_agreement', agreement, detail={
             'cfa_agreement_number': agreement.cfa_agreement_number,
@@ -371,13 +790,22 @@ def create_sale(sale, boxed_items, coupled_items, user, request=None):
         BoxedSaleLayerConsumption,
     )
     from inventory.models import Inventory, InventoryTransaction, TransformationItem
-    from inventory.services import _deplete_fifo_layers
+    from inventory.services import _deplete_fifo_batch
     from inventory.utils import create_inventory_transaction
 
     with db_transaction.atomic():
         sale.save()
 
+        agreements = [
+            item.agreement_line_item.purchase_agreement
+            for item in [*boxed_items, *coupled_items]
+            if item.agreement_line_item
+        ]
+        allocations_before = _agreement_allocations(purchase_agreements=agreements)
+        withdrawn = Decimal("0.00")
+
         # Process boxed items
+        boxed_inventories = []
         for item in boxed_items:
             item.sale = sale
             if sale.payment_method == Sale.PaymentMethod.FROM_DEPOSIT and item.agreement_line_item:
@@ -389,19 +817,29 @@ def create_sale(sale, boxed_items, coupled_items, user, request=None):
             inventory = Inventory.objects.select_for_update().get(product=item.product)
             inventory.quantity -= item.quantity
             inventory.save(update_fields=["quantity"])
+            boxed_inventories.append(inventory)
 
-            # FIFO depletion and cost capture
-            fifo_cost, consumptions = _deplete_fifo_layers(item.product, item.quantity)
+        # FIFO depletion and cost capture for every boxed line in one pass
+        depletions = _deplete_fifo_batch(
+            [(item.product, item.quantity) for item in boxed_items]
+        )
+
+        layer_consumptions = []
+        for item, inventory, (fifo_cost, consumptions) in zip(
+            boxed_items, boxed_inventories, depletions
+        ):
             item.cost_basis = fifo_cost
             item.save(update_fields=["cost_basis"])
 
             # Record each layer consumed for granular reversal (Fix 1)
             for entry in consumptions:
-                BoxedSaleLayerConsumption.objects.create(
-                    boxed_sale=item,
-                    cost_layer=entry["layer"],
-                    quantity_consumed=entry["quantity"],
-                    unit_cost=entry["unit_cost"],
+                layer_consumptions.append(
+                    BoxedSaleLayerConsumption(
+                        boxed_sale=item,
+                        cost_layer=entry["layer"],
+                        quantity_consumed=entry["quantity"],
+                        unit_cost=entry["unit_cost"],
+                    )
                 )
 
             create_inventory_transaction(
@@ -432,6 +870,9 @@ def create_sale(sale, boxed_items, coupled_items, user, request=None):
                         created_by=user,
                         updated_by=user,
                     )
+                    withdrawn += total_amount
+
+        BoxedSaleLayerConsumption.objects.bulk_create(layer_consumptions)
 
         # Process coupled items
         for item in coupled_items:
@@ -470,10 +911,16 @@ def create_sale(sale, boxed_items, coupled_items, user, request=None):
                         created_by=user,
                         updated_by=user,
                     )
+                    withdrawn += total_amount
 
-        # Refresh balances if deposit sale
-        if sale.payment_method == Sale.PaymentMethod.FROM_DEPOSIT:
-            _refresh_balances(sale.customer.deposit_account)
+        _record_daily_sales(sale)
+
+        # Apply balance deltas for the withdrawals and fulfilled agreement lines
+        if withdrawn:
+            _apply_balance_delta(sale.customer.deposit_account, total=-withdrawn)
+        _apply_allocation_change(
+            allocations_before, _agreement_allocations(purchase_agreements=agreements)
+        )
 
     return sale
 
@@ -495,6 +942,12 @@ def void_sale(sale_id, void_reason, user, request=None):
         if sale.status == Sale.Status.VOIDED:
             raise BusinessRuleViolation("Sale is already voided.")
 
+        agreements = [
+            item.agreement_line_item.purchase_agreement
+            for item in [*sale.boxed_sales.all(), *sale.coupled_sales.all()]
+            if item.agreement_line_item
+        ]
+        allocations_before = _agreement_allocations(purchase_agreements=agreements)
         boxed_total_value = Decimal("0.00")
         coupled_total_value = Decimal("0.00")
 
@@ -553,6 +1006,9 @@ def void_sale(sale_id, void_reason, user, request=None):
                     updated_by=user,
                 )
 
+        _record_daily_sales(sale, sign=-1)
+        bump(SALES, INVENTORY)
+
         # Mark sale voided (use queryset update to bypass full_clean limit_choices_to)
         Sale.objects.filter(pk=sale.pk).update(
             status=Sale.Status.VOIDED,
@@ -570,9 +1026,12 @@ def void_sale(sale_id, void_reason, user, request=None):
             if coupled_sale.agreement_line_item:
                 _update_agreement_status(coupled_sale.agreement_line_item)
 
-        # Refresh balances
-        if sale.payment_method == Sale.PaymentMethod.FROM_DEPOSIT:
-            _refresh_balances(sale.customer.deposit_account)
+        # Apply balance deltas for the refund and re-opened agreement lines
+        if sale.payment_method == Sale.PaymentMethod.FROM_DEPOSIT and total_refund_amount > 0:
+            _apply_balance_delta(sale.customer.deposit_account, total=total_refund_amount)
+        _apply_allocation_change(
+            allocations_before, _agreement_allocations(purchase_agreements=agreements)
+        )
 
         audit(user, 'void_sale', sale, detail={
             'void_reason': void_reason,
@@ -621,6 +1080,7 @@ def amend_line_item(line_item_id, new_quantity, new_price_per_unit, reason, user
                     f"but only ₦{available:,.2f} is available."
                 )
 
+        before = _agreement_allocations(purchase_agreements=[old_item.purchase_agreement])
         new_version = old_item.version + 1
 
         new_item = PurchaseAgreementLineItem(
@@ -641,7 +1101,9 @@ def amend_line_item(line_item_id, new_quantity, new_price_per_unit, reason, user
         old_item.superseded_by = new_item
         old_item.save(update_fields=["is_current_version", "superseded_by"])
 
-        _refresh_balances(account)
+        _apply_allocation_change(
+            before, _agreement_allocations(purchase_agreements=[old_item.purchase_agreement])
+        )
 
         audit(user, 'amend_line_item', new_item, detail={
             'line_number': old_item.line_number,
@@ -13,6 +13,7 @@ from .models import (
 )
 from inventory.models import TransformationItem, Inventory, InventoryTransaction
 from inventory.utils import create_inventory_transaction
+from core.versions import INVENTORY, bump
 
 
 # ========================================================================
@@ -85,3 +86,4 @@ def mark_item_available(sender, instance, **kwargs):
         TransformationItem.objects.select_for_update().filter(
             pk=instance.transformation_item.pk
         ).update(status=TransformationItem.Status.AVAILABLE)
+        bump(INVENTORY)
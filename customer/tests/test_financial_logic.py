@@ -228,6 +228,167 @@ class RefreshBalancesTest(TestCase):
         self.assertEqual(self.account.cached_total_balance, Decimal("440000.00"))
 
 
+class IncrementalBalanceTest(TestCase):
+    """Test services keep cached balances equal to the full recompute via deltas."""
+
+    def setUp(self):
+        self.user = _create_user()
+        self.customer, self.account = _create_funded_customer(
+            self.user, deposit_amount=Decimal("500000.00")
+        )
+        self.product, self.inv = _create_boxed_product(
+            self.user, qty=20, wac=Decimal("30000.00")
+        )
+
+    def _assert_cache_matches_recompute(self):
+        self.account.refresh_from_db()
+        total = self.account._calculate_total_balance()
+        allocated = self.account._calculate_allocated_balance()
+        self.assertEqual(self.account.cached_total_balance, total)
+        self.assertEqual(self.account.cached_allocated_balance, allocated)
+        self.assertEqual(self.account.cached_available_balance, total - allocated)
+
+    def test_deposit_does_not_recompute_allocation(self):
+        from unittest import mock
+        from customer.models import DepositAccount
+
+        with mock.patch.object(
+            DepositAccount, "_calculate_allocated_balance"
+        ) as recompute:
+            record_deposit(self.account, Decimal("1000.00"), "", self.user)
+        recompute.assert_not_called()
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.cached_total_balance, Decimal("501000.00"))
+        self.assertEqual(self.account.cached_available_balance, Decimal("501000.00"))
+
+    def test_service_sequence_matches_full_recompute(self):
+        from customer.services import (
+            create_purchase_agreement, create_cfa_agreement, record_cfa_fulfillment,
+            void_cfa_fulfillment, record_withdrawal, void_deposit,
+        )
+
+        agreement = create_purchase_agreement(
+            self.account,
+            [{"product": self.product, "quantity_ordered": 3,
+              "price_per_unit": Decimal("40000.00")}],
+            self.user,
+        )
+        self._assert_cache_matches_recompute()
+
+        line_item = agreement.agreement_line_items.get()
+        amend_line_item(line_item.pk, 4, Decimal("35000.00"), "More units", self.user)
+        self._assert_cache_matches_recompute()
+
+        cfa = create_cfa_agreement(
+            self.account, Decimal("90000.00"), Decimal("1800.00"), self.user
+        )
+        fulfillment = record_cfa_fulfillment(cfa.pk, Decimal("25000.00"), "", self.user)
+        self._assert_cache_matches_recompute()
+        void_cfa_fulfillment(fulfillment.pk, "Mistake", self.user)
+        self._assert_cache_matches_recompute()
+
+        txn = record_withdrawal(self.account, Decimal("5000.00"), "", self.user)
+        void_deposit(txn.pk, "Mistake", self.user)
+        cancel_agreement(agreement.pk, self.user)
+        self._assert_cache_matches_recompute()
+
+    def test_empty_cache_falls_back_to_full_recompute(self):
+        from customer.models import DepositAccount
+
+        DepositAccount.objects.filter(pk=self.account.pk).update(
+            cached_total_balance=None,
+            cached_allocated_balance=None,
+            cached_available_balance=None,
+        )
+        record_deposit(self.account, Decimal("1000.00"), "", self.user)
+        self._assert_cache_matches_recompute()
+        self.assertEqual(self.account.cached_total_balance, Decimal("501000.00"))
+
+
+class SetBasedBalanceTest(TestCase):
+    """Test calculate_account_balances() and the balance commands."""
+
+    def setUp(self):
+        from customer.services import create_cfa_agreement, record_cfa_fulfillment
+
+        self.user = _create_user()
+        self.customer, self.account = _create_funded_customer(
+            self.user, deposit_amount=Decimal("500000.00")
+        )
+        self.other_customer, self.other_account = _create_funded_customer(
+            self.user, deposit_amount=Decimal("70000.00")
+        )
+        self.product, self.inv = _create_boxed_product(
+            self.user, qty=20, wac=Decimal("30000.00")
+        )
+        agreement = PurchaseAgreement.objects.create(
+            account=self.account, created_by=self.user
+        )
+        line_item = PurchaseAgreementLineItem.objects.create(
+            purchase_agreement=agreement,
+            product=self.product,
+            quantity_ordered=5,
+            price_per_unit=Decimal("60000.00"),
+            created_by=self.user,
+        )
+        sale = Sale.objects.create(
+            customer=self.customer,
+            payment_method=Sale.PaymentMethod.FROM_DEPOSIT,
+            agreement=agreement,
+            created_by=self.user,
+        )
+        BoxedSale.objects.create(
+            sale=sale, product=self.product, quantity=2,
+            agreement_line_item=line_item, price=Decimal("60000.00"),
+            created_by=self.user,
+        )
+        cfa = create_cfa_agreement(
+            self.account, Decimal("50000.00"), Decimal("1650.00"), self.user
+        )
+        record_cfa_fulfillment(cfa.pk, Decimal("3333.00"), "", self.user)
+        _refresh_balances(self.account)
+
+    def test_matches_per_account_calculation(self):
+        from customer.services import calculate_account_balances
+
+        cents = Decimal("0.01")
+        with self.assertNumQueries(3):
+            balances = calculate_account_balances(
+                [self.account.pk, self.other_account.pk]
+            )
+        for account in (self.account, self.other_account):
+            total = account._calculate_total_balance()
+            allocated = account._calculate_allocated_balance()
+            self.assertEqual(balances[account.pk]["total"], total.quantize(cents))
+            self.assertEqual(balances[account.pk]["allocated"], allocated.quantize(cents))
+
+    def test_verify_reports_and_fixes_mismatches(self):
+        import json
+        from io import StringIO
+        from django.core.management import call_command
+        from customer.models import DepositAccount
+
+        DepositAccount.objects.filter(pk=self.other_account.pk).update(
+            cached_total_balance=Decimal("1.00")
+        )
+
+        out = StringIO()
+        call_command("verify_cached_balances", "--json", stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["checked"], 2)
+        self.assertEqual(
+            {(m["account_id"], m["field"]) for m in report["mismatches"]},
+            {(str(self.other_account.pk), "total")},
+        )
+
+        call_command("populate_cached_balances", "--json", stdout=StringIO())
+        out = StringIO()
+        call_command("verify_cached_balances", "--json", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["mismatches"], [])
+        self.other_account.refresh_from_db()
+        self.assertEqual(self.other_account.cached_total_balance, Decimal("70000.00"))
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 # 2. PurchaseAgreementLineItem.remaining_quantity tests
 # ─────────────────────────────────────────────────────────────────────────────
@@ -369,6 +530,82 @@ class RemainingQuantityTest(TestCase):
         ali.refresh_from_db()
         self.assertEqual(ali.remaining_quantity, 6)
 
+    def test_with_fulfillment_annotations_match_properties(self):
+        ali = PurchaseAgreementLineItem.objects.create(
+            purchase_agreement=self.agreement,
+            product=self.product,
+            quantity_ordered=10,
+            price_per_unit=Decimal("50000.00"),
+            created_by=self.user,
+        )
+        self._make_sale_with_boxed(qty=2, ali=ali)
+        self._make_sale_with_boxed(qty=3, ali=ali)
+        self._make_sale_with_coupled(ali=ali)
+
+        item = PurchaseAgreementLineItem.objects.with_fulfillment().get(pk=ali.pk)
+        agreement = PurchaseAgreement.objects.with_fulfillment().get(pk=self.agreement.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(item.quantity_fulfilled_accross_all_versions, 6)
+            self.assertEqual(item.remaining_quantity, 4)
+            self.assertEqual(agreement.total_allocated_amount, Decimal("500000.00"))
+            self.assertEqual(agreement.total_quantity_ordered, 10)
+            self.assertEqual(agreement.total_quantity_fulfilled, 6)
+            self.assertEqual(agreement.total_received_percent, Decimal("60.00"))
+            self.assertFalse(agreement.can_edit)
+
+        # Unannotated instances fall back to a query and agree.
+        ali.refresh_from_db()
+        self.assertEqual(ali.remaining_quantity, 4)
+        self.assertEqual(self.agreement.total_quantity_fulfilled, 6)
+
+    def test_with_fulfillment_ignores_voided_sales(self):
+        ali = PurchaseAgreementLineItem.objects.create(
+            purchase_agreement=self.agreement,
+            product=self.product,
+            quantity_ordered=5,
+            price_per_unit=Decimal("50000.00"),
+            created_by=self.user,
+        )
+        sale = self._make_sale_with_boxed(qty=2, ali=ali)
+        void_sale(sale.pk, "Test", self.user)
+
+        item = PurchaseAgreementLineItem.objects.with_fulfillment().get(pk=ali.pk)
+        agreement = PurchaseAgreement.objects.with_fulfillment().get(pk=self.agreement.pk)
+        self.assertEqual(item.remaining_quantity, 5)
+        self.assertEqual(agreement.total_quantity_fulfilled, 0)
+        self.assertTrue(agreement.can_edit)
+
+    def test_with_labels_renders_str_without_queries(self):
+        ali = PurchaseAgreementLineItem.objects.create(
+            purchase_agreement=self.agreement,
+            product=self.product,
+            quantity_ordered=4,
+            price_per_unit=Decimal("50000.00"),
+            created_by=self.user,
+        )
+        self._make_sale_with_boxed(qty=1, ali=ali)
+        other = PurchaseAgreement.objects.create(account=self.account, created_by=self.user)
+        PurchaseAgreementLineItem.objects.create(
+            purchase_agreement=other,
+            product=self.product,
+            quantity_ordered=2,
+            price_per_unit=Decimal("50000.00"),
+            created_by=self.user,
+        )
+
+        with self.assertNumQueries(2):
+            agreements = list(PurchaseAgreement.objects.with_labels())
+        with self.assertNumQueries(0):
+            labels = {a.pk: str(a) for a in agreements}
+        self.assertIn(f"{self.product.modelname.upper()} (3)", labels[self.agreement.pk])
+        self.assertEqual(labels[self.agreement.pk], str(PurchaseAgreement.objects.get(pk=self.agreement.pk)))
+
+        with self.assertNumQueries(2):
+            items = list(PurchaseAgreementLineItem.objects.with_labels())
+        with self.assertNumQueries(0):
+            item_labels = [str(i) for i in items]
+        self.assertEqual(len(item_labels), 2)
+
 
 # ─────────────────────────────────────────────────────────────────────────────
 # 3. CfaAgreement.update_status() tests
@@ -1063,3 +1300,161 @@ class AmendLineItemTest(TestCase):
                 user=self.user,
             )
         self.assertIn("Insufficient", str(ctx.exception))
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Batched FIFO Depletion Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class BatchedFifoDepletionTest(TestCase):
+    """Test create_sale() depletes FIFO layers for all boxed lines in one pass."""
+
+    def setUp(self):
+        from inventory.models import InventoryCostLayer
+
+        self.user = _create_user()
+        self.customer, self.account = _create_funded_customer(self.user)
+        self.product, self.inv = _create_boxed_product(
+            self.user, qty=20, wac=Decimal("500.00")
+        )
+        self.old_layer = InventoryCostLayer.objects.create(
+            product=self.product, quantity=3, remaining_quantity=3,
+            unit_cost=Decimal("100.00"),
+        )
+        self.new_layer = InventoryCostLayer.objects.create(
+            product=self.product, quantity=5, remaining_quantity=5,
+            unit_cost=Decimal("200.00"),
+        )
+
+    def _cash_sale(self, *quantities):
+        from customer.services import create_sale as svc_create_sale
+
+        sale = Sale(
+            customer=self.customer,
+            payment_method=Sale.PaymentMethod.CASH,
+            created_by=self.user,
+            updated_by=self.user,
+        )
+        boxed_items = [
+            BoxedSale(
+                sale=sale,
+                product=self.product,
+                quantity=qty,
+                price=Decimal("1000.00"),
+                created_by=self.user,
+                updated_by=self.user,
+            )
+            for qty in quantities
+        ]
+        svc_create_sale(sale, boxed_items, [], self.user)
+        return boxed_items
+
+    def test_lines_for_same_product_consume_layers_in_order(self):
+        first, second = self._cash_sale(2, 4)
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.cost_basis, Decimal("200.00"))
+        # 1 unit left in the old layer, then 3 from the newer one
+        self.assertEqual(second.cost_basis, Decimal("700.00"))
+
+        self.old_layer.refresh_from_db()
+        self.new_layer.refresh_from_db()
+        self.assertEqual(self.old_layer.remaining_quantity, 0)
+        self.assertEqual(self.new_layer.remaining_quantity, 2)
+        self.assertEqual(
+            list(second.layer_consumptions.values_list("quantity_consumed", flat=True)),
+            [1, 3],
+        )
+
+    def test_shortfall_creates_synthetic_layer_at_wac(self):
+        from inventory.models import InventoryCostLayer
+
+        (item,) = self._cash_sale(10)
+        item.refresh_from_db()
+        # 3 @ 100 + 5 @ 200 + 2 @ WAC 500
+        self.assertEqual(item.cost_basis, Decimal("2300.00"))
+        synthetic = InventoryCostLayer.objects.get(
+            product=self.product, unit_cost=Decimal("500.00")
+        )
+        self.assertEqual(synthetic.quantity, 2)
+        self.assertEqual(synthetic.remaining_quantity, 0)
+
+    def test_layers_are_read_and_written_once(self):
+        from inventory.services import _deplete_fifo_batch
+
+        with self.assertNumQueries(2):
+            results = _deplete_fifo_batch([(self.product, 2), (self.product, 4)])
+        self.assertEqual(
+            [cost for cost, _ in results], [Decimal("200.00"), Decimal("700.00")]
+        )
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Daily Sales Summary Tests
+# ─────────────────────────────────────────────────────────────────────────────
+
+class DailySalesSummaryTest(TestCase):
+    """Test create_sale()/void_sale() maintain the DailySalesSummary rollup."""
+
+    def setUp(self):
+        self.user = _create_user()
+        self.customer, self.account = _create_funded_customer(self.user)
+        self.product, self.inv = _create_boxed_product(
+            self.user, qty=20, wac=Decimal("30000.00")
+        )
+        self.coupled, self.ti = _create_coupled_product(self.user, self.product)
+        self.ti.unit_cost_at_transformation = Decimal("35000.00")
+        self.ti.save()
+
+    def _cash_sale(self):
+        from customer.services import create_sale as svc_create_sale
+
+        sale = Sale(
+            customer=self.customer,
+            payment_method=Sale.PaymentMethod.CASH,
+            created_by=self.user,
+            updated_by=self.user,
+        )
+        boxed = BoxedSale(
+            sale=sale, product=self.product, quantity=3,
+            price=Decimal("40000.00"), created_by=self.user, updated_by=self.user,
+        )
+        coupled = CoupledSale(
+            sale=sale, transformation_item=self.ti,
+            price=Decimal("55000.00"), created_by=self.user, updated_by=self.user,
+        )
+        return svc_create_sale(sale, [boxed], [coupled], self.user)
+
+    def _rows(self):
+        from customer.models import DailySalesSummary
+
+        return {
+            (r.product_id, r.channel, r.payment_method): (r.revenue, r.units, r.cost_of_goods)
+            for r in DailySalesSummary.objects.all()
+        }
+
+    def test_create_sale_adds_rows(self):
+        self._cash_sale()
+        self.assertEqual(self._rows(), {
+            (self.product.pk, "boxed", "cash"): (
+                Decimal("120000.00"), 3, Decimal("90000.00"),
+            ),
+            (self.coupled.pk, "coupled", "cash"): (
+                Decimal("55000.00"), 1, Decimal("35000.00"),
+            ),
+        })
+
+    def test_void_sale_removes_rows(self):
+        sale = self._cash_sale()
+        void_sale(sale.pk, "Test void", self.user)
+        for revenue, units, cost in self._rows().values():
+            self.assertEqual((revenue, units, cost), (Decimal("0.00"), 0, Decimal("0.00")))
+
+    def test_backfill_matches_incremental_rows(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        self._cash_sale()
+        incremental = self._rows()
+        call_command("backfill_daily_sales", stdout=StringIO())
+        self.assertEqual(self._rows(), incremental)
@@ -1,8 +1,15 @@
+from decimal import Decimal
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from account.models import CustomUser
-from customer.models import Customer, DepositAccount, PurchaseAgreement, PurchaseAgreementLineItem
-from inventory.models import Brand, Product, Inventory, TransformationItem
+from customer.models import (
+    BoxedSale, CoupledSale, Customer, DepositAccount, PurchaseAgreement,
+    PurchaseAgreementLineItem, Sale,
+)
+from customer.services import create_sale
+from inventory.models import Brand, Product, Inventory, Transformation, TransformationItem
 
 
 class NewSaleSystemTests(TestCase):
@@ -189,3 +196,99 @@ class NewSaleSystemTests(TestCase):
         self.assertEqual(resp.status_code, 302)  # redirect to customer detail
         self.inventory.refresh_from_db()
         self.assertEqual(self.inventory.quantity, 7)  # 10 - 3
+
+    def _sell(self, boxed_quantity, boxed_price, coupled_prices=()):
+        sale = Sale(customer=self.customer, payment_method="cash", created_by=self.user)
+        boxed = [
+            BoxedSale(
+                sale=sale,
+                product=self.boxed_product,
+                quantity=boxed_quantity,
+                price=Decimal(boxed_price),
+                created_by=self.user,
+            )
+        ]
+        coupled = []
+        if coupled_prices:
+            variant = self.boxed_product.variants.get()
+            transformation = Transformation.objects.create(service_fee=0)
+            for price in coupled_prices:
+                n = TransformationItem.objects.count()
+                ti = TransformationItem.objects.create(
+                    transformation=transformation,
+                    source_product=self.boxed_product,
+                    target_product=variant,
+                    engine_number=f"ENG-S{n}",
+                    chassis_number=f"CHA-S{n}",
+                )
+                coupled.append(
+                    CoupledSale(
+                        sale=sale,
+                        transformation_item=ti,
+                        price=Decimal(price),
+                        created_by=self.user,
+                    )
+                )
+        return create_sale(sale, boxed, coupled, self.user)
+
+    def test_with_totals_does_not_fan_out(self):
+        sale = self._sell(2, "75000", coupled_prices=["90000", "95000"])
+        annotated = Sale.objects.with_totals().get(pk=sale.pk)
+        self.assertEqual(annotated.total_amount, Decimal("335000.00"))
+        self.assertEqual(annotated.item_count, 4)
+        self.assertEqual((annotated.boxed_units, annotated.coupled_units), (2, 2))
+
+        fresh = Sale.objects.get(pk=sale.pk)
+        self.assertEqual(annotated.sales_total, fresh.sales_total)
+        self.assertEqual(annotated.sales_items_count, fresh.sales_items_count)
+
+    def test_sales_list_sorts_and_filters_by_total(self):
+        small = self._sell(1, "60000")
+        large = self._sell(3, "70000")
+        url = reverse("sales")
+
+        resp = self.client.get(url, {"sort": "total_amount", "direction": "desc"})
+        self.assertEqual([s.pk for s in resp.context["sales"]], [large.pk, small.pk])
+
+        resp = self.client.get(url, {"min_total": "100000"})
+        self.assertEqual([s.pk for s in resp.context["sales"]], [large.pk])
+
+        resp = self.client.get(url, {"max_total": "not-a-number"})
+        self.assertEqual(len(resp.context["sales"]), 2)
+
+    def test_sales_list_pages_past_the_first_page_sorted_by_total(self):
+        from urllib.parse import urlencode
+
+        self.inventory.quantity = 200
+        self.inventory.save()
+        for i in range(105):
+            self._sell(1, str(60000 + (i % 50) * 100))
+        url = reverse("sales")
+        query = {"sort": "total_amount", "direction": "asc", "min_total": "60000"}
+
+        resp = self.client.get(url, query)
+        first = resp.context["sales"]
+        self.assertEqual(len(first), 100)
+        # The next-page link keeps the sort and filters
+        next_query = urlencode({"cursor": first.next_cursor, **query})
+        self.assertContains(resp, f"?{next_query}")
+
+        resp = self.client.get(f"{url}?{next_query}")
+        self.assertEqual(resp.status_code, 200)
+        second = resp.context["sales"]
+        self.assertEqual(len(second), 5)
+        totals = [s.total_amount for s in [*first, *second]]
+        self.assertEqual(totals, sorted(totals))
+        self.assertEqual(len({s.pk for s in [*first, *second]}), 105)
+
+    def test_sales_list_query_count_does_not_grow(self):
+        self._sell(1, "60000")
+        url = reverse("sales")
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        for _ in range(3):
+            self._sell(1, "60000")
+        with CaptureQueriesContext(connection) as after:
+            resp = self.client.get(url)
+        self.assertEqual(len(resp.context["sales"]), 4)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
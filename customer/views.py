@@ -4,7 +4,10 @@ from django.shortcuts import render, get_object_or_404, redirect
 from render_block import render_block_to_string
 from django.urls import reverse
 from django.core.exceptions import ValidationError
-from django.core.paginator import Paginator
+from core.pagination import CursorPaginator
+from core.fragments import cache_fragment, versioned_etag
+from core.search import search
+from core.versions import CUSTOMERS, SALES
 from django.http import HttpResponse
 from django_htmx.http import HttpResponseClientRedirect
 from django.db.models import Prefetch, Sum, F, DecimalField, Value, Q, Count
@@ -49,6 +52,7 @@ logger = logging.getLogger(__name__)
 
 
 
+@cache_fragment("customers/customers.html", CUSTOMERS, SALES)
 def customers(request):
     search_query = request.GET.get("q", "")
     filter_by = request.GET.get("filter", "")
@@ -127,9 +131,8 @@ def customers(request):
 
     # pagination
     PAGE_SIZE = 100
-    paginator = Paginator(customer_list, PAGE_SIZE)
-    page_number = request.GET.get("page", 1)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(customer_list, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
 
     # total deposited for subtitle
     total_deposited = customer_list.aggregate(
@@ -154,7 +157,7 @@ def customers(request):
     }
 
     if request.htmx:
-        if any(key in request.GET for key in ["page", "q", "filter", "sort"]):
+        if any(key in request.GET for key in ["page", "cursor", "q", "filter", "sort"]):
             return render(
                 request,
                 "customers/customers.html#customerlist-table-partial",
@@ -171,6 +174,7 @@ def customers(request):
     return render(request, "customers/customers.html", context)
 
 
+@versioned_etag(CUSTOMERS, SALES, model=Customer)
 def customer_detail(request, pk):
     active_tab = request.GET.get("tab", "agreements")
 
@@ -237,13 +241,16 @@ def customer_detail(request, pk):
             data["percent"] = 0
 
     agreements = (
-        customer.deposit_account.purchase_agreements.select_related("account")
+        customer.deposit_account.purchase_agreements.with_fulfillment()
+        .select_related("account")
         .prefetch_related(
             Prefetch(
                 "agreement_line_items",
                 queryset=PurchaseAgreementLineItem.objects.filter(
                     is_current_version=True
-                ).select_related("product", "product__brand"),
+                )
+                .with_fulfillment()
+                .select_related("product", "product__brand"),
             )
         )
         .order_by("-created_at")
@@ -260,7 +267,8 @@ def customer_detail(request, pk):
     ]
 
     sales = (
-        customer.customer_sales.select_related("agreement")
+        customer.customer_sales.with_totals()
+        .select_related("agreement")
         .prefetch_related(
             "boxed_sales__product", "coupled_sales__transformation_item__target_product"
         )
@@ -687,7 +695,6 @@ def modal_new_customer(request):
 
 def customer_transactions(request):
     PAGE_SIZE = 100
-    page_number = request.GET.get("page", 1)
     customer_pk = request.GET.get("customer")
     search_query = request.GET.get("q", "")
 
@@ -697,11 +704,7 @@ def customer_transactions(request):
         transaction_list = transaction_list.filter(account__customer__pk=customer_pk)
 
     if search_query:
-        transaction_list = transaction_list.filter(
-            Q(reference_number__icontains=search_query)
-            | Q(account__customer__full_name__icontains=search_query)
-            | Q(note__icontains=search_query)
-        )
+        transaction_list = search(transaction_list, search_query)
 
     # Sorting
     sort_field = request.GET.get("sort", "created_at")
@@ -722,8 +725,8 @@ def customer_transactions(request):
     if sort_field in allowed_sort_fields:
         transaction_list = transaction_list.order_by(order_by_field)
 
-    paginator = Paginator(transaction_list, PAGE_SIZE)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(transaction_list, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
     context = {
         "transactions": page_obj,
         "search_query": search_query,
@@ -732,7 +735,7 @@ def customer_transactions(request):
     }
 
     if request.htmx:
-        if request.GET.get("page") or request.GET.get("q") or request.GET.get("sort"):
+        if request.GET.get("page") or request.GET.get("cursor") or request.GET.get("q") or request.GET.get("sort"):
             transaction_list = render_block_to_string(
                 "customers/customer_transactions.html",
                 "body",
@@ -796,6 +799,9 @@ def manage_purchase_agreements(request, pk=None):
                     )
                 else:
                     with transaction.atomic():
+                        allocations_before = customer_services._agreement_allocations(
+                            purchase_agreements=[instance]
+                        )
                         agreement = form.save(commit=False)
                         agreement.updated_by = request.user
                         agreement.save()
@@ -811,7 +817,12 @@ def manage_purchase_agreements(request, pk=None):
                             item.updated_by = request.user
                             item.save()
 
-                        customer_services._refresh_balances(agreement.account)
+                        customer_services._apply_allocation_change(
+                            allocations_before,
+                            customer_services._agreement_allocations(
+                                purchase_agreements=[agreement]
+                            ),
+                        )
 
                 messages.success(
                     request,
@@ -972,7 +983,10 @@ def agreement_line_item_remove(request, index):
 @login_required
 def modal_cancel_purchase_agreement(request, pk):
     agreement = get_object_or_404(
-        PurchaseAgreement.objects.select_related("account__customer"), pk=pk
+        PurchaseAgreement.objects.with_fulfillment().select_related(
+            "account__customer"
+        ),
+        pk=pk,
     )
     customer = agreement.account.customer
 
@@ -1066,7 +1080,7 @@ def modal_amend_line_item(request, pk):
 
 def agreement_detail(request, pk):
     agreement = get_object_or_404(
-        PurchaseAgreement.objects.select_related(
+        PurchaseAgreement.objects.with_fulfillment().select_related(
             "account", "account__customer", "created_by"
         ),
         pk=pk,
@@ -1075,6 +1089,7 @@ def agreement_detail(request, pk):
 
     line_items = (
         agreement.agreement_line_items.filter(is_current_version=True)
+        .with_fulfillment()
         .select_related("product", "product__inventory", "product__brand")
         .prefetch_related(
             "boxed_sales",
@@ -1141,6 +1156,7 @@ def agreement_detail(request, pk):
     # Check for superseded (old version) line items
     superseded_items = (
         agreement.agreement_line_items.filter(is_current_version=False)
+        .with_fulfillment()
         .select_related("product", "product__brand")
         .prefetch_related(
             "boxed_sales",
@@ -1205,24 +1221,25 @@ def agreement_detail(request, pk):
     return render(request, "customers/agreement_detail.html", context)
 
 
+@cache_fragment("customers/sales/sales.html", SALES)
 def sales(request):
     PAGE_SIZE = 100
-    page_number = request.GET.get("page", 1)
     search_query = request.GET.get("q", "")
     filter_status = request.GET.get("status", "")
     filter_payment = request.GET.get("payment", "")
     filter_date_from = request.GET.get("date_from", "")
     filter_date_to = request.GET.get("date_to", "")
+    filter_min_total = request.GET.get("min_total", "")
+    filter_max_total = request.GET.get("max_total", "")
     sort_field = request.GET.get("sort", "sale_date")
     direction = request.GET.get("direction", "desc")
 
     allowed_sort_fields = [
         "sale_date",
+        "total_amount",
     ]
 
-    sale_list = Sale.objects.select_related("customer").prefetch_related(
-        "boxed_sales", "coupled_sales"
-    )
+    sale_list = Sale.objects.with_totals().select_related("customer")
 
     if search_query:
         sale_list = sale_list.filter(
@@ -1257,6 +1274,17 @@ def sales(request):
     if filter_date_to:
         sale_list = sale_list.filter(sale_date__date__lte=filter_date_to)
 
+    # Total filter (ignores values that are not numbers)
+    for value, lookup in [
+        (filter_min_total, "total_amount__gte"),
+        (filter_max_total, "total_amount__lte"),
+    ]:
+        if value:
+            try:
+                sale_list = sale_list.filter(**{lookup: Decimal(value)})
+            except InvalidOperation:
+                pass
+
     # Sorting
     if sort_field in allowed_sort_fields:
         match direction:
@@ -1265,8 +1293,8 @@ def sales(request):
             case "asc":
                 sale_list = sale_list.order_by(sort_field)
 
-    paginator = Paginator(sale_list, PAGE_SIZE)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(sale_list, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
 
     context = {
         "sales": page_obj,
@@ -1277,10 +1305,13 @@ def sales(request):
         "filter_payment": filter_payment,
         "filter_date_from": filter_date_from,
         "filter_date_to": filter_date_to,
+        "filter_min_total": filter_min_total,
+        "filter_max_total": filter_max_total,
+        "params": {k: v for k, v in request.GET.items() if k != "cursor"},
     }
 
     if request.htmx:
-        match any(key in request.GET for key in ["q", "status", "payment", "date_from", "date_to", "page"]):
+        match any(key in request.GET for key in ["q", "status", "payment", "date_from", "date_to", "min_total", "max_total", "sort", "page", "cursor"]):
             case True:
                 return render(request, "customers/sales/sales.html#sales-table-partial", context)
             case False:
@@ -1291,9 +1322,9 @@ def sales(request):
 
 def sale_detail(request, pk):
     sale = get_object_or_404(
-        Sale.objects.select_related(
-            "customer", "created_by", "agreement"
-        ).prefetch_related(
+        Sale.objects.with_totals()
+        .select_related("customer", "created_by", "agreement")
+        .prefetch_related(
             "boxed_sales__product", "coupled_sales__transformation_item"
         ),
         pk=pk,
@@ -1318,11 +1349,7 @@ def search_customers_for_sale(request):
     query = request.GET.get("new_customer_name", "").strip()
     customers = []
     if query:
-        customers = Customer.objects.filter(
-            Q(full_name__icontains=query)
-            | Q(phone__icontains=query)
-            | Q(customer_number__icontains=query)
-        )[:10]
+        customers = search(Customer.objects.all(), query, ranked=True)[:10]
     return render(
         request,
         "customers/sales/partials/customer_search_results.html",
@@ -1576,7 +1603,7 @@ def fulfill_agreement(request, customer_id, agreement_id):
         Customer.objects.select_related("deposit_account"), pk=customer_id
     )
     agreement = get_object_or_404(
-        PurchaseAgreement.objects.select_related("account"),
+        PurchaseAgreement.objects.with_fulfillment().select_related("account"),
         pk=agreement_id,
         account__customer=customer,
     )
@@ -1589,6 +1616,7 @@ def fulfill_agreement(request, customer_id, agreement_id):
                 PurchaseAgreementLineItem.Status.PARTIALLY_FULFILLED,
             ],
         )
+        .with_fulfillment()
         .select_related("product")
         .order_by("line_number")
     )
@@ -1694,7 +1722,7 @@ def fulfill_agreement(request, customer_id, agreement_id):
 @login_required
 def modal_void_sale(request, pk):
     sale = get_object_or_404(
-        Sale.objects.select_related("customer__deposit_account"), pk=pk
+        Sale.objects.with_totals().select_related("customer__deposit_account"), pk=pk
     )
 
     if request.method == "POST":
@@ -4,6 +4,7 @@ from .models import (
     Brand,
     Product,
     Inventory,
+    InventoryLedgerSummary,
     InventoryTransaction,
     Transformation,
     TransformationItem,
@@ -225,6 +226,27 @@ class InventoryTransactionAdmin(AuditAdminMixin, admin.ModelAdmin):
     source_link.short_description = "Source"
 
 
+@admin.register(InventoryLedgerSummary)
+class InventoryLedgerSummaryAdmin(admin.ModelAdmin):
+    list_display = [
+        "period",
+        "inventory",
+        "transaction_count",
+        "quantity_change",
+        "value_change",
+        "layer_count",
+    ]
+    list_filter = ["period"]
+    search_fields = ["inventory__product__sku", "inventory__product__modelname"]
+    list_select_related = ["inventory", "inventory__product"]
+
+    # Written only by archive_inventory_ledger
+    readonly_fields = [f.name for f in InventoryLedgerSummary._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
 @admin.register(Transformation)
 class TransformationAdmin(AuditAdminMixin, admin.ModelAdmin):
     list_display = [
@@ -70,6 +70,14 @@ class TransformationItemForm(ModelForm):
         )
         self.fields["source_product"].empty_label = "Select a product to transform"
 
+    def validate_unique(self):
+        # Engine/chassis numbers are checked for the whole formset in one query.
+        exclude = self._get_validation_exclusions() | {"engine_number", "chassis_number"}
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as e:
+            self._update_errors(e)
+
 
 class BaseTransformationItemFormSet(BaseModelFormSet):
     def __init__(self, *args, **kwargs):
@@ -80,25 +88,31 @@ class BaseTransformationItemFormSet(BaseModelFormSet):
         if any(self.errors):
             return
 
-        engine_numbers = set()
-        chassis_numbers = set()
-
-        qs = TransformationItem.objects.exclude(status="voided")
-        inventory = Inventory.objects.select_related("product")
-        consumption_demand = {inv.product: 0 for inv in inventory}
-        inventory_lookup = {inv.product: inv for inv in inventory}
-
-        db_engine_numbers = set(qs.values_list("engine_number", flat=True))
-        db_chassis_numbers = set(qs.values_list("chassis_number", flat=True))
-
-        for form in self.forms:
-            if self.can_delete and self._should_delete_form(form):
-                continue
+        forms_to_check = [
+            form
+            for form in self.forms
+            if not (self.can_delete and self._should_delete_form(form))
+        ]
 
+        consumption_demand = {}
+        for form in forms_to_check:
             source_product = form.cleaned_data.get("source_product")
             if source_product is not None:
-                consumption_demand[source_product] += 1
+                consumption_demand[source_product] = consumption_demand.get(source_product, 0) + 1
+        inventory_lookup = {
+            inv.product: inv
+            for inv in Inventory.objects.filter(product__in=consumption_demand).select_related("product")
+        }
+
+        db_engine_numbers, db_chassis_numbers = TransformationItem.taken_serials(
+            (form.cleaned_data.get("engine_number") for form in forms_to_check),
+            (form.cleaned_data.get("chassis_number") for form in forms_to_check),
+        )
 
+        engine_numbers = set()
+        chassis_numbers = set()
+
+        for form in forms_to_check:
             engine_number = form.cleaned_data.get("engine_number")
             chassis_number = form.cleaned_data.get("chassis_number")
 
@@ -138,9 +152,6 @@ class BaseTransformationItemFormSet(BaseModelFormSet):
 
         # Validate available qty to transform
         for product, demanded_qty in consumption_demand.items():
-            if demanded_qty == 0:
-                continue  # skip unused products
-
             inv_record = inventory_lookup.get(product)
             if not inv_record:
                 raise ValidationError(f"No inventory record for {product}")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.archiving import add_cutoff_arguments, cutoff_from_options
+from inventory.models import InventoryTransaction
+from inventory.services import archivable_cost_layers, archive_inventory_ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves inventory transactions and spent FIFO cost layers from closed "
+        "periods into the archive tables, adding their totals to a per-month "
+        "InventoryLedgerSummary row. By default everything before the first "
+        "day of the month --months ago is archived. Stock-as-of queries keep "
+        "reading archived rows, so results do not change."
+    )
+
+    def add_arguments(self, parser):
+        add_cutoff_arguments(parser)
+
+    def handle(self, *args, **options):
+        cutoff, before = cutoff_from_options(options)
+
+        if options["dry_run"]:
+            transactions = InventoryTransaction.objects.filter(created_at__lt=before).count()
+            layers = archivable_cost_layers(before).count()
+            self.stdout.write(
+                f"Would archive {transactions} transaction(s) and {layers} cost layer(s) before {cutoff}."
+            )
+            return
+
+        transactions, layers = archive_inventory_ledger(before, batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {transactions} transaction(s) and {layers} cost layer(s) before {cutoff}."
+            )
+        )
@@ -0,0 +1,49 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from inventory.models import InventorySnapshot
+from inventory.services import capture_inventory_snapshot
+
+
+class Command(BaseCommand):
+    help = (
+        "Records today's stock position (quantity, WAC, FIFO value and coupled "
+        "units by status) for every inventory. Running it again the same day "
+        "replaces that day's snapshot. Schedule it daily; with --keep-daily, "
+        "older daily snapshots are thinned to the last one of each month."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--keep-daily",
+            type=int,
+            default=None,
+            help="Keep every daily snapshot for this many days, then only month-end ones.",
+        )
+
+    def handle(self, *args, **options):
+        snapshots = capture_inventory_snapshot()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recorded {len(snapshots)} inventory snapshot(s) for {timezone.localdate()}."
+            )
+        )
+
+        if options["keep_daily"] is not None:
+            cutoff = timezone.localdate() - timedelta(days=options["keep_daily"])
+            month_end = {}
+            for day in (
+                InventorySnapshot.objects.filter(snapshot_date__lt=cutoff)
+                .order_by("snapshot_date")
+                .values_list("snapshot_date", flat=True)
+                .distinct()
+            ):
+                month_end[day.year, day.month] = day
+            deleted, _ = (
+                InventorySnapshot.objects.filter(snapshot_date__lt=cutoff)
+                .exclude(snapshot_date__in=month_end.values())
+                .delete()
+            )
+            self.stdout.write(f"Pruned {deleted} daily snapshot(s) before {cutoff}.")
@@ -0,0 +1,49 @@
+# Generated by Django 6.0.4 on 2026-10-18 06:17
+
+import inventory.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_serial_keys(apps, schema_editor):
+    TransformationItem = apps.get_model("inventory", "TransformationItem")
+    batch = []
+    for item in TransformationItem.objects.only("engine_number", "chassis_number").iterator(chunk_size=2000):
+        item.engine_number_key = inventory.models.serial_key(item.engine_number)
+        item.chassis_number_key = inventory.models.serial_key(item.chassis_number)
+        batch.append(item)
+        if len(batch) >= 2000:
+            TransformationItem.objects.bulk_update(batch, ["engine_number_key", "chassis_number_key"])
+            batch = []
+    if batch:
+        TransformationItem.objects.bulk_update(batch, ["engine_number_key", "chassis_number_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0012_alter_inventory_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transformationitem',
+            name='chassis_number_key',
+            field=inventory.models.SerialKeyField(default='', editable=False, max_length=100, source='chassis_number'),
+        ),
+        migrations.AddField(
+            model_name='transformationitem',
+            name='engine_number_key',
+            field=inventory.models.SerialKeyField(default='', editable=False, max_length=100, source='engine_number'),
+        ),
+        migrations.RunPython(fill_serial_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transformationitem',
+            index=models.Index(fields=['engine_number_key'], name='inv_item_engine_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='transformationitem',
+            index=models.Index(fields=['chassis_number_key'], name='inv_item_chassis_key_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
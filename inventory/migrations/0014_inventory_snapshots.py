@@ -0,0 +1,53 @@
+# Generated by Django 6.0.4 on 2026-10-18 06:22
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0013_transformationitem_serial_keys'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('snapshot_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('snapshot_date', models.DateField()),
+                ('taken_at', models.DateTimeField()),
+                ('quantity', models.PositiveIntegerField()),
+                ('weighted_average_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('fifo_value', models.DecimalField(decimal_places=2, help_text='Remaining value of the open, non-voided FIFO layers', max_digits=15)),
+                ('coupled_available', models.PositiveIntegerField(default=0)),
+                ('coupled_reserved', models.PositiveIntegerField(default=0)),
+                ('coupled_sold', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-taken_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransaction',
+            index=models.Index(fields=['inventory', 'created_at'], name='inventory_i_invento_6d1f9f_idx'),
+        ),
+        migrations.AddField(
+            model_name='inventorysnapshot',
+            name='inventory',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='inventory.inventory'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorysnapshot',
+            index=models.Index(fields=['inventory', 'taken_at'], name='inventory_i_invento_2db7d6_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventorysnapshot',
+            constraint=models.UniqueConstraint(fields=('inventory', 'snapshot_date'), name='unique_inventory_snapshot_date'),
+        ),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 6.0.4 on 2026-10-18 06:28
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('inventory', '0014_inventory_snapshots'),
+        ('supply_chain', '0013_alter_goodsreceiptitem_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCostLayerArchive',
+            fields=[
+                ('cost_layer_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('quantity', models.PositiveIntegerField()),
+                ('remaining_quantity', models.PositiveIntegerField()),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('is_voided', models.BooleanField(default=False)),
+                ('voided_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryLedgerSummary',
+            fields=[
+                ('summary_id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('period', models.DateField(help_text='First day of the month')),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('quantity_change', models.IntegerField(default=0)),
+                ('value_change', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('layer_count', models.PositiveIntegerField(default=0)),
+                ('layer_quantity', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-period'],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventoryTransactionArchive',
+            fields=[
+                ('inventory_transaction_id', models.UUIDField(editable=False, primary_key=True, serialize=False)),
+                ('transaction_type', models.CharField(choices=[('receipt', 'Receipt'), ('sale', 'Sale'), ('transformation', 'Transformation'), ('receipt_reversal', 'Receipt Reversal'), ('sale_reversal', 'Sale Reversal'), ('transformation_reversal', 'Transformation Reversal')], max_length=30)),
+                ('source_object_id', models.UUIDField()),
+                ('quantity_change', models.IntegerField()),
+                ('cost_impact', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='inventorycostlayer',
+            index=models.Index(condition=models.Q(('is_voided', False), ('remaining_quantity__gt', 0)), fields=['product', 'created_at'], name='inv_layer_live_idx'),
+        ),
+        migrations.AddField(
+            model_name='inventorycostlayerarchive',
+            name='goods_receipt_item',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='supply_chain.goodsreceiptitem'),
+        ),
+        migrations.AddField(
+            model_name='inventorycostlayerarchive',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_cost_layers', to='inventory.product'),
+        ),
+        migrations.AddField(
+            model_name='inventoryledgersummary',
+            name='inventory',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_summaries', to='inventory.inventory'),
+        ),
+        migrations.AddField(
+            model_name='inventorytransactionarchive',
+            name='created_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='inventorytransactionarchive',
+            name='inventory',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_transactions', to='inventory.inventory'),
+        ),
+        migrations.AddField(
+            model_name='inventorytransactionarchive',
+            name='source_content_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorycostlayerarchive',
+            index=models.Index(fields=['product', 'created_at'], name='inventory_i_product_58dc3b_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='inventoryledgersummary',
+            constraint=models.UniqueConstraint(fields=('inventory', 'period'), name='unique_inventory_ledger_period'),
+        ),
+        migrations.AddIndex(
+            model_name='inventorytransactionarchive',
+            index=models.Index(fields=['inventory', 'created_at'], name='inventory_i_invento_108132_idx'),
+        ),
+    ]
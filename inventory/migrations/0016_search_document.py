@@ -0,0 +1,24 @@
+# Generated by Django 6.0.4 on 2026-10-18 06:44
+
+import core.search
+from django.db import migrations
+
+
+def fill_search_documents(apps, schema_editor):
+    core.search.refresh_search_documents(apps.get_model("inventory", "Product").objects.select_related("brand"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0015_inventory_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_document',
+            field=core.search.SearchDocumentField(default='', editable=False, sources=['modelname', 'brand.name']),
+        ),
+        migrations.RunPython(fill_search_documents, migrations.RunPython.noop),
+    ]
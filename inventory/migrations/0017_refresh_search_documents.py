@@ -0,0 +1,20 @@
+# Generated by Django 6.0.4 on 2026-10-18 10:05
+
+import core.search
+from django.db import migrations
+
+
+def refresh_search_documents(apps, schema_editor):
+    # Index zero-padded numbers without their leading zeros as well
+    core.search.refresh_search_documents(apps.get_model("inventory", "Product").objects.select_related("brand"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0016_search_document'),
+    ]
+
+    operations = [
+        migrations.RunPython(refresh_search_documents, migrations.RunPython.noop),
+    ]
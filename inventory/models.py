@@ -1,14 +1,17 @@
-from django.db import models
+from django.db import connections, models
 from account.models import CustomUser
 import uuid
 from django.db.models import *
-from django.db.models.functions import Coalesce
+from django.db.models.functions import Abs, Coalesce
 from django.core.exceptions import ValidationError
 from django.urls import reverse
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.utils import timezone
 from inventory.utils import create_inventory_transaction
+from core.numbering import next_number
+from core.search import SearchDocumentField, refresh_search_documents
+from datetime import datetime, timezone as dt_timezone
 from decimal import Decimal
 
 
@@ -38,6 +41,292 @@ class Brand(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Product search documents carry the brand name.
+            refresh_search_documents(self.product.select_related("brand"))
+
+
+class ProductQuerySet(models.QuerySet):
+    def with_valuation(self):
+        """
+        Annotate each base product with its boxed and coupled stock valuation.
+
+        Boxed units are valued at the latest open FIFO layer (falling back to
+        WAC); coupled units at the unit cost of the most recent non-voided
+        transformation item (falling back to the variant's assembly cost).
+        Everything is computed in SQL so filtering, sorting and pagination can
+        run in the database.
+        """
+        money = DecimalField(max_digits=15, decimal_places=2)
+
+        latest_layer_cost = (
+            InventoryCostLayer.objects.filter(
+                product=OuterRef("pk"),
+                remaining_quantity__gt=0,
+                is_voided=False,
+            )
+            .order_by("-created_at")
+            .values("unit_cost")[:1]
+        )
+        coupled_variant = Product.objects.filter(
+            base_product=OuterRef("pk"),
+            type_variant=Product.TypeVariant.COUPLED,
+        ).values("pk")[:1]
+        coupled_variant_cost = Product.objects.filter(
+            pk=OuterRef("coupled_variant_id")
+        ).values("assembly_cost")[:1]
+        active_items = TransformationItem.objects.filter(
+            target_product=OuterRef("coupled_variant_id"),
+        ).exclude(status=TransformationItem.Status.VOIDED)
+
+        def _count(items):
+            return Coalesce(
+                Subquery(
+                    items.order_by()
+                    .values("target_product")
+                    .annotate(n=Count("pk"))
+                    .values("n"),
+                    output_field=IntegerField(),
+                ),
+                0,
+            )
+
+        return (
+            self.filter(base_product__isnull=True)
+            .annotate(
+                boxed_qty=Coalesce(F("inventory__quantity"), 0),
+                boxed_unit_cost=Coalesce(
+                    Subquery(latest_layer_cost, output_field=money),
+                    F("inventory__weighted_average_cost"),
+                    Value(Decimal("0.00")),
+                    output_field=money,
+                ),
+                coupled_variant_id=Subquery(coupled_variant),
+            )
+            .annotate(
+                coupled_count=_count(active_items),
+                coupled_available=_count(
+                    active_items.filter(status=TransformationItem.Status.AVAILABLE)
+                ),
+                coupled_unit_cost=Coalesce(
+                    Subquery(
+                        active_items.order_by("-created_at").values(
+                            "unit_cost_at_transformation"
+                        )[:1],
+                        output_field=money,
+                    ),
+                    Subquery(coupled_variant_cost, output_field=money),
+                    Value(Decimal("0.00")),
+                    output_field=money,
+                ),
+            )
+            .annotate(
+                boxed_value=ExpressionWrapper(
+                    F("boxed_qty") * F("boxed_unit_cost"), output_field=money
+                ),
+                coupled_value=ExpressionWrapper(
+                    F("coupled_count") * F("coupled_unit_cost"), output_field=money
+                ),
+                stock_status=Case(
+                    When(boxed_qty=0, then=Value("out")),
+                    When(boxed_qty__lte=2, then=Value("low")),
+                    default=Value("ok"),
+                    output_field=CharField(),
+                ),
+            )
+            .annotate(
+                total_value=ExpressionWrapper(
+                    F("boxed_value") + F("coupled_value"), output_field=money
+                ),
+            )
+        )
+
+    def as_of(self, at):
+        """
+        Annotate each base product with its stock position at *at*.
+
+        Each product starts from its latest ``InventorySnapshot`` taken at or
+        before *at* and adds the ledger rows recorded after that snapshot
+        (live and archived), so the cost grows with the delta rather than the
+        whole ledger. Products without an earlier snapshot replay from the start.
+
+        Annotates ``snapshot_at`` (None when replaying from the start),
+        ``as_of_quantity``, ``as_of_value`` (FIFO value), ``as_of_unit_cost``
+        and ``as_of_coupled_units`` (non-voided coupled units of any status).
+        """
+        money = DecimalField(max_digits=15, decimal_places=2)
+
+        snapshot = InventorySnapshot.objects.filter(
+            inventory__product=OuterRef("pk"), taken_at__lte=at
+        ).order_by("-taken_at")
+
+        def _snapshot(expression, output_field):
+            return Coalesce(
+                Subquery(
+                    snapshot.annotate(figure=expression).values("figure")[:1],
+                    output_field=output_field,
+                ),
+                Value(0),
+                output_field=output_field,
+            )
+
+        # A plain range on created_at, so the (inventory, created_at) index
+        # bounds the scan to the delta on both ends. Rows moved out by
+        # ``archive_inventory_ledger`` are read from the archive table.
+        def _ledger(model):
+            return model.objects.filter(
+                inventory__product=OuterRef("pk"),
+                created_at__gt=Coalesce(
+                    OuterRef("snapshot_at"),
+                    Value(datetime(1970, 1, 1, tzinfo=dt_timezone.utc)),
+                    output_field=DateTimeField(),
+                ),
+                created_at__lte=at,
+            )
+
+        ledgers = [_ledger(InventoryTransaction), _ledger(InventoryTransactionArchive)]
+        transformation_types = [
+            InventoryTransaction.TransactionType.TRANSFORMATION,
+            InventoryTransaction.TransactionType.TRANSFORMATION_REVERSAL,
+        ]
+        # cost_impact is recorded unsigned for most movements; the direction
+        # comes from quantity_change.
+        signed_cost = Case(
+            When(quantity_change__lt=0, then=-Abs("cost_impact")),
+            default=Abs("cost_impact"),
+            output_field=money,
+        )
+
+        def _delta(expression, output_field, **filters):
+            total = Value(0)
+            for ledger in ledgers:
+                total = total + Coalesce(
+                    Subquery(
+                        ledger.filter(**filters)
+                        .order_by()
+                        .values("inventory")
+                        .annotate(total=expression)
+                        .values("total"),
+                        output_field=output_field,
+                    ),
+                    Value(0),
+                    output_field=output_field,
+                )
+            return total
+
+        return (
+            self.filter(base_product__isnull=True)
+            .annotate(snapshot_at=Subquery(snapshot.values("taken_at")[:1]))
+            .annotate(
+                as_of_quantity=_snapshot(F("quantity"), IntegerField())
+                + _delta(Sum("quantity_change"), IntegerField()),
+                as_of_value=_snapshot(F("fifo_value"), money)
+                + _delta(Sum(signed_cost), money),
+                as_of_coupled_units=_snapshot(
+                    F("coupled_available") + F("coupled_reserved") + F("coupled_sold"),
+                    IntegerField(),
+                )
+                - _delta(
+                    Sum("quantity_change"),
+                    IntegerField(),
+                    transaction_type__in=transformation_types,
+                ),
+            )
+            .annotate(
+                as_of_unit_cost=Case(
+                    When(
+                        as_of_quantity__gt=0,
+                        then=ExpressionWrapper(
+                            F("as_of_value") / F("as_of_quantity"), output_field=money
+                        ),
+                    ),
+                    default=Value(Decimal("0.00")),
+                    output_field=money,
+                ),
+            )
+        )
+
+    def for_catalogue(self):
+        """
+        Annotate what the product list renders per row so a page costs a
+        fixed number of queries: ``wac``, ``coupled_available_qty``,
+        ``sale_revenue`` / ``sale_units`` (ACTIVE sales, for
+        ``avg_sale_price``) and ``is_deletable`` (mirrors ``can_delete``).
+        """
+        from customer.models import BoxedSale, CoupledSale, Sale
+
+        money = DecimalField(max_digits=15, decimal_places=2)
+
+        def _total(queryset, group_by, expression, output_field):
+            return Coalesce(
+                Subquery(
+                    queryset.order_by()
+                    .values(group_by)
+                    .annotate(total=expression)
+                    .values("total"),
+                    output_field=output_field,
+                ),
+                Value(0),
+                output_field=output_field,
+            )
+
+        boxed = BoxedSale.objects.filter(
+            product=OuterRef("pk"), sale__status=Sale.Status.ACTIVE
+        )
+        coupled = CoupledSale.objects.filter(
+            transformation_item__source_product=OuterRef("pk"),
+            sale__status=Sale.Status.ACTIVE,
+        )
+        available = TransformationItem.objects.filter(
+            target_product=OuterRef("pk"),
+            status=TransformationItem.Status.AVAILABLE,
+        )
+
+        in_use = Q()
+        for related in self.model._meta.related_objects:
+            if related.one_to_one:
+                continue
+            in_use |= Q(
+                Exists(
+                    related.related_model._base_manager.filter(
+                        **{related.field.name: OuterRef("pk")}
+                    )
+                )
+            )
+
+        return (
+            self.select_related("brand", "inventory")
+            .annotate(
+                wac=Coalesce(
+                    F("inventory__weighted_average_cost"),
+                    Value(Decimal("0.00")),
+                    output_field=money,
+                ),
+                coupled_available_qty=_total(
+                    available, "target_product", Count("pk"), IntegerField()
+                ),
+                sale_revenue=_total(
+                    boxed, "product", Sum(F("price") * F("quantity")), money
+                )
+                + _total(
+                    coupled, "transformation_item__source_product", Sum("price"), money
+                ),
+                sale_units=_total(boxed, "product", Sum("quantity"), IntegerField())
+                + _total(
+                    coupled,
+                    "transformation_item__source_product",
+                    Count("pk"),
+                    IntegerField(),
+                ),
+                is_deletable=ExpressionWrapper(
+                    Q(base_product__isnull=True) & ~in_use, output_field=BooleanField()
+                ),
+            )
+        )
+
 
 class Product(models.Model):
     class Category(models.TextChoices):
@@ -59,6 +348,7 @@ class Product(models.Model):
     sku = models.CharField(max_length=50, unique=True)
     brand = models.ForeignKey(Brand, on_delete=models.PROTECT, related_name="product")
     modelname = models.CharField(max_length=255)
+    search_document = SearchDocumentField(sources=["modelname", "brand.name"])
     category = models.CharField(
         max_length=20, choices=Category, default=Category.EMPTY_OPTION
     )
@@ -94,6 +384,8 @@ class Product(models.Model):
         related_name="updated_%(class)s_set",
     )
 
+    objects = ProductQuerySet.as_manager()
+
     class Meta:
         ordering = ["modelname"]
 
@@ -122,6 +414,8 @@ class Product(models.Model):
 
     @property
     def average_cost_price(self):
+        if hasattr(self, "wac"):
+            return f"{self.wac:,.0f}"
         avg_cost_price = getattr(self.inventory, "weighted_average_cost", 0.00)
         return f"{avg_cost_price:,.0f}"
 
@@ -129,6 +423,11 @@ class Product(models.Model):
     def avg_sale_price(self):
         from customer.models import CoupledSale, Sale
 
+        if hasattr(self, "sale_units"):
+            if self.sale_units > 0:
+                return self.sale_revenue / self.sale_units
+            return Decimal("0.00")
+
         # Get coupled sales
         coupled_sales = CoupledSale.objects.filter(
             transformation_item__source_product=self,  # Use pk (primary key)
@@ -175,11 +474,18 @@ class Product(models.Model):
 
     @property
     def total_coupled_available(self):
+        if hasattr(self, "coupled_available_qty"):
+            return self.coupled_available_qty
         # status 'available' is defined in TransformationItem.Status.AVAILABLE which is 'available'
         return self.transform_to.filter(status="available").count()
 
     @property
     def can_delete(self):
+        if hasattr(self, "is_deletable"):
+            return self.is_deletable
+        # Coupled variants live and die with their base product.
+        if self.base_product_id:
+            return False
         for related in self._meta.related_objects:
             manager = getattr(self, related.get_accessor_name())
             if hasattr(manager, "exists") and manager.exists():
@@ -275,6 +581,13 @@ class InventoryCostLayer(models.Model):
         indexes = [
             models.Index(fields=["product", "created_at"]),
             models.Index(fields=["goods_receipt_item"]),
+            # FIFO depletion only ever reads open layers; exhausted and voided
+            # ones stay out of this index however long a SKU lives.
+            models.Index(
+                fields=["product", "created_at"],
+                condition=Q(remaining_quantity__gt=0, is_voided=False),
+                name="inv_layer_live_idx",
+            ),
         ]
 
     def __str__(self):
@@ -319,11 +632,164 @@ class InventoryTransaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["inventory", "created_at"]),
+        ]
+
+    def __str__(self):
+        return str(self.source)
+
+
+class InventoryTransactionArchive(models.Model):
+    """
+    ``InventoryTransaction`` rows from closed periods, moved here by the
+    ``archive_inventory_ledger`` command. Rows keep their original id and
+    timestamps; ``InventoryLedgerSummary`` carries the per-period totals.
+    """
+
+    inventory_transaction_id = models.UUIDField(primary_key=True, editable=False)
+    transaction_type = models.CharField(
+        max_length=30, choices=InventoryTransaction.TransactionType
+    )
+    inventory = models.ForeignKey(
+        Inventory, on_delete=models.CASCADE, related_name="archived_transactions"
+    )
+    source_content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, related_name="+"
+    )
+    source_object_id = models.UUIDField()
+    source = GenericForeignKey("source_content_type", "source_object_id")
+    quantity_change = models.IntegerField()
+    cost_impact = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()
+    created_by = models.ForeignKey(
+        CustomUser,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="+",
+    )
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["inventory", "created_at"]),
+        ]
 
     def __str__(self):
         return str(self.source)
 
 
+class InventoryCostLayerArchive(models.Model):
+    """Exhausted or voided FIFO layers from closed periods that nothing can restore."""
+
+    cost_layer_id = models.UUIDField(primary_key=True, editable=False)
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="archived_cost_layers"
+    )
+    quantity = models.PositiveIntegerField()
+    remaining_quantity = models.PositiveIntegerField()
+    unit_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    goods_receipt_item = models.ForeignKey(
+        "supply_chain.GoodsReceiptItem",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    is_voided = models.BooleanField(default=False)
+    voided_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["product", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.product.modelname} qty={self.quantity} @ {self.unit_cost}"
+
+
+class InventoryLedgerSummary(models.Model):
+    """
+    Totals of what was archived for one inventory and calendar month, so the
+    archive tables can be reconciled (and dropped to cold storage) period by
+    period. ``value_change`` is signed, unlike ``cost_impact``.
+    """
+
+    summary_id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    inventory = models.ForeignKey(
+        Inventory, on_delete=models.CASCADE, related_name="ledger_summaries"
+    )
+    period = models.DateField(help_text="First day of the month")
+    transaction_count = models.PositiveIntegerField(default=0)
+    quantity_change = models.IntegerField(default=0)
+    value_change = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    layer_count = models.PositiveIntegerField(default=0)
+    layer_quantity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-period"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["inventory", "period"],
+                name="unique_inventory_ledger_period",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.inventory} {self.period:%Y-%m}"
+
+
+class InventorySnapshot(models.Model):
+    """
+    Stock position of one inventory at ``taken_at``, written by the
+    ``snapshot_inventory`` command. ``Product.objects.as_of()`` starts from
+    the nearest snapshot and replays only the ledger rows recorded after it.
+    """
+
+    snapshot_id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    inventory = models.ForeignKey(
+        Inventory, on_delete=models.CASCADE, related_name="snapshots"
+    )
+    snapshot_date = models.DateField()
+    taken_at = models.DateTimeField()
+    quantity = models.PositiveIntegerField()
+    weighted_average_cost = models.DecimalField(max_digits=10, decimal_places=2)
+    fifo_value = models.DecimalField(
+        max_digits=15,
+        decimal_places=2,
+        help_text="Remaining value of the open, non-voided FIFO layers",
+    )
+    coupled_available = models.PositiveIntegerField(default=0)
+    coupled_reserved = models.PositiveIntegerField(default=0)
+    coupled_sold = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-taken_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["inventory", "snapshot_date"],
+                name="unique_inventory_snapshot_date",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["inventory", "taken_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.inventory} @ {self.snapshot_date}"
+
+    @property
+    def coupled_units(self):
+        return self.coupled_available + self.coupled_reserved + self.coupled_sold
+
+
 class Transformation(models.Model):
     class Status(models.TextChoices):
         ACTIVE = "active", "Active"
@@ -378,10 +844,64 @@ class Transformation(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.transformation_number:
-            self.transformation_number = f"TRF-{uuid.uuid4().hex[:8].upper()}"
+            self.transformation_number = next_number("TRF")
         super().save(*args, **kwargs)
 
 
+def serial_key(value):
+    """
+    Lookup key for an engine/chassis number: uppercase alphanumerics only,
+    reversed, so that a suffix search becomes an index-friendly prefix scan.
+    """
+    return "".join(ch for ch in (value or "").upper() if ch.isascii() and ch.isalnum())[::-1]
+
+
+class SerialKeyField(models.CharField):
+    """
+    Read-only CharField holding serial_key() of another field on the model.
+    Filled in pre_save, so both save() and bulk_create() keep it current.
+    """
+
+    def __init__(self, *args, source, **kwargs):
+        self.source = source
+        kwargs.setdefault("max_length", 100)
+        kwargs.setdefault("editable", False)
+        kwargs.setdefault("default", "")
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = serial_key(getattr(model_instance, self.source))
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class TransformationItemQuerySet(models.QuerySet):
+    def search_serial(self, term):
+        """
+        Items whose engine or chassis number ends with *term* (punctuation
+        and case are ignored), answered from the reversed-key indexes.
+        """
+        key = serial_key(term)
+        if not key:
+            return self.none()
+        return self.filter(
+            self._key_prefix("engine_number_key", key)
+            | self._key_prefix("chassis_number_key", key)
+        )
+
+    def _key_prefix(self, field, prefix):
+        # PostgreSQL serves LIKE 'x%' from the varchar_pattern_ops index; other
+        # backends only use a plain index for a range, and keys are [0-9A-Z].
+        if connections[self.db].vendor == "postgresql":
+            return Q(**{f"{field}__startswith": prefix})
+        return Q(**{f"{field}__gte": prefix, f"{field}__lt": prefix + "\uffff"})
+
+
 class TransformationItem(models.Model):
     class Status(models.TextChoices):
         AVAILABLE = "available", "Available"
@@ -416,6 +936,8 @@ class TransformationItem(models.Model):
     chassis_number = models.CharField(
         max_length=100, null=False, blank=False, unique=True
     )
+    engine_number_key = SerialKeyField(source="engine_number")
+    chassis_number_key = SerialKeyField(source="chassis_number")
     allocated_service_fee = models.DecimalField(
         max_digits=10, decimal_places=2, default=0.00
     )
@@ -450,8 +972,22 @@ class TransformationItem(models.Model):
         related_name="updated_%(class)s_set",
     )
 
+    objects = TransformationItemQuerySet.as_manager()
+
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(
+                fields=["engine_number_key"],
+                name="inv_item_engine_key_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+            models.Index(
+                fields=["chassis_number_key"],
+                name="inv_item_chassis_key_idx",
+                opclasses=["varchar_pattern_ops"],
+            ),
+        ]
 
     def __str__(self):
         if self.target_product:
@@ -467,23 +1003,44 @@ class TransformationItem(models.Model):
             raise ValidationError(
                 {"target_product": "Target product must be a coupled variant."}
             )
+
+    def validate_unique(self, exclude=None):
+        super().validate_unique(exclude=exclude)
+        exclude = exclude or set()
         # Engine/chassis numbers must be unique among non-voided items only
         if self.status != self.Status.VOIDED:
-            existing_engine = TransformationItem.objects.filter(
-                engine_number=self.engine_number,
-            ).exclude(status=self.Status.VOIDED).exclude(pk=self.pk)
-            if existing_engine.exists():
+            active = TransformationItem.objects.exclude(status=self.Status.VOIDED).exclude(pk=self.pk)
+            if "engine_number" not in exclude and active.filter(engine_number=self.engine_number).exists():
                 raise ValidationError(
                     {"engine_number": "Engine number already exists on an active item."}
                 )
-            existing_chassis = TransformationItem.objects.filter(
-                chassis_number=self.chassis_number,
-            ).exclude(status=self.Status.VOIDED).exclude(pk=self.pk)
-            if existing_chassis.exists():
+            if "chassis_number" not in exclude and active.filter(chassis_number=self.chassis_number).exists():
                 raise ValidationError(
                     {"chassis_number": "Chassis number already exists on an active item."}
                 )
 
+    @classmethod
+    def taken_serials(cls, engine_numbers, chassis_numbers):
+        """
+        Return the subsets of *engine_numbers* and *chassis_numbers* already
+        used by any item, voided ones included (the columns are unique), with
+        a single IN query.
+        """
+        engine_numbers = {number for number in engine_numbers if number}
+        chassis_numbers = {number for number in chassis_numbers if number}
+        if not engine_numbers and not chassis_numbers:
+            return set(), set()
+        rows = cls.objects.filter(
+            Q(engine_number__in=engine_numbers) | Q(chassis_number__in=chassis_numbers)
+        ).values_list("engine_number", "chassis_number")
+        taken_engines, taken_chassis = set(), set()
+        for engine_number, chassis_number in rows:
+            if engine_number in engine_numbers:
+                taken_engines.add(engine_number)
+            if chassis_number in chassis_numbers:
+                taken_chassis.add(chassis_number)
+        return taken_engines, taken_chassis
+
     def create_reversal(self):
         inventory = Inventory.objects.select_for_update().get(
             pk=self.source_product.inventory.pk
@@ -508,8 +1065,12 @@ class TransformationItem(models.Model):
         self.status = self.Status.VOIDED
         self.save(update_fields=["status"])
 
+    @staticmethod
+    def gen_item_number():
+        return next_number("ITEM")
+
     def save(self, *args, **kwargs):
         if not self.item_number:
-            self.item_number = f"ITEM-{uuid.uuid4().hex[:8].upper()}"
+            self.item_number = self.gen_item_number()
         self.full_clean()
         super().save(*args, **kwargs)
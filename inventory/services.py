@@ -3,7 +3,10 @@ from decimal import Decimal, ROUND_HALF_UP
 from .models import *
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from core.archiving import move_in_batches
+from core.numbering import next_numbers
 from core.utils import audit
+from core.versions import INVENTORY, bump
 
 logger = logging.getLogger(__name__)
 
@@ -20,73 +23,115 @@ def _deplete_fifo_layers(product, quantity):
     Each consumption entry is a dict:
         {"layer": InventoryCostLayer, "quantity": int, "unit_cost": Decimal}
 
-    If no FIFO layers exist (e.g. legacy inventory before FIFO was introduced),
-    falls back to creating a synthetic layer using the current WAC.
+    Thin wrapper around _deplete_fifo_batch() for a single demand.
     Must be called within a transaction that has already locked inventory.
     """
-    from .models import InventoryCostLayer
+    return _deplete_fifo_batch([(product, quantity)])[0]
+
+
+def _deplete_fifo_batch(demands):
+    """
+    Deplete FIFO cost layers for a list of (product, quantity) demands in one pass.
+    Returns a list of (total_cost, consumption_entries) tuples, one per demand,
+    in the same order as *demands*.
+
+    Candidate layers for every product are locked and read with a single query,
+    the allocation is computed in memory and all decrements are written with
+    one bulk_update. Demands for the same product are served in order, so earlier
+    lines consume the oldest layers.
+
+    If the layers cannot cover a product's total demand (e.g. legacy inventory
+    before FIFO was introduced), a synthetic layer at the current WAC is created
+    for the gap. Must be called within a transaction that has already locked inventory.
+    """
+    from .models import Inventory, InventoryCostLayer
 
+    demands = [(product, quantity) for product, quantity in demands]
+    if not demands:
+        return []
+
+    product_ids = {product.pk for product, _ in demands}
+    layers_by_product = {pk: [] for pk in product_ids}
     layers = (
         InventoryCostLayer.objects.filter(
-            product=product,
+            product_id__in=product_ids,
             remaining_quantity__gt=0,
             is_voided=False,
         )
         .order_by("created_at")
         .select_for_update()
     )
+    for layer in layers:
+        layers_by_product[layer.product_id].append(layer)
+
+    requested = {}
+    for product, quantity in demands:
+        requested[product.pk] = requested.get(product.pk, 0) + quantity
 
-    total_available = sum(l.remaining_quantity for l in layers)
+    shortages = {
+        pk: qty - sum(l.remaining_quantity for l in layers_by_product[pk])
+        for pk, qty in requested.items()
+    }
+    shortages = {pk: gap for pk, gap in shortages.items() if gap > 0}
 
-    if total_available < quantity:
+    new_layers = []
+    if shortages:
         # Fallback: no (or insufficient) FIFO layers — use current WAC for the gap
-        inventory = product.inventory
-        wac = inventory.weighted_average_cost
-
-        gap = quantity - total_available
-        # Create a synthetic layer for the uncovered portion (legacy inventory)
-        InventoryCostLayer.objects.create(
-            product=product,
-            quantity=gap,
-            remaining_quantity=gap,
-            unit_cost=wac,
-        )
-        # Re-fetch layers to include the new synthetic one
-        layers = (
-            InventoryCostLayer.objects.filter(
-                product=product,
-                remaining_quantity__gt=0,
-                is_voided=False,
+        wac_by_product = dict(
+            Inventory.objects.filter(product_id__in=shortages).values_list(
+                "product_id", "weighted_average_cost"
             )
-            .order_by("created_at")
-            .select_for_update()
         )
+        for pk, gap in shortages.items():
+            layer = InventoryCostLayer(
+                product_id=pk,
+                quantity=gap,
+                remaining_quantity=gap,
+                unit_cost=wac_by_product.get(pk) or Decimal("0.00"),
+            )
+            # Synthetic layers are the newest, so they are consumed last
+            layers_by_product[pk].append(layer)
+            new_layers.append(layer)
+
+    touched = {}
+    results = []
+    for product, quantity in demands:
+        remaining_to_deplete = quantity
+        total_cost = Decimal("0.00")
+        consumption_entries = []
+
+        for layer in layers_by_product[product.pk]:
+            if remaining_to_deplete <= 0:
+                break
+            if layer.remaining_quantity <= 0:
+                continue
+            take = min(layer.remaining_quantity, remaining_to_deplete)
+            layer.remaining_quantity -= take
+            touched[layer.pk] = layer
+            total_cost += Decimal(str(take)) * layer.unit_cost
+            consumption_entries.append({
+                "layer": layer,
+                "quantity": take,
+                "unit_cost": layer.unit_cost,
+            })
+            remaining_to_deplete -= take
+
+        if remaining_to_deplete > 0:
+            raise BusinessRuleViolation(
+                f"Insufficient stock in FIFO layers for {product.modelname}. "
+                f"Requested: {quantity}, available in layers: {quantity - remaining_to_deplete}."
+            )
+        results.append((total_cost, consumption_entries))
 
-    remaining_to_deplete = quantity
-    total_cost = Decimal("0.00")
-    consumption_entries = []
-
-    for layer in layers:
-        if remaining_to_deplete <= 0:
-            break
-        take = min(layer.remaining_quantity, remaining_to_deplete)
-        layer.remaining_quantity -= take
-        layer.save(update_fields=["remaining_quantity"])
-        total_cost += Decimal(str(take)) * layer.unit_cost
-        consumption_entries.append({
-            "layer": layer,
-            "quantity": take,
-            "unit_cost": layer.unit_cost,
-        })
-        remaining_to_deplete -= take
-
-    if remaining_to_deplete > 0:
-        raise BusinessRuleViolation(
-            f"Insufficient stock in FIFO layers for {product.modelname}. "
-            f"Requested: {quantity}, available in layers: {quantity - remaining_to_deplete}."
-        )
+    if new_layers:
+        InventoryCostLayer.objects.bulk_create(new_layers)
+    new_layer_ids = {layer.pk for layer in new_layers}
+    existing = [layer for pk, layer in touched.items() if pk not in new_layer_ids]
+    if existing:
+        InventoryCostLayer.objects.bulk_update(existing, ["remaining_quantity"])
+    bump(INVENTORY)
 
-    return total_cost, consumption_entries
+    return results
 
 
 def _restore_fifo_layer(product, quantity, unit_cost):
@@ -106,23 +151,49 @@ def _restore_fifo_layer(product, quantity, unit_cost):
 
 def _recalculate_assembly_cost(target_product):
     """Recalculate assembly cost for a coupled product from its non-voided items."""
-    from django.db.models import Sum
+    _recalculate_assembly_costs([target_product])
+
 
-    items = target_product.transform_to.exclude(status=TransformationItem.Status.VOIDED)
-    count = items.count()
-    if count > 0:
-        total = items.aggregate(total=Sum("unit_cost_at_transformation"))["total"] or 0
-        target_product.assembly_cost = Decimal(str(total)) / count
-    else:
-        target_product.assembly_cost = Decimal("0.00")
-    target_product.save(update_fields=["assembly_cost"])
+def _recalculate_assembly_costs(target_products):
+    """
+    Recalculate assembly cost for several coupled products with one grouped
+    aggregate and one bulk_update.
+    """
+    from django.db.models import Count, Sum
+
+    target_products = list(target_products)
+    if not target_products:
+        return
+    totals = {
+        row["target_product"]: row
+        for row in TransformationItem.objects.filter(target_product__in=target_products)
+        .exclude(status=TransformationItem.Status.VOIDED)
+        .values("target_product")
+        .annotate(count=Count("pk"), total=Sum("unit_cost_at_transformation"))
+        .order_by()
+    }
+    for target_product in target_products:
+        row = totals.get(target_product.pk)
+        if row and row["count"] > 0:
+            target_product.assembly_cost = Decimal(str(row["total"] or 0)) / row["count"]
+        else:
+            target_product.assembly_cost = Decimal("0.00")
+    Product.objects.bulk_update(target_products, ["assembly_cost"])
+    bump(INVENTORY)
 
 
 def process_transformation(form, formset, request):
     """
     Process a transformation: save items, decrement inventory, create transactions.
+
+    The whole batch is handled set-wise: coupled variants are resolved with
+    one query, each source Inventory is locked once (in pk order) and
+    decremented by its total demand, FIFO layers are depleted in one pass,
+    engine/chassis numbers are checked with one IN query, and items and
+    inventory transactions are written with bulk_create.
     """
-    from inventory.utils import create_inventory_transaction
+    from django.utils import timezone
+    from inventory.utils import build_inventory_transaction
 
     with transaction.atomic():
         transformation = form.save(commit=False)
@@ -141,58 +212,83 @@ def process_transformation(form, formset, request):
         else:
             service_fee_per_item = Decimal("0.00")
 
-        # Track which target products need assembly_cost recalculation
-        target_products = set()
+        demand = {}
+        for item in items:
+            demand[item.source_product_id] = demand.get(item.source_product_id, 0) + 1
 
+        target_by_source = {
+            product.base_product_id: product
+            for product in Product.objects.filter(
+                base_product_id__in=demand,
+                type_variant=Product.TypeVariant.COUPLED,
+            )
+        }
         for item in items:
             item.transformation = transformation
-            source_product = item.source_product
-
-            try:
-                target_product = Product.objects.get(
-                    base_product=source_product,
-                    type_variant=Product.TypeVariant.COUPLED,
-                )
-                item.target_product = target_product
-            except Product.DoesNotExist:
+            item.target_product = target_by_source.get(item.source_product_id)
+            if item.target_product is None:
                 raise ValidationError(
                     "Coupled variant not found for this Boxed product"
                 )
             item.allocated_service_fee = service_fee_per_item
 
-
-            # Decrement inventory first
-            inventory = Inventory.objects.select_for_update().get(
-                product=item.source_product
-            )
-            if inventory.quantity < 1:
+        # Decrement inventory first, once per source product
+        inventories = {
+            inventory.product_id: inventory
+            for inventory in Inventory.objects.select_for_update()
+            .filter(product_id__in=demand)
+            .order_by("pk")
+        }
+        now = timezone.now()
+        for product_id, quantity in demand.items():
+            inventory = inventories.get(product_id)
+            if inventory is None or inventory.quantity < quantity:
                 raise BusinessRuleViolation("Insufficient Stock")
+            inventory.quantity -= quantity
+            inventory.updated_at = now
+        Inventory.objects.bulk_update(inventories.values(), ["quantity", "updated_at"])
+        bump(INVENTORY)
+
+        taken_engines, taken_chassis = TransformationItem.taken_serials(
+            (item.engine_number for item in items),
+            (item.chassis_number for item in items),
+        )
+        if taken_engines or taken_chassis:
+            raise BusinessRuleViolation(
+                "Already registered: " + ", ".join(sorted(taken_engines | taken_chassis))
+            )
 
-            inventory.quantity -= 1
-            inventory.save(update_fields=["quantity", "updated_at"])
+        # FIFO depletion for every source unit in one pass
+        depletions = _deplete_fifo_batch([(item.source_product, 1) for item in items])
 
-            # FIFO depletion for the source product
-            fifo_cost, consumptions = _deplete_fifo_layers(item.source_product, 1)
+        unnumbered = [item for item in items if not item.item_number]
+        for item, number in zip(unnumbered, next_numbers("ITEM", len(unnumbered))):
+            item.item_number = number
+
+        transactions = []
+        for item, (fifo_cost, consumptions) in zip(items, depletions):
             item.unit_cost_at_transformation = fifo_cost + service_fee_per_item
-            
+
             if consumptions:
                 item.consumed_layer = consumptions[0]["layer"]
             item.created_by = request.user
             item.updated_by = request.user
-            item.save()
-            target_products.add(target_product)
-
-            create_inventory_transaction(
-                inventory=inventory,
-                source=item,
-                transaction_type=InventoryTransaction.TransactionType.TRANSFORMATION,
-                quantity_change=-1,
-                cost_impact=fifo_cost,
+
+            transactions.append(
+                build_inventory_transaction(
+                    inventory=inventories[item.source_product_id],
+                    source=item,
+                    transaction_type=InventoryTransaction.TransactionType.TRANSFORMATION,
+                    quantity_change=-1,
+                    cost_impact=fifo_cost,
+                )
             )
 
+        TransformationItem.objects.bulk_create(items)
+        InventoryTransaction.objects.bulk_create(transactions)
+
         # Recalculate assembly cost for each affected coupled product
-        for tp in target_products:
-            _recalculate_assembly_cost(tp)
+        _recalculate_assembly_costs({item.target_product for item in items})
     return transformation
 
 
@@ -247,3 +343,233 @@ def void_transformation(transformation_id, user, request=None):
 def void_and_correct(transformation_id):
     """Legacy wrapper — kept for backward compatibility."""
     return void_transformation(transformation_id, user=None)
+
+
+def capture_inventory_snapshot():
+    """
+    Write one ``InventorySnapshot`` per inventory for the current moment,
+    replacing any snapshot already taken today.
+
+    Inventory rows are locked first so no stock movement can commit with a
+    ``created_at`` before ``taken_at`` once the snapshot is read; ``as_of``
+    relies on that to replay exactly the rows recorded after it.
+    """
+    from django.utils import timezone
+
+    with transaction.atomic():
+        inventories = list(
+            Inventory.objects.select_for_update()
+            .filter(product__base_product__isnull=True)
+            .order_by("pk")
+            .values_list("pk", "product_id", "quantity", "weighted_average_cost")
+        )
+        taken_at = timezone.now()
+        snapshot_date = timezone.localdate(taken_at)
+
+        fifo_values = dict(
+            InventoryCostLayer.objects.filter(is_voided=False, remaining_quantity__gt=0)
+            .order_by()
+            .values("product")
+            .annotate(value=Sum(F("remaining_quantity") * F("unit_cost")))
+            .values_list("product", "value")
+        )
+        coupled = {}
+        for product_id, status, count in (
+            TransformationItem.objects.exclude(status=TransformationItem.Status.VOIDED)
+            .order_by()
+            .values("target_product__base_product", "status")
+            .annotate(n=Count("pk"))
+            .values_list("target_product__base_product", "status", "n")
+        ):
+            coupled[product_id, status] = count
+
+        snapshots = [
+            InventorySnapshot(
+                inventory_id=inventory_id,
+                snapshot_date=snapshot_date,
+                taken_at=taken_at,
+                quantity=quantity,
+                weighted_average_cost=wac,
+                fifo_value=fifo_values.get(product_id) or Decimal("0.00"),
+                coupled_available=coupled.get((product_id, TransformationItem.Status.AVAILABLE), 0),
+                coupled_reserved=coupled.get((product_id, TransformationItem.Status.RESERVED), 0),
+                coupled_sold=coupled.get((product_id, TransformationItem.Status.SOLD), 0),
+            )
+            for inventory_id, product_id, quantity, wac in inventories
+        ]
+        InventorySnapshot.objects.filter(snapshot_date=snapshot_date).delete()
+        InventorySnapshot.objects.bulk_create(snapshots)
+    return snapshots
+
+
+def _ledger_period(moment):
+    from django.utils import timezone
+
+    return timezone.localtime(moment).date().replace(day=1)
+
+
+def _add_to_summaries(summaries, inventory_id, period, **totals):
+    summary = summaries.get((inventory_id, period))
+    if summary is None:
+        summary = summaries[inventory_id, period] = InventoryLedgerSummary(
+            inventory_id=inventory_id, period=period
+        )
+    for field, amount in totals.items():
+        setattr(summary, field, getattr(summary, field) + amount)
+
+
+def _save_summaries(summaries):
+    """Add freshly archived totals onto the stored summary rows."""
+    from django.utils import timezone
+
+    if not summaries:
+        return
+    existing = {
+        (s.inventory_id, s.period): s
+        for s in InventoryLedgerSummary.objects.select_for_update().filter(
+            inventory_id__in={inventory_id for inventory_id, _ in summaries},
+            period__in={period for _, period in summaries},
+        )
+    }
+    fields = [
+        "transaction_count",
+        "quantity_change",
+        "value_change",
+        "layer_count",
+        "layer_quantity",
+    ]
+    new, changed = [], []
+    for key, totals in summaries.items():
+        stored = existing.get(key)
+        if stored is None:
+            new.append(totals)
+            continue
+        for field in fields:
+            setattr(stored, field, getattr(stored, field) + getattr(totals, field))
+        stored.updated_at = timezone.now()
+        changed.append(stored)
+    InventoryLedgerSummary.objects.bulk_create(new)
+    InventoryLedgerSummary.objects.bulk_update(changed, [*fields, "updated_at"])
+
+
+def archivable_cost_layers(before):
+    """
+    Exhausted or voided layers created before *before* that no open document
+    can hand stock back to: nothing references them from a boxed sale (those
+    rows PROTECT the layer), and no voidable transformation item consumed them.
+    Transformation items that are already sold or voided fall back to a fresh
+    layer if they are ever reversed.
+    """
+    from customer.models import BoxedSaleLayerConsumption
+
+    return (
+        InventoryCostLayer.objects.filter(
+            created_at__lt=before, product__inventory__isnull=False
+        )
+        .filter(Q(remaining_quantity=0) | Q(is_voided=True))
+        .exclude(
+            Exists(BoxedSaleLayerConsumption.objects.filter(cost_layer=OuterRef("pk")))
+        )
+        .exclude(
+            Exists(
+                TransformationItem.objects.filter(
+                    consumed_layer=OuterRef("pk"),
+                    status__in=[
+                        TransformationItem.Status.AVAILABLE,
+                        TransformationItem.Status.RESERVED,
+                    ],
+                )
+            )
+        )
+    )
+
+
+def _archive_transactions(batch):
+    summaries = {}
+    for txn in batch:
+        value = abs(txn.cost_impact)
+        _add_to_summaries(
+            summaries,
+            txn.inventory_id,
+            _ledger_period(txn.created_at),
+            transaction_count=1,
+            quantity_change=txn.quantity_change,
+            value_change=-value if txn.quantity_change < 0 else value,
+        )
+    InventoryTransactionArchive.objects.bulk_create(
+        [
+            InventoryTransactionArchive(
+                inventory_transaction_id=txn.pk,
+                transaction_type=txn.transaction_type,
+                inventory_id=txn.inventory_id,
+                source_content_type_id=txn.source_content_type_id,
+                source_object_id=txn.source_object_id,
+                quantity_change=txn.quantity_change,
+                cost_impact=txn.cost_impact,
+                created_at=txn.created_at,
+                created_by_id=txn.created_by_id,
+            )
+            for txn in batch
+        ]
+    )
+    InventoryTransaction.objects.filter(pk__in=[txn.pk for txn in batch]).delete()
+    _save_summaries(summaries)
+    # Product pages list the live ledger
+    bump(INVENTORY)
+
+
+def _archive_cost_layers(batch):
+    summaries = {}
+    for layer in batch:
+        _add_to_summaries(
+            summaries,
+            layer.product.inventory.pk,
+            _ledger_period(layer.created_at),
+            layer_count=1,
+            layer_quantity=layer.quantity,
+        )
+    InventoryCostLayerArchive.objects.bulk_create(
+        [
+            InventoryCostLayerArchive(
+                cost_layer_id=layer.pk,
+                product_id=layer.product_id,
+                quantity=layer.quantity,
+                remaining_quantity=layer.remaining_quantity,
+                unit_cost=layer.unit_cost,
+                goods_receipt_item_id=layer.goods_receipt_item_id,
+                is_voided=layer.is_voided,
+                voided_at=layer.voided_at,
+                created_at=layer.created_at,
+            )
+            for layer in batch
+        ]
+    )
+    # Sold or voided transformation items drop their pointer (SET_NULL).
+    InventoryCostLayer.objects.filter(pk__in=[layer.pk for layer in batch]).delete()
+    _save_summaries(summaries)
+
+
+def archive_inventory_ledger(before, batch_size=5000):
+    """
+    Move ``InventoryTransaction`` rows and archivable cost layers created
+    before *before* into the archive tables, adding their totals to one
+    ``InventoryLedgerSummary`` per inventory and month.
+
+    Each batch is its own transaction, so an interrupted run leaves the
+    tables and summaries consistent and can simply be started again.
+    Returns ``(transactions_archived, layers_archived)``.
+    """
+    moved_transactions = move_in_batches(
+        InventoryTransaction.objects.filter(created_at__lt=before).order_by("created_at", "pk"),
+        batch_size,
+        _archive_transactions,
+    )
+    moved_layers = move_in_batches(
+        archivable_cost_layers(before)
+        .select_related("product__inventory")
+        .select_for_update(of=("self",))
+        .order_by("created_at", "pk"),
+        batch_size,
+        _archive_cost_layers,
+    )
+    return moved_transactions, moved_layers
@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from account.models import CustomUser
+from customer.models import BoxedSale, Customer, Sale
+from customer.services import create_sale
+from inventory.models import (
+    Brand,
+    InventoryCostLayer,
+    InventoryCostLayerArchive,
+    InventoryLedgerSummary,
+    InventoryTransaction,
+    InventoryTransactionArchive,
+    Product,
+    Transformation,
+    TransformationItem,
+)
+from inventory.services import archive_inventory_ledger
+from inventory.utils import create_inventory_transaction
+
+Type = InventoryTransaction.TransactionType
+
+
+def _at(day, hour=12):
+    return timezone.make_aware(datetime(2025, 1, 1, hour)) + timedelta(days=day - 1)
+
+
+class InventoryArchiveTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="testuser", password="password")
+        self.brand = Brand.objects.create(name="Archive Brand")
+        self.bike = Product.objects.create(
+            brand=self.brand, modelname="Bike", category=Product.Category.MOTORCYCLE
+        )
+        self.coupled = self.bike.variants.get(type_variant=Product.TypeVariant.COUPLED)
+        self.inventory = self.bike.inventory
+
+        # Jan: +10, -3; Feb: two transformations; Apr: +5
+        self._move(10, Type.RECEIPT, 10, "1000.00")
+        self._move(20, Type.SALE, -3, "300.00")
+        self._move(36, Type.TRANSFORMATION, -1, "100.00")
+        self._move(36, Type.TRANSFORMATION, -1, "100.00")
+        self._move(100, Type.RECEIPT, 5, "600.00")
+
+        self.transformation = Transformation.objects.create(service_fee=Decimal("0.00"))
+        self.spent = self._layer(5, remaining=0)
+        self.voided = self._layer(5, remaining=5, is_voided=True)
+        self.open = self._layer(5, remaining=2)
+        self.recent = self._layer(100, remaining=0)
+        self.sold_item = self._item(self._layer(5, remaining=0), TransformationItem.Status.SOLD)
+        self.available_item = self._item(
+            self._layer(5, remaining=0), TransformationItem.Status.AVAILABLE
+        )
+        self.sold_layer = self._layer(5, remaining=1)
+        self._sell_one()
+
+    def _move(self, day, transaction_type, quantity, cost):
+        txn = create_inventory_transaction(
+            inventory=self.inventory,
+            source=self.bike,
+            transaction_type=transaction_type,
+            quantity_change=quantity,
+            cost_impact=Decimal(cost),
+        )
+        InventoryTransaction.objects.filter(pk=txn.pk).update(created_at=_at(day))
+
+    def _layer(self, day, remaining, is_voided=False):
+        layer = InventoryCostLayer.objects.create(
+            product=self.bike,
+            quantity=5,
+            remaining_quantity=remaining,
+            unit_cost=Decimal("100.00"),
+            is_voided=is_voided,
+        )
+        InventoryCostLayer.objects.filter(pk=layer.pk).update(created_at=_at(day))
+        return layer
+
+    def _item(self, layer, status):
+        return TransformationItem.objects.create(
+            transformation=self.transformation,
+            source_product=self.bike,
+            target_product=self.coupled,
+            engine_number=f"ENG-{status}",
+            chassis_number=f"CHA-{status}",
+            consumed_layer=layer,
+            status=status,
+        )
+
+    def _sell_one(self):
+        """Consume sold_layer through a real boxed sale, leaving a PROTECT reference."""
+        self.open.remaining_quantity = 0
+        self.open.save(update_fields=["remaining_quantity"])
+        inventory = self.inventory
+        inventory.quantity = 1
+        inventory.save()
+        customer = Customer.objects.create(
+            full_name="Archive Customer", phone="08012345678", created_by=self.user
+        )
+        sale = Sale(customer=customer, payment_method=Sale.PaymentMethod.CASH, created_by=self.user)
+        item = BoxedSale(
+            sale=sale, product=self.bike, quantity=1, price=Decimal("150.00"), created_by=self.user
+        )
+        create_sale(sale=sale, boxed_items=[item], coupled_items=[], user=self.user)
+        self.open.remaining_quantity = 2
+        self.open.save(update_fields=["remaining_quantity"])
+
+    def _positions(self):
+        return [
+            tuple(
+                Product.objects.as_of(_at(day, hour=23))
+                .filter(pk=self.bike.pk)
+                .values_list("as_of_quantity", "as_of_value", "as_of_coupled_units")
+                .get()
+            )
+            for day in (15, 40, 60, 120)
+        ]
+
+    def test_archive_moves_closed_periods_and_keeps_totals(self):
+        positions = self._positions()
+
+        moved = archive_inventory_ledger(_at(60, hour=0), batch_size=3)
+        self.assertEqual(moved, (4, 3))
+
+        self.assertEqual(InventoryTransactionArchive.objects.count(), 4)
+        self.assertFalse(InventoryTransaction.objects.filter(created_at__lt=_at(60)).exists())
+        self.assertEqual(self._positions(), positions)
+
+        self.assertCountEqual(
+            InventoryCostLayer.objects.values_list("pk", flat=True),
+            [
+                self.open.pk,
+                self.recent.pk,
+                self.available_item.consumed_layer_id,
+                self.sold_layer.pk,
+            ],
+        )
+        self.assertEqual(InventoryCostLayerArchive.objects.count(), 3)
+        self.sold_item.refresh_from_db()
+        self.assertIsNone(self.sold_item.consumed_layer)
+
+        jan = InventoryLedgerSummary.objects.get(period=_at(1).date())
+        self.assertEqual(
+            (jan.transaction_count, jan.quantity_change, jan.value_change, jan.layer_count),
+            (2, 7, Decimal("700.00"), 3),
+        )
+        feb = InventoryLedgerSummary.objects.get(period=_at(32).date())
+        self.assertEqual((feb.transaction_count, feb.quantity_change), (2, -2))
+
+        # Summaries reconcile with the archive table.
+        totals = InventoryTransactionArchive.objects.aggregate(qty=Sum("quantity_change"))
+        summed = InventoryLedgerSummary.objects.aggregate(qty=Sum("quantity_change"))
+        self.assertEqual(totals["qty"], summed["qty"])
+
+        # Later runs add to the same summary rows rather than duplicating them.
+        self._move(25, Type.SALE, -1, "100.00")
+        self.assertEqual(archive_inventory_ledger(_at(60, hour=0)), (1, 0))
+        jan.refresh_from_db()
+        self.assertEqual((jan.transaction_count, jan.quantity_change), (3, 6))
+        self.assertEqual(InventoryLedgerSummary.objects.count(), 2)
+
+    def test_command_dry_run_and_archive(self):
+        out = StringIO()
+        call_command("archive_inventory_ledger", "--before", "2025-03-01", "--dry-run", stdout=out)
+        self.assertIn("Would archive 4 transaction(s) and 3 cost layer(s)", out.getvalue())
+        self.assertEqual(InventoryTransactionArchive.objects.count(), 0)
+
+        out = StringIO()
+        call_command("archive_inventory_ledger", "--before", "2025-03-01", stdout=out)
+        self.assertIn("Archived 4 transaction(s) and 3 cost layer(s)", out.getvalue())
@@ -0,0 +1,184 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import CustomUser
+from inventory.models import (
+    Brand,
+    InventoryCostLayer,
+    InventorySnapshot,
+    InventoryTransaction,
+    Product,
+    Transformation,
+    TransformationItem,
+)
+from inventory.services import capture_inventory_snapshot
+from inventory.utils import create_inventory_transaction
+
+Type = InventoryTransaction.TransactionType
+
+
+def _at(day, hour=12):
+    return timezone.make_aware(datetime(2026, 1, 1, hour)) + timedelta(days=day - 1)
+
+
+class InventorySnapshotTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="testuser", password="password")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.brand = Brand.objects.create(name="Snapshot Brand")
+        self.bike = Product.objects.create(
+            brand=self.brand, modelname="Bike", category=Product.Category.MOTORCYCLE
+        )
+        self.coupled = self.bike.variants.get(type_variant=Product.TypeVariant.COUPLED)
+        self.inventory = self.bike.inventory
+
+        # Jan 10: +10 @ 100, Jan 20: sell 3, Feb 5: transform 2, Feb 20: +5 @ 120
+        self._move(10, Type.RECEIPT, 10, "1000.00")
+        self._move(20, Type.SALE, -3, "300.00")
+        self._move(36, Type.TRANSFORMATION, -1, "100.00")
+        self._move(36, Type.TRANSFORMATION, -1, "100.00")
+        self._move(51, Type.RECEIPT, 5, "600.00")
+
+    def _move(self, day, transaction_type, quantity, cost):
+        txn = create_inventory_transaction(
+            inventory=self.inventory,
+            source=self.bike,
+            transaction_type=transaction_type,
+            quantity_change=quantity,
+            cost_impact=Decimal(cost),
+        )
+        InventoryTransaction.objects.filter(pk=txn.pk).update(created_at=_at(day))
+
+    def _position(self, day):
+        return Product.objects.as_of(_at(day, hour=23)).get(pk=self.bike.pk)
+
+    def test_as_of_replays_full_ledger_without_snapshots(self):
+        position = self._position(25)
+        self.assertIsNone(position.snapshot_at)
+        self.assertEqual(position.as_of_quantity, 7)
+        self.assertEqual(position.as_of_value, Decimal("700.00"))
+        self.assertEqual(position.as_of_unit_cost, Decimal("100.00"))
+        self.assertEqual(position.as_of_coupled_units, 0)
+
+        position = self._position(60)
+        self.assertEqual(position.as_of_quantity, 10)
+        self.assertEqual(position.as_of_value, Decimal("1100.00"))
+        self.assertEqual(position.as_of_coupled_units, 2)
+
+        self.assertEqual(self._position(1).as_of_quantity, 0)
+
+    def test_as_of_starts_from_nearest_snapshot(self):
+        # Deliberately off from the ledger so the test can tell what was read.
+        InventorySnapshot.objects.create(
+            inventory=self.inventory,
+            snapshot_date=_at(31).date(),
+            taken_at=_at(31, hour=23),
+            quantity=50,
+            weighted_average_cost=Decimal("90.00"),
+            fifo_value=Decimal("4500.00"),
+            coupled_available=3,
+            coupled_sold=1,
+        )
+
+        position = self._position(40)
+        self.assertEqual(position.snapshot_at, _at(31, hour=23))
+        self.assertEqual(position.as_of_quantity, 48)
+        self.assertEqual(position.as_of_value, Decimal("4300.00"))
+        self.assertEqual(position.as_of_coupled_units, 6)
+
+        self.assertEqual(self._position(31).as_of_quantity, 50)
+        # Earlier dates ignore the later snapshot.
+        self.assertEqual(self._position(25).as_of_quantity, 7)
+
+    def test_capture_records_live_position(self):
+        inventory = self.inventory
+        inventory.quantity = 8
+        inventory.weighted_average_cost = Decimal("110.00")
+        inventory.save()
+        InventoryCostLayer.objects.create(
+            product=self.bike, quantity=10, remaining_quantity=3, unit_cost=Decimal("100.00")
+        )
+        InventoryCostLayer.objects.create(
+            product=self.bike, quantity=5, remaining_quantity=5, unit_cost=Decimal("120.00")
+        )
+        transformation = Transformation.objects.create(service_fee=Decimal("0.00"))
+        for i, status in enumerate(
+            [
+                TransformationItem.Status.AVAILABLE,
+                TransformationItem.Status.AVAILABLE,
+                TransformationItem.Status.SOLD,
+                TransformationItem.Status.VOIDED,
+            ]
+        ):
+            TransformationItem.objects.create(
+                transformation=transformation,
+                source_product=self.bike,
+                target_product=self.coupled,
+                engine_number=f"ENG-{i}",
+                chassis_number=f"CHA-{i}",
+                status=status,
+            )
+
+        [snapshot] = capture_inventory_snapshot()
+        self.assertEqual(snapshot.inventory, inventory)
+        self.assertEqual(snapshot.snapshot_date, timezone.localdate())
+        self.assertEqual(snapshot.quantity, 8)
+        self.assertEqual(snapshot.weighted_average_cost, Decimal("110.00"))
+        self.assertEqual(snapshot.fifo_value, Decimal("900.00"))
+        self.assertEqual(
+            (snapshot.coupled_available, snapshot.coupled_reserved, snapshot.coupled_sold),
+            (2, 0, 1),
+        )
+
+        # A second run the same day replaces the first.
+        capture_inventory_snapshot()
+        self.assertEqual(InventorySnapshot.objects.count(), 1)
+
+        position = Product.objects.as_of(timezone.now()).get(pk=self.bike.pk)
+        self.assertEqual(position.as_of_quantity, 8)
+        self.assertEqual(position.as_of_coupled_units, 3)
+
+    def test_command_prunes_old_daily_snapshots(self):
+        today = timezone.localdate()
+        for day in [today.replace(day=1) - timedelta(days=n) for n in range(1, 70)]:
+            InventorySnapshot.objects.create(
+                inventory=self.inventory,
+                snapshot_date=day,
+                taken_at=timezone.now() - timedelta(days=(today - day).days),
+                quantity=0,
+                weighted_average_cost=Decimal("0.00"),
+                fifo_value=Decimal("0.00"),
+            )
+
+        out = StringIO()
+        call_command("snapshot_inventory", "--keep-daily", "0", stdout=out)
+        self.assertIn("Recorded 1 inventory snapshot", out.getvalue())
+
+        kept = list(
+            InventorySnapshot.objects.exclude(snapshot_date=today)
+            .order_by("snapshot_date")
+            .values_list("snapshot_date", flat=True)
+        )
+        self.assertTrue(kept)
+        for day in kept:
+            self.assertEqual((day + timedelta(days=1)).day, 1)
+
+    def test_history_tab_as_of(self):
+        url = reverse("product_detail", args=[self.bike.pk])
+        response = self.client.get(url, {"tab": "history", "as_of": "2026-01-25"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["as_of_position"].as_of_quantity, 7)
+        history = response.context["stock_history"]
+        self.assertEqual([txn.balance for txn in history], [7, 10])
+
+        response = self.client.get(url, {"tab": "history"})
+        self.assertIsNone(response.context["as_of_position"])
+        self.assertEqual(len(response.context["stock_history"]), 5)
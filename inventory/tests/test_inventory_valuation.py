@@ -0,0 +1,118 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from account.models import CustomUser
+from inventory.models import (
+    Brand,
+    InventoryCostLayer,
+    Product,
+    Transformation,
+    TransformationItem,
+)
+
+
+class InventoryValuationTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="testuser", password="password")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.brand = Brand.objects.create(name="Valuation Brand")
+        # Motorcycles get a coupled variant from the post_save signal
+        self.bike = Product.objects.create(
+            brand=self.brand,
+            modelname="Bike",
+            category=Product.Category.MOTORCYCLE,
+        )
+        self.coupled = self.bike.variants.get(type_variant=Product.TypeVariant.COUPLED)
+        inventory = self.bike.inventory
+        inventory.quantity = 10
+        inventory.weighted_average_cost = Decimal("100.00")
+        inventory.save()
+
+        self.part = Product.objects.create(
+            brand=self.brand,
+            modelname="Part",
+            category=Product.Category.SPARE_PART,
+        )
+        inventory = self.part.inventory
+        inventory.quantity = 1
+        inventory.weighted_average_cost = Decimal("5.00")
+        inventory.save()
+
+        transformation = Transformation.objects.create(service_fee=Decimal("0.00"))
+        for i, status in enumerate(
+            [
+                TransformationItem.Status.AVAILABLE,
+                TransformationItem.Status.SOLD,
+                TransformationItem.Status.VOIDED,
+            ]
+        ):
+            TransformationItem.objects.create(
+                transformation=transformation,
+                source_product=self.bike,
+                target_product=self.coupled,
+                engine_number=f"ENG-{i}",
+                chassis_number=f"CHA-{i}",
+                unit_cost_at_transformation=Decimal("150.00"),
+                status=status,
+            )
+
+    def test_boxed_cost_falls_back_to_wac(self):
+        bike = Product.objects.with_valuation().get(pk=self.bike.pk)
+        self.assertEqual(bike.boxed_qty, 10)
+        self.assertEqual(bike.boxed_unit_cost, Decimal("100.00"))
+
+    def test_boxed_cost_uses_latest_open_layer(self):
+        InventoryCostLayer.objects.create(
+            product=self.bike, quantity=5, remaining_quantity=5, unit_cost=Decimal("120.00")
+        )
+        bike = Product.objects.with_valuation().get(pk=self.bike.pk)
+        self.assertEqual(bike.boxed_unit_cost, Decimal("120.00"))
+
+    def test_coupled_counts_exclude_voided_items(self):
+        bike = Product.objects.with_valuation().get(pk=self.bike.pk)
+        self.assertEqual(bike.coupled_variant_id, self.coupled.pk)
+        self.assertEqual(bike.coupled_count, 2)
+        self.assertEqual(bike.coupled_available, 1)
+        self.assertEqual(bike.coupled_unit_cost, Decimal("150.00"))
+        # 10 * 100 boxed + 2 * 150 coupled
+        self.assertEqual(bike.total_value, Decimal("1300.00"))
+
+    def test_only_base_products_are_valued(self):
+        pks = set(Product.objects.with_valuation().values_list("pk", flat=True))
+        self.assertEqual(pks, {self.bike.pk, self.part.pk})
+
+    def test_stock_filter_and_sort_run_in_database(self):
+        response = self.client.get(
+            reverse("inventories"), {"stock": "low_stock", "sort": "total_value"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.pk for p in response.context["products"]], [self.part.pk])
+        self.assertEqual(response.context["total_inventory_value"], Decimal("1305.00"))
+
+    def test_query_count_does_not_grow_with_items(self):
+        url = reverse("inventories")
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+
+        transformation = Transformation.objects.create(service_fee=Decimal("0.00"))
+        for i in range(3, 13):
+            TransformationItem.objects.create(
+                transformation=transformation,
+                source_product=self.bike,
+                target_product=self.coupled,
+                engine_number=f"ENG-{i}",
+                chassis_number=f"CHA-{i}",
+            )
+        Product.objects.create(
+            brand=self.brand, modelname="Other Bike", category=Product.Category.MOTORCYCLE
+        )
+
+        with CaptureQueriesContext(connection) as after:
+            self.client.get(url)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
@@ -0,0 +1,100 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from account.models import CustomUser
+from customer.models import BoxedSale, Customer, Sale
+from customer.services import create_sale
+from inventory.models import Brand, Product, Transformation, TransformationItem
+
+
+class ProductCatalogueTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="testuser", password="password")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.brand = Brand.objects.create(name="Catalogue Brand")
+        self.bike = Product.objects.create(
+            brand=self.brand, modelname="Bike", category=Product.Category.MOTORCYCLE
+        )
+        self.coupled = self.bike.variants.get(type_variant=Product.TypeVariant.COUPLED)
+        inventory = self.bike.inventory
+        inventory.quantity = 10
+        inventory.weighted_average_cost = Decimal("100.00")
+        inventory.save()
+
+        self.part = Product.objects.create(
+            brand=self.brand, modelname="Part", category=Product.Category.SPARE_PART
+        )
+
+        transformation = Transformation.objects.create(service_fee=Decimal("0.00"))
+        for i, status in enumerate(
+            [TransformationItem.Status.AVAILABLE, TransformationItem.Status.SOLD]
+        ):
+            TransformationItem.objects.create(
+                transformation=transformation,
+                source_product=self.bike,
+                target_product=self.coupled,
+                engine_number=f"ENG-{i}",
+                chassis_number=f"CHA-{i}",
+                status=status,
+            )
+
+        self.customer = Customer.objects.create(
+            full_name="Catalogue Customer", phone="08012345678", created_by=self.user
+        )
+        for quantity, price in [(2, "150.00"), (1, "180.00")]:
+            self._sell(quantity, Decimal(price))
+
+    def _sell(self, quantity, price):
+        sale = Sale(
+            customer=self.customer,
+            payment_method=Sale.PaymentMethod.CASH,
+            created_by=self.user,
+        )
+        item = BoxedSale(
+            sale=sale, product=self.bike, quantity=quantity, price=price, created_by=self.user
+        )
+        return create_sale(sale=sale, boxed_items=[item], coupled_items=[], user=self.user)
+
+    def test_annotations_match_properties(self):
+        for product in Product.objects.for_catalogue():
+            fresh = Product.objects.get(pk=product.pk)
+            self.assertEqual(product.can_delete, fresh.can_delete)
+            self.assertEqual(product.avg_sale_price, fresh.avg_sale_price)
+            self.assertEqual(product.total_coupled_available, fresh.total_coupled_available)
+
+        bike = Product.objects.for_catalogue().get(pk=self.bike.pk)
+        # (2 * 150 + 1 * 180) / 3
+        self.assertEqual(bike.avg_sale_price, Decimal("160.00"))
+        self.assertEqual(bike.average_cost_price, "100")
+        self.assertFalse(bike.can_delete)
+
+        coupled = Product.objects.for_catalogue().get(pk=self.coupled.pk)
+        self.assertEqual(coupled.total_coupled_available, 1)
+        self.assertFalse(coupled.can_delete)
+
+    def test_unused_product_is_deletable(self):
+        part = Product.objects.for_catalogue().get(pk=self.part.pk)
+        self.assertTrue(part.can_delete)
+        self.assertEqual(part.avg_sale_price, Decimal("0.00"))
+
+    def test_query_count_does_not_grow_with_sales(self):
+        url = reverse("products")
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+
+        for _ in range(5):
+            self._sell(1, Decimal("170.00"))
+        Product.objects.create(
+            brand=self.brand, modelname="Other Bike", category=Product.Category.MOTORCYCLE
+        )
+
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from account.models import CustomUser
+from customer.models import CoupledSale, Customer, Sale
+from customer.services import create_sale
+from inventory.models import Brand, Product, Transformation, TransformationItem, serial_key
+
+
+class SerialSearchTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="testuser", password="password")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        brand = Brand.objects.create(name="Serial Brand")
+        self.bike = Product.objects.create(
+            brand=brand, modelname="Bike", category=Product.Category.MOTORCYCLE
+        )
+        self.coupled = self.bike.variants.get(type_variant=Product.TypeVariant.COUPLED)
+        self.transformation = Transformation.objects.create(service_fee=Decimal("0.00"))
+        self.item = self._item("eng-ab-12345", "CHS/XY/98765")
+        self.customer = Customer.objects.create(
+            full_name="Serial Customer", phone="08012345678", created_by=self.user
+        )
+
+    def _item(self, engine, chassis):
+        return TransformationItem.objects.create(
+            transformation=self.transformation,
+            source_product=self.bike,
+            target_product=self.coupled,
+            engine_number=engine,
+            chassis_number=chassis,
+            unit_cost_at_transformation=Decimal("100.00"),
+        )
+
+    def _sell(self, item):
+        sale = Sale(
+            customer=self.customer,
+            payment_method=Sale.PaymentMethod.CASH,
+            created_by=self.user,
+        )
+        coupled = CoupledSale(
+            sale=sale, transformation_item=item, price=Decimal("150.00"), created_by=self.user
+        )
+        return create_sale(sale=sale, boxed_items=[], coupled_items=[coupled], user=self.user)
+
+    def _search(self, q, **headers):
+        return self.client.get(reverse("serial_search"), {"q": q}, **headers)
+
+    def test_keys_are_reversed_alphanumerics(self):
+        self.assertEqual(self.item.engine_number_key, "54321BAGNE")
+        self.assertEqual(self.item.chassis_number_key, serial_key("chs xy 98765"))
+
+        bulk = TransformationItem(
+            transformation=self.transformation,
+            source_product=self.bike,
+            target_product=self.coupled,
+            engine_number="ENG-55555",
+            chassis_number="CHS-44444",
+            item_number=TransformationItem.gen_item_number(),
+        )
+        TransformationItem.objects.bulk_create([bulk])
+        self.assertEqual(
+            TransformationItem.objects.get(pk=bulk.pk).engine_number_key, "55555GNE"
+        )
+
+    def test_suffix_matches_ignore_case_and_punctuation(self):
+        other = self._item("ENG-00099", "CHS-00012")
+        search = TransformationItem.objects.search_serial
+        self.assertEqual(list(search("12345")), [self.item])
+        self.assertEqual(list(search("b-12345")), [self.item])
+        self.assertEqual(list(search("xy98765")), [self.item])
+        self.assertEqual(list(search("0012")), [other])
+        self.assertFalse(search("1234").exists())
+        self.assertFalse(search("--").exists())
+
+    def test_json_response_includes_sale(self):
+        sale = self._sell(self.item)
+        response = self._search("98765")
+        self.assertEqual(response.status_code, 200)
+        [result] = response.json()["results"]
+        self.assertEqual(result["item_number"], self.item.item_number)
+        self.assertEqual(result["status"], TransformationItem.Status.SOLD)
+        self.assertEqual(result["sale"]["sale_number"], sale.sale_number)
+        self.assertEqual(result["sale"]["customer"], "Serial Customer")
+
+        self.assertEqual(self._search("45").json()["results"], [])
+
+    def test_htmx_partial_and_constant_queries(self):
+        self._sell(self.item)
+        response = self._search("12345", HTTP_HX_REQUEST="true")
+        self.assertContains(response, "eng-ab-12345")
+        self.assertContains(response, "Serial Customer")
+
+        with CaptureQueriesContext(connection) as before:
+            self._search("0005")
+        for i in range(5):
+            self._sell(self._item(f"ENG-{i}0005", f"CHS-{i}0005"))
+        with CaptureQueriesContext(connection) as after:
+            response = self._search("0005")
+        self.assertEqual(len(response.json()["results"]), 5)
+        self.assertEqual(len(after.captured_queries), len(before.captured_queries))
+
+    def test_available_leaves_out_sold_units(self):
+        spare = self._item("ENG-77345", "CHS-00001")
+        self._sell(self.item)
+        response = self.client.get(reverse("serial_search"), {"q": "345", "available": "1"})
+        self.assertEqual([r["id"] for r in response.json()["results"]], [str(spare.pk)])
+
+    def test_coupled_sale_row_searches_available_units(self):
+        response = self.client.get(reverse("create_normal_sale"))
+        self.assertContains(response, f'hx-get="{reverse("serial_search")}"')
+        self.assertContains(response, "hx-vals='{\"available\": \"1\"}'")
+
+        response = self._search("12345", HTTP_HX_REQUEST="true")
+        self.assertContains(response, f"pickSerialItem(this, '{self.item.pk}')")
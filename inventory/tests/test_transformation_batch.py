@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from account.models import CustomUser
+from inventory.models import (
+    Brand,
+    InventoryCostLayer,
+    InventoryTransaction,
+    Product,
+    Transformation,
+    TransformationItem,
+)
+
+
+class TransformationBatchTest(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username="testuser", password="password")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+        self.brand = Brand.objects.create(name="Batch Brand")
+        self.bikes = []
+        for name, cost in [("Bike A", "100.00"), ("Bike B", "200.00")]:
+            bike = Product.objects.create(
+                brand=self.brand, modelname=name, category=Product.Category.MOTORCYCLE
+            )
+            inventory = bike.inventory
+            inventory.quantity = 200
+            inventory.weighted_average_cost = Decimal(cost)
+            inventory.save()
+            InventoryCostLayer.objects.create(
+                product=bike, quantity=200, remaining_quantity=200, unit_cost=Decimal(cost)
+            )
+            self.bikes.append(bike)
+        self.serial = 0
+
+    def _post(self, products, service_fee="0", serials=None):
+        data = {
+            "service_fee": service_fee,
+            "transformation_date": "2026-01-15",
+            "items-TOTAL_FORMS": str(len(products)),
+            "items-INITIAL_FORMS": "0",
+            "items-MIN_NUM_FORMS": "0",
+            "items-MAX_NUM_FORMS": "1000",
+        }
+        for i, product in enumerate(products):
+            self.serial += 1
+            engine, chassis = serials[i] if serials else (f"ENG-{self.serial:05d}", f"CHS-{self.serial:05d}")
+            data[f"items-{i}-source_product"] = str(product.pk)
+            data[f"items-{i}-engine_number"] = engine
+            data[f"items-{i}-chassis_number"] = chassis
+        return self.client.post(reverse("add_transformation"), data)
+
+    def test_batch_decrements_stock_and_records_costs(self):
+        response = self._post([self.bikes[0]] * 3 + [self.bikes[1]], service_fee="40")
+        self.assertEqual(response.status_code, 302)
+
+        transformation = Transformation.objects.get()
+        items = transformation.transformation_items.all()
+        self.assertEqual(items.count(), 4)
+        self.assertTrue(all(item.item_number.startswith("ITEM-") for item in items))
+
+        for bike, remaining in [(self.bikes[0], 197), (self.bikes[1], 199)]:
+            bike.inventory.refresh_from_db()
+            self.assertEqual(bike.inventory.quantity, remaining)
+            coupled = bike.variants.get(type_variant=Product.TypeVariant.COUPLED)
+            # FIFO cost plus a quarter of the 40 service fee.
+            expected = bike.inventory.weighted_average_cost + 10
+            self.assertEqual(
+                set(items.filter(target_product=coupled).values_list("unit_cost_at_transformation", flat=True)),
+                {expected},
+            )
+            coupled.refresh_from_db()
+            self.assertEqual(coupled.assembly_cost, expected)
+
+        trxns = InventoryTransaction.objects.filter(source_object_id__in=[item.pk for item in items])
+        self.assertEqual(trxns.count(), 4)
+        self.assertEqual(sum(t.quantity_change for t in trxns), -4)
+
+    def test_query_count_does_not_grow_with_batch_size(self):
+        self._post(self.bikes)
+        counts = []
+        for size in (2, 40):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self._post(self.bikes * (size // 2))
+            self.assertEqual(response.status_code, 302)
+            # Each form still looks up and FK-validates its source product choice.
+            counts.append(len(ctx.captured_queries) - 2 * size)
+        self.assertEqual(counts[0], counts[1])
+
+    def test_serials_already_used_are_rejected(self):
+        self._post([self.bikes[0]], serials=[("ENG-TAKEN", "CHS-TAKEN")])
+        TransformationItem.objects.update(status=TransformationItem.Status.VOIDED)
+
+        # Voided items still hold their numbers: the columns are unique.
+        response = self._post(
+            [self.bikes[0], self.bikes[1]],
+            serials=[("ENG-TAKEN", "CHS-NEW-1"), ("ENG-NEW-2", "CHS-TAKEN")],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Engine number &#x27;ENG-TAKEN&#x27; already exists in the system")
+        self.assertContains(response, "Chassis number &#x27;CHS-TAKEN&#x27; already exists in the system")
+        self.assertEqual(Transformation.objects.count(), 1)
@@ -21,6 +21,7 @@ urlpatterns = [
     path("transformations/add/", manage_transformations, name="add_transformation"),
     path("transformations/item/add/", transformation_item_add, name="transformation_item_add"),
     path("transformations/item/remove/<int:index>/", transformation_item_remove, name="transformation_item_remove"),
+    path("transformations/serials/search/", serial_search, name="serial_search"),
 
     path(
         "transformations/modal/void/<uuid:pk>/",
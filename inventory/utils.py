@@ -1,13 +1,17 @@
-def create_inventory_transaction(
+from core.versions import INVENTORY, bump
+
+
+def build_inventory_transaction(
     inventory,
     source,
     transaction_type,
     quantity_change,
     cost_impact,
 ):
+    """Unsaved InventoryTransaction, for callers that bulk_create a batch."""
     from inventory.models import InventoryTransaction
 
-    return InventoryTransaction.objects.create(
+    return InventoryTransaction(
         inventory=inventory,
         source=source,
         transaction_type=transaction_type,
@@ -16,3 +20,23 @@ def create_inventory_transaction(
         created_by=getattr(source, "created_by", None),
         updated_by=getattr(source, "created_by", None),
     )
+
+
+def create_inventory_transaction(
+    inventory,
+    source,
+    transaction_type,
+    quantity_change,
+    cost_impact,
+):
+    trxn = build_inventory_transaction(
+        inventory=inventory,
+        source=source,
+        transaction_type=transaction_type,
+        quantity_change=quantity_change,
+        cost_impact=cost_impact,
+    )
+    trxn.save(force_insert=True)
+    # The ledger is not tracked by signals (see core.versions.MODEL_DOMAINS)
+    bump(INVENTORY)
+    return trxn
@@ -1,51 +1,47 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, redirect, get_object_or_404
 from django_htmx.http import replace_url
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from .models import (
     Product,
     TransformationItem,
     InventoryTransaction,
     Transformation,
     InventoryCostLayer,
+    serial_key,
 )
 from .forms import ProductForm, TransformationForm, TransformationItemFormset
 from django.contrib import messages
 from django.db import transaction
 from django.template.loader import render_to_string
-from django.core.paginator import Paginator
-from django.db.models import OuterRef, Subquery, Q, Count
+from core.pagination import CursorPaginator
+from core.fragments import cache_fragment, versioned_etag
+from core.search import search
+from core.versions import INVENTORY, SALES
+from django.db.models import Q, Count, Sum, Value, OuterRef, Subquery, UUIDField
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from . import services
 import logging
 from core.utils import apply_sorting
 from decimal import Decimal
+from datetime import datetime, time
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 import urllib.parse
 from django.http import QueryDict
 
 logger = logging.getLogger(__name__)
 
 
+@cache_fragment("inventory/product/product_list.html", INVENTORY, SALES)
 def products(request):
     PAGE_SIZE = 100
-    page_number = request.GET.get("page", 1)
     search_query = request.GET.get("q", "")
-    products_list = (
-        Product.objects.select_related("brand")
-        .prefetch_related(
-            "po_items",
-            "transform_to__coupled_sales",
-            "boxed_sales",
-            "inventory",
-        )
-        .order_by("-created_at")
-    )
+    products_list = Product.objects.for_catalogue().order_by("-created_at")
 
     if search_query:
-        products_list = products_list.filter(
-            Q(modelname__icontains=search_query)
-            | Q(brand__name__icontains=search_query)
-        )
+        products_list = search(products_list, search_query)
 
     # Sorting
     sort_field = request.GET.get("sort", "created_at")
@@ -64,18 +60,19 @@ def products(request):
         products_list, sort_field, direction, allowed_sort_fields
     )
 
-    paginator = Paginator(products_list, PAGE_SIZE)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(products_list, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
 
     context = {
         "products": page_obj,
         "search_query": search_query,
         "sort_field": sort_field,
         "direction": direction,
+        "params": {k: v for k, v in request.GET.items() if k != "cursor"},
     }
 
     if request.htmx:
-        if any(key in request.GET for key in ["page", "q", "sort", "direction"]):
+        if any(key in request.GET for key in ["page", "cursor", "q", "sort", "direction"]):
             return render(
                 request,
                 "inventory/product/product_list.html#product-table-partial",
@@ -204,25 +201,20 @@ def product_status_change(request, pk):
     return HttpResponse(status=405)
 
 
+@cache_fragment("inventory/inventory/inventory.html", INVENTORY)
 def inventories(request):
     PAGE_SIZE = 50
 
-    page_number = request.GET.get("page", 1)
     search_query = request.GET.get("q", "")
     category_filter = request.GET.get("category", "")
     stock_filter = request.GET.get("stock", "")
     sort_field = request.GET.get("sort", "total_value")
     direction = request.GET.get("direction", "desc")
 
-    FILTER_KEYS = {"page", "q", "category", "stock", "sort"}
+    FILTER_KEYS = {"page", "cursor", "q", "category", "stock", "sort"}
 
-    # --- Base queryset ---
-    base_products = (
-        Product.objects.filter(base_product__isnull=True)
-        .select_related("brand", "inventory")
-        .prefetch_related("variants__transform_to")
-        .order_by("modelname")
-    )
+    # --- Base queryset (valuation computed in SQL) ---
+    base_products = Product.objects.with_valuation().select_related("brand")
 
     if search_query:
         base_products = base_products.filter(
@@ -234,156 +226,32 @@ def inventories(request):
     if category_filter:
         base_products = base_products.filter(category=category_filter)
 
-    # --- Bulk-fetch latest cost layers (SQLite-compatible) ---
-    latest_layer_subquery = (
-        InventoryCostLayer.objects.filter(
-            product=OuterRef("pk"),
-            remaining_quantity__gt=0,
-            is_voided=False,
-        )
-        .order_by("-created_at")
-        .values("cost_layer_id")[:1]
-    )
-
-    latest_layer_ids = base_products.annotate(
-        latest_layer_id=Subquery(latest_layer_subquery)
-    ).values_list("latest_layer_id", flat=True)
-
-    latest_layers = {
-        layer.product_id: layer
-        for layer in InventoryCostLayer.objects.filter(
-            cost_layer_id__in=latest_layer_ids
-        )
-    }
-
-    # --- Build product data in Python ---
-    products_with_data = []
-    low_stock_items = []
-    total_inventory_value = Decimal("0.00")
-
-    for product in base_products:
-        # Boxed qty
-        try:
-            boxed_qty = product.inventory.quantity
-        except Product.inventory.RelatedObjectDoesNotExist:
-            boxed_qty = 0
-
-        # Boxed unit cost: latest cost layer → WAC → zero
-        latest_layer = latest_layers.get(product.product_id)
-        if latest_layer:
-            boxed_unit_cost = latest_layer.unit_cost
-        elif hasattr(product, "inventory"):
-            boxed_unit_cost = product.inventory.weighted_average_cost
-        else:
-            boxed_unit_cost = Decimal("0.00")
-
-        boxed_value = Decimal(str(boxed_qty)) * boxed_unit_cost
-
-        # Coupled variant data
-        coupled_variant = next(
-            (
-                v
-                for v in product.variants.all()
-                if v.type_variant == Product.TypeVariant.COUPLED
-            ),
-            None,
-        )
-        coupled_count = 0
-        coupled_available = 0
-        coupled_unit_cost = Decimal("0.00")
-        coupled_value = Decimal("0.00")
-
-        if coupled_variant:
-            active_items = [
-                ti
-                for ti in coupled_variant.transform_to.all()
-                if ti.status != TransformationItem.Status.VOIDED
-            ]
-            coupled_count = len(active_items)
-            coupled_available = sum(
-                1
-                for ti in active_items
-                if ti.status == TransformationItem.Status.AVAILABLE
-            )
-            latest_ti = max(
-                active_items,
-                key=lambda ti: ti.created_at,
-                default=None,
-            )
-            coupled_unit_cost = (
-                latest_ti.unit_cost_at_transformation
-                if latest_ti
-                else (coupled_variant.assembly_cost or Decimal("0.00"))
-            )
-            coupled_value = Decimal(str(coupled_count)) * coupled_unit_cost
-
-        total_value = boxed_value + coupled_value
-        total_inventory_value += total_value
-
-        # Stock status
-        match boxed_qty:
-            case 0:
-                stock_status = "out"
-                low_stock_items.append(
-                    {
-                        "product": product,
-                        "boxed_qty": boxed_qty,
-                        "reason": "Out of stock",
-                    }
-                )
-            case qty if qty <= 2:
-                stock_status = "low"
-                low_stock_items.append(
-                    {
-                        "product": product,
-                        "boxed_qty": boxed_qty,
-                        "reason": "Low stock",
-                    }
-                )
-            case _:
-                stock_status = "ok"
-
-        # Stock filter
-        match stock_filter:
-            case "in_stock" if boxed_qty == 0 and coupled_available == 0:
-                continue
-            case "low_stock" if stock_status != "low":
-                continue
-            case "out_of_stock" if stock_status != "out":
-                continue
-
-        products_with_data.append(
-            {
-                "product": product,
-                "boxed_qty": boxed_qty,
-                "boxed_unit_cost": boxed_unit_cost,
-                "boxed_value": boxed_value,
-                "coupled_variant": coupled_variant,
-                "coupled_count": coupled_count,
-                "coupled_available": coupled_available,
-                "coupled_unit_cost": coupled_unit_cost,
-                "coupled_value": coupled_value,
-                "total_value": total_value,
-            }
-        )
+    # Totals and alerts ignore the stock filter, as before
+    total_inventory_value = base_products.aggregate(
+        total=Coalesce(Sum("total_value"), Value(Decimal("0.00")))
+    )["total"]
+    low_stock_items = base_products.filter(
+        stock_status__in=["out", "low"]
+    ).order_by("modelname")
+
+    # --- Stock filter ---
+    match stock_filter:
+        case "in_stock":
+            base_products = base_products.exclude(boxed_qty=0, coupled_available=0)
+        case "low_stock":
+            base_products = base_products.filter(stock_status="low")
+        case "out_of_stock":
+            base_products = base_products.filter(stock_status="out")
 
     # --- Sorting ---
-    sort_key_map = {
-        "modelname": lambda x: x["product"].modelname.lower(),
-        "boxed_qty": lambda x: x["boxed_qty"],
-        "coupled_count": lambda x: x["coupled_count"],
-        "total_value": lambda x: x["total_value"],
-    }
-
-    if sort_field in sort_key_map:
-        products_with_data.sort(
-            key=sort_key_map[sort_field],
-            reverse=(direction == "desc"),
-        )
+    allowed_sort_fields = ["modelname", "boxed_qty", "coupled_count", "total_value"]
+    base_products = apply_sorting(
+        base_products.order_by("modelname"), sort_field, direction, allowed_sort_fields
+    )
 
     # --- Pagination ---
-    paginator = Paginator(products_with_data, PAGE_SIZE)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(base_products, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
 
     context = {
         "products": page_obj,
@@ -395,6 +263,7 @@ def inventories(request):
         "low_stock_items": low_stock_items,
         "total_inventory_value": total_inventory_value,
         "category_choices": Product.Category.choices,
+        "params": {k: v for k, v in request.GET.items() if k != "cursor"},
     }
 
     # --- HTMX rendering ---
@@ -416,6 +285,7 @@ def inventories(request):
     return render(request, "inventory/inventory/inventory.html", context)
 
 
+@versioned_etag(INVENTORY, SALES, model=Product)
 def product_detail(request, pk):
     """Detail view for a base product showing boxed + coupled breakdown."""
     product = get_object_or_404(
@@ -479,14 +349,25 @@ def product_detail(request, pk):
     # Tab data
     tab = request.GET.get("tab", "units")
 
-    # Stock history: inventory transactions for boxed product + transformation items
+    # Stock history: inventory transactions for boxed product + transformation items.
+    # With ?as_of=YYYY-MM-DD the position comes from the nearest snapshot plus
+    # the ledger delta, and the listed movements stop at the end of that day.
     stock_history = []
+    as_of_date = parse_date(request.GET.get("as_of") or "")
+    as_of_position = None
     if hasattr(product, "inventory"):
-        stock_history = list(
-            InventoryTransaction.objects.filter(inventory=product.inventory)
-            .select_related("inventory")
-            .order_by("-created_at")[:100]
-        )
+        history = InventoryTransaction.objects.filter(inventory=product.inventory)
+        balance = boxed_qty
+        if as_of_date:
+            as_of = timezone.make_aware(datetime.combine(as_of_date, time.max))
+            as_of_position = Product.objects.as_of(as_of).get(pk=product.pk)
+            history = history.filter(created_at__lte=as_of)
+            balance = as_of_position.as_of_quantity
+        stock_history = list(history.order_by("-created_at")[:100])
+        # Running on-hand after each movement, walking back from the latest.
+        for txn in stock_history:
+            txn.balance = balance
+            balance -= txn.quantity_change
 
     # Cost layers
     cost_layers_qs = (
@@ -586,6 +467,8 @@ def product_detail(request, pk):
         # Tab data
         "serialized_items": serialized_items,
         "stock_history": stock_history,
+        "as_of_date": as_of_date,
+        "as_of_position": as_of_position,
         "cost_layers": cost_layers,
         "boxed_sales": boxed_sales,
         "coupled_sales": coupled_sales,
@@ -609,7 +492,6 @@ def product_detail(request, pk):
 
 def transformations(request):
     PAGE_SIZE = 100
-    page_number = request.GET.get("page", 1)
     search_query = request.GET.get("q", "")
     status_filter = request.GET.get("status", "")
     transformations = Transformation.objects.annotate(
@@ -624,16 +506,17 @@ def transformations(request):
     if status_filter:
         transformations = transformations.filter(status=status_filter)
 
-    paginator = Paginator(transformations, PAGE_SIZE)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(transformations, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
     context = {
         "transformations": page_obj,
         "search_query": search_query,
         "status_filter": status_filter,
+        "params": {k: v for k, v in request.GET.items() if k != "cursor"},
     }
 
     if request.htmx:
-        match any(key in request.GET for key in ["page", "q", "status"]):
+        match any(key in request.GET for key in ["page", "cursor", "q", "status"]):
             case True:
                 return render(
                     request,
@@ -652,6 +535,79 @@ def transformations(request):
     )
 
 
+SERIAL_SEARCH_MIN_CHARS = 3
+SERIAL_SEARCH_LIMIT = 20
+
+
+@login_required
+def serial_search(request):
+    """
+    Instant lookup of coupled units by the tail of their engine or chassis
+    number. HTMX requests get the dropdown partial, everything else JSON.
+    Pass ``available`` to leave out units that are already sold.
+    """
+    from customer.models import CoupledSale
+
+    query = request.GET.get("q", "").strip()
+    items = []
+    if len(serial_key(query)) >= SERIAL_SEARCH_MIN_CHARS:
+        matches = TransformationItem.objects.search_serial(query)
+        if request.GET.get("available"):
+            matches = matches.filter(status=TransformationItem.Status.AVAILABLE)
+        latest_sale = CoupledSale.objects.filter(
+            transformation_item=OuterRef("pk")
+        ).order_by("-created_at")
+        items = list(
+            matches.select_related("target_product__brand")
+            .annotate(
+                sale_id=Subquery(
+                    latest_sale.values("sale_id")[:1], output_field=UUIDField()
+                ),
+                sale_number=Subquery(latest_sale.values("sale__sale_number")[:1]),
+                sale_status=Subquery(latest_sale.values("sale__status")[:1]),
+                customer_name=Subquery(
+                    latest_sale.values("sale__customer__full_name")[:1]
+                ),
+            )
+            .order_by("engine_number")[:SERIAL_SEARCH_LIMIT]
+        )
+
+    if request.htmx:
+        return render(
+            request,
+            "partials/search_results_transformation_item.html",
+            {"items": items, "query": query},
+        )
+
+    return JsonResponse(
+        {
+            "query": query,
+            "results": [
+                {
+                    "id": str(item.pk),
+                    "item_number": item.item_number,
+                    "engine_number": item.engine_number,
+                    "chassis_number": item.chassis_number,
+                    "status": item.status,
+                    "product": str(item.target_product),
+                    "sale": (
+                        {
+                            "id": str(item.sale_id),
+                            "sale_number": item.sale_number,
+                            "status": item.sale_status,
+                            "customer": item.customer_name,
+                            "url": reverse("sale_detail", args=[item.sale_id]),
+                        }
+                        if item.sale_id
+                        else None
+                    ),
+                }
+                for item in items
+            ],
+        }
+    )
+
+
 def transformation_detail(request, pk):
     transformation = get_object_or_404(
         Transformation.objects.prefetch_related(
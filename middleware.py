@@ -1,5 +1,16 @@
 import json
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
 from django.contrib.messages import get_messages
+from django.db import connections
+
+from core.utils import buffered_audit
+
+query_logger = logging.getLogger("mrms.queries")
 
 
 class HtmxMessageMiddleware:
@@ -46,3 +57,137 @@ class HtmxMessageMiddleware:
         response["HX-Trigger"] = json.dumps(trigger_data)
 
         return response
+
+
+class AuditBufferMiddleware:
+    """
+    Holds the audit entries committed while handling a request and writes
+    them with one bulk_create once the response is ready (see core.utils.audit).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with buffered_audit():
+            return self.get_response(request)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryStats:
+    """
+    Per-request SQL tally, installed with connection.execute_wrapper().
+
+    A query counts as a duplicate when the exact same SQL text has already
+    run during the request — the usual footprint of an N+1 lookup.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def sql_ms(self):
+        return round(self.duration * 1000, 2)
+
+    @property
+    def duplicates(self):
+        return sum(n - 1 for n in self.statements.values() if n > 1)
+
+    def most_repeated(self):
+        sql, n = self.statements.most_common(1)[0] if self.statements else ("", 0)
+        return (sql[:200], n) if n > 1 else None
+
+
+class QueryBudgetMiddleware:
+    """
+    Counts queries, total SQL time and duplicate SQL for every request.
+
+    Adds a Server-Timing header (visible in the browser dev tools, including
+    for HTMX partials) and checks the request against settings.QUERY_BUDGETS,
+    keyed by URL name. A budget is either a max query count or a dict with any
+    of "queries", "sql_ms" and "duplicates". Each request's stats go to the
+    "mrms.queries" logger as one JSON line: at WARNING when it breaches its
+    budget (or raised as QueryBudgetExceeded when QUERY_BUDGET_MODE is
+    "raise"), otherwise at DEBUG, which the logger drops unless
+    QUERY_LOG_LEVEL is lowered.
+
+    The stats are left on request.query_stats for core.testing.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        request.query_stats = stats
+        start = time.perf_counter()
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+
+        total_ms = round((time.perf_counter() - start) * 1000, 2)
+        url_name = getattr(request.resolver_match, "url_name", None)
+
+        timing = f'db;desc="{stats.count} queries";dur={stats.sql_ms}, total;dur={total_ms}'
+        existing = response.get("Server-Timing")
+        response["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+
+        breaches = self.exceeded(self.budget_for(url_name), stats)
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "url_name": url_name,
+            "status": response.status_code,
+            "htmx": "HX-Request" in request.headers,
+            "queries": stats.count,
+            "sql_ms": stats.sql_ms,
+            "duplicates": stats.duplicates,
+            "total_ms": total_ms,
+        }
+        if breaches:
+            record["budget_exceeded"] = breaches
+            record["most_repeated"] = stats.most_repeated()
+            query_logger.warning(json.dumps(record))
+            if getattr(settings, "QUERY_BUDGET_MODE", "log") == "raise":
+                raise QueryBudgetExceeded(f"{url_name}: {breaches}")
+        elif query_logger.isEnabledFor(logging.DEBUG):
+            query_logger.debug(json.dumps(record))
+
+        return response
+
+    @staticmethod
+    def budget_for(url_name):
+        budgets = getattr(settings, "QUERY_BUDGETS", {})
+        budget = budgets.get(url_name) if url_name else None
+        return budget if budget is not None else budgets.get("*")
+
+    @staticmethod
+    def exceeded(budget, stats):
+        """Return {metric: [actual, limit]} for every limit in *budget* that *stats* exceeds."""
+        if budget is None:
+            return {}
+        if isinstance(budget, int):
+            budget = {"queries": budget}
+
+        actual = {"queries": stats.count, "sql_ms": stats.sql_ms, "duplicates": stats.duplicates}
+        return {
+            metric: [actual[metric], limit]
+            for metric, limit in budget.items()
+            if limit is not None and actual[metric] > limit
+        }
@@ -37,8 +37,19 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
     "middleware.HtmxMessageMiddleware",
+    "middleware.AuditBufferMiddleware",
+    "middleware.QueryBudgetMiddleware",
 ]
 
+# Per-URL-name query budgets checked by middleware.QueryBudgetMiddleware.
+# A value is a max query count or a dict of "queries", "sql_ms" and
+# "duplicates" limits; "*" applies to URL names without their own entry.
+QUERY_BUDGETS = {
+    "*": 100,
+}
+# "log" records breaches as warnings, "raise" turns them into errors
+QUERY_BUDGET_MODE = config("QUERY_BUDGET_MODE", default="log")
+
 ROOT_URLCONF = "mrms.urls"
 
 TEMPLATES = [
@@ -67,6 +78,19 @@ DATABASES = {
     )
 }
 
+# "fragments" holds rendered HTMX partials and the domain versions keying
+# them (core.fragments, core.versions). Processes must share it to see each
+# other's version bumps, so prod.py uses a file cache; Redis works too.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "fragments": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "fragments",
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+}
+FRAGMENT_CACHE = "fragments"
+
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
     {"NAME": "django.contrib.auth.password_validation.MinimumLengthValidator"},
@@ -163,5 +187,11 @@ LOGGING = {
             "level": "WARNING",
             "propagate": False,
         },
+        "mrms.queries": {
+            "handlers": ["file"],
+            # Budget breaches only; set DEBUG to log every request's query stats
+            "level": config("QUERY_LOG_LEVEL", default="WARNING"),
+            "propagate": False,
+        },
     },
 }
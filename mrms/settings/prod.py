@@ -22,6 +22,12 @@ CSRF_TRUSTED_ORIGINS = config(
 
 SECURE_PROXY_SSL_HEADER = ("HTTP_X_FORWARDED_PROTO", "https")
 
+CACHES["fragments"] = {
+    "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+    "LOCATION": config("FRAGMENT_CACHE_DIR", default=str(BASE_DIR / "cache" / "fragments")),
+    "OPTIONS": {"MAX_ENTRIES": 20000},
+}
+
 LOGGING["root"]["handlers"] = ["file", "error_file"]
 LOGGING["loggers"]["django"]["handlers"] = ["file"]
 LOGGING["loggers"]["django"]["level"] = "WARNING"
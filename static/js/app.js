@@ -399,6 +399,15 @@ function initCoupledSelect2() {
   });
 }
 
+// Serial search results (partials/search_results_transformation_item.html)
+// pick the unit in the serial dropdown of the row they were searched from.
+function pickSerialItem(el, pk) {
+  const $row = $(el).closest('.item-form-row');
+  if (!$row.length) return;
+  $row.find('select.select2-serial').val(pk).trigger('change');
+  $(el).closest('.serial-search-results').empty();
+}
+
 function initAllSelect2() {
   // Guard: jQuery and Select2 must be available.
   if (typeof $ === 'undefined' || !$.fn || !$.fn.select2) {
@@ -150,6 +150,9 @@ class SupplierAdmin(AuditAdminMixin, admin.ModelAdmin):
 
     phone_and_address.short_description = "Contact & Address"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_rollups()
+
     def undelivered_value(self, obj):
         return f"{obj.supp_total_undelivered_value:,.2f}"
 
@@ -174,6 +177,9 @@ class PurchaseOrderAdmin(AuditAdminMixin, admin.ModelAdmin):
     readonly_fields = ["po_id", "po_number"] + AuditAdminMixin.readonly_fields
     list_select_related = ["supplier"]
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_rollups()
+
     fieldsets = (
         ("Order Header", {"fields": ("po_number", "supplier", "order_date", "status")}),
         ("Tracking", {"fields": ("delivery_status", "payment_status")}),
@@ -203,6 +209,9 @@ class PurchaseOrderItemAdmin(AuditAdminMixin, admin.ModelAdmin):
     search_fields = ["product__modelname", "purchase_order__po_number"]
     autocomplete_fields = ["product", "purchase_order"]
     list_select_related = ["product", "purchase_order"]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_received()
     readonly_fields = ["po_item_id"] + AuditAdminMixin.readonly_fields
 
     def get_po_number(self, obj):
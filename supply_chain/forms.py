@@ -102,8 +102,10 @@ class PaymentForm(ModelForm):
                 pk=target_purchase_order.pk
             )
         else:
-            self.fields["purchase_order"].queryset = PurchaseOrder.objects.exclude(
-                payment_status="fulfilled"
+            self.fields["purchase_order"].queryset = (
+                PurchaseOrder.objects.with_rollups()
+                .select_related("supplier")
+                .exclude(payment_status="fulfilled")
             )
 
     def clean(self):
@@ -149,10 +151,40 @@ class GoodsReceiptForm(ModelForm):
             )
             self.fields["purchase_order"].empty_label = None
         else:
-            self.fields["purchase_order"].queryset = PurchaseOrder.objects.filter(
+            self.fields["purchase_order"].queryset = (
+                PurchaseOrder.objects.with_rollups()
+                .select_related("supplier")
+                .filter(
+                    ~Q(delivery_status=PurchaseOrder.DeliveryStatus.RECEIVED),
+                    payment_status=PurchaseOrder.PaymentStatus.FULFILLED,
+                )
+            )
+
+
+class GoodsReceiptImportForm(forms.Form):
+    purchase_order = forms.ModelChoiceField(
+        queryset=PurchaseOrder.objects.none(),
+        empty_label="Select a Purchase Order",
+    )
+    delivery_date = forms.DateTimeField(
+        required=False, widget=forms.DateInput(attrs={"type": "date"})
+    )
+    delivery_cost = forms.DecimalField(
+        max_digits=10, decimal_places=2, min_value=0, initial=0
+    )
+    manifest = forms.FileField(help_text="CSV with a 'sku' column and an optional 'quantity' column.")
+    dry_run = forms.BooleanField(required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["purchase_order"].queryset = (
+            PurchaseOrder.objects.with_rollups()
+            .select_related("supplier")
+            .filter(
                 ~Q(delivery_status=PurchaseOrder.DeliveryStatus.RECEIVED),
                 payment_status=PurchaseOrder.PaymentStatus.FULFILLED,
             )
+        )
 
 
 class GoodsReceiptItemForm(ModelForm):
@@ -0,0 +1,82 @@
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from account.models import CustomUser
+from supply_chain.models import PurchaseOrder
+from supply_chain.services import import_goods_receipt
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a goods receipt for an existing purchase order from a supplier "
+        "manifest CSV. The CSV needs a 'sku' column and an optional 'quantity' "
+        "column (default 1 per row); other columns are ignored. Use --dry-run to "
+        "validate the file without writing anything."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("po_number", help="PO number to receive against, e.g. PO-1A2B3C4D.")
+        parser.add_argument("csv_path", help="Path to the manifest CSV.")
+        parser.add_argument("--delivery-cost", default="0", help="Delivery cost to spread across units.")
+        parser.add_argument("--delivery-date", default=None, help="Delivery date as YYYY-MM-DD (default now).")
+        parser.add_argument("--username", default="admin", help="User recorded on the receipt (default admin).")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report without writing.")
+
+    def handle(self, *args, **options):
+        po = PurchaseOrder.objects.filter(po_number=options["po_number"]).first()
+        if po is None:
+            raise CommandError(f"Purchase order '{options['po_number']}' not found.")
+
+        user = CustomUser.objects.filter(username=options["username"]).first()
+        if user is None:
+            raise CommandError(f"User '{options['username']}' not found.")
+
+        try:
+            delivery_cost = Decimal(options["delivery_cost"])
+        except InvalidOperation:
+            raise CommandError(f"Invalid delivery cost '{options['delivery_cost']}'.")
+
+        delivery_date = None
+        if options["delivery_date"]:
+            try:
+                delivery_date = timezone.make_aware(
+                    datetime.strptime(options["delivery_date"], "%Y-%m-%d")
+                )
+            except ValueError:
+                raise CommandError(f"Invalid delivery date '{options['delivery_date']}'.")
+
+        try:
+            with open(options["csv_path"], newline="", encoding="utf-8-sig") as lines:
+                receipt, quantities, row_count, errors = import_goods_receipt(
+                    po,
+                    lines,
+                    user,
+                    delivery_cost=delivery_cost,
+                    delivery_date=delivery_date,
+                    dry_run=options["dry_run"],
+                )
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['csv_path']}: {e}")
+
+        self.stdout.write(f"Read {row_count} row(s) for {po.po_number}.")
+        for item, quantity in quantities.items():
+            self.stdout.write(f"  {item.product.sku:<24} {quantity:>8}")
+
+        if errors:
+            for error in errors:
+                self.stdout.write(self.style.ERROR(f"  {error}"))
+            raise CommandError(f"{len(errors)} validation error(s); nothing was imported.")
+
+        if receipt is None:
+            self.stdout.write(self.style.SUCCESS("Dry run: the file is valid. Nothing was written."))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Posted {receipt.gr_number}: {sum(quantities.values())} unit(s) "
+                    f"across {len(quantities)} item(s)."
+                )
+            )
+
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('supply_chain', '0013_alter_goodsreceiptitem_options'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='purchaseorder',
+            name='po_number',
+            field=models.CharField(editable=False, max_length=50, unique=True),
+        ),
+    ]
@@ -3,11 +3,131 @@ from django.urls import reverse
 import uuid
 from inventory.models import *
 from account.models import CustomUser
-from django.db.models import F, Sum, Q
+from django.db.models import (
+    F,
+    Sum,
+    Q,
+    Count,
+    OuterRef,
+    Subquery,
+    Value,
+    DecimalField,
+    IntegerField,
+)
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.contrib.contenttypes.models import ContentType
+from collections import defaultdict
 from inventory.utils import create_inventory_transaction
+from core.numbering import next_number
+from core.versions import bump_for_model
+
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+
+
+def _rollup(queryset, group_by, expression, output_field):
+    """Correlated single-row aggregate of *expression* over *queryset*, 0 when empty."""
+    return Coalesce(
+        Subquery(
+            queryset.order_by()
+            .values(group_by)
+            .annotate(total=expression)
+            .values("total"),
+            output_field=output_field,
+        ),
+        Value(0),
+        output_field=output_field,
+    )
+
+
+def _received_per_item():
+    """Net received quantity (reversals included) for the outer PO item."""
+    return _rollup(
+        GoodsReceiptItem.objects.filter(purchase_order_item=OuterRef("pk")),
+        "purchase_order_item",
+        Sum("received_quantity"),
+        IntegerField(),
+    )
+
+
+def _undelivered_value(items, group_by):
+    """Sum of (ordered - received) * unit price over *items*."""
+    return _rollup(
+        items.annotate(item_received=_received_per_item()),
+        group_by,
+        Sum(
+            (F("ordered_quantity") - F("item_received")) * F("unit_price_at_order"),
+            output_field=MONEY,
+        ),
+        MONEY,
+    )
+
+
+def _write_status_changes(model, rows, derive):
+    """
+    Apply derived status columns to *rows* of ``(pk, current, figures...)``.
+
+    *current* maps column -> stored value and *derive* returns the new
+    column -> value mapping for a row's figures. Only columns whose value
+    actually changes are written, with one ``update()`` per distinct set of
+    changes rather than a full ``save()`` per row. Returns pk -> new statuses.
+    """
+    result, changes = {}, defaultdict(list)
+    for pk, current, *figures in rows:
+        statuses = derive(*figures)
+        result[pk] = statuses
+        changed = tuple(
+            (column, value)
+            for column, value in statuses.items()
+            if current[column] != value
+        )
+        if changed:
+            changes[changed].append(pk)
+
+    now = timezone.now()
+    for changed, pks in changes.items():
+        model._base_manager.filter(pk__in=pks).update(**dict(changed), updated_at=now)
+    if changes:
+        bump_for_model(model)
+    return result
+
+
+class SupplierQuerySet(models.QuerySet):
+    def with_rollups(self):
+        """
+        Annotate each supplier with ``open_po_count``, ``total_ordered_ytd``
+        (value of every PO item), ``total_paid`` (non-voided payments) and
+        ``undelivered_value``. Each figure is its own correlated subquery, so
+        items, receipts and payments never multiply each other.
+        """
+        items = PurchaseOrderItem.objects.filter(purchase_order__supplier=OuterRef("pk"))
+        return self.annotate(
+            open_po_count=_rollup(
+                PurchaseOrder.objects.filter(supplier=OuterRef("pk")).exclude(
+                    status=PurchaseOrder.Status.CLOSED
+                ),
+                "supplier",
+                Count("pk"),
+                IntegerField(),
+            ),
+            total_ordered_ytd=_rollup(
+                items,
+                "purchase_order__supplier",
+                Sum(F("ordered_quantity") * F("unit_price_at_order")),
+                MONEY,
+            ),
+            total_paid=_rollup(
+                Payment.objects.filter(purchase_order__supplier=OuterRef("pk")).exclude(
+                    status=Payment.Status.VOIDED
+                ),
+                "purchase_order__supplier",
+                Sum("amount_paid"),
+                MONEY,
+            ),
+            undelivered_value=_undelivered_value(items, "purchase_order__supplier"),
+        )
 
 
 class Supplier(models.Model):
@@ -39,6 +159,8 @@ class Supplier(models.Model):
         related_name="updated_%(class)s_set",
     )
 
+    objects = SupplierQuerySet.as_manager()
+
     class Meta:
         ordering = ["company_name"]
 
@@ -72,14 +194,82 @@ class Supplier(models.Model):
     # Total value of undelivered units for this supplier
     @property
     def supp_total_undelivered_value(self):
-        total_value = sum(
-            [po.po_total_undelivered_value for po in self.purchase_orders.all()]
+        if hasattr(self, "undelivered_value"):
+            return self.undelivered_value
+        return (
+            Supplier.objects.filter(pk=self.pk)
+            .with_rollups()
+            .values_list("undelivered_value", flat=True)
+            .get()
         )
-        return total_value
 
 
 
 
+class PurchaseOrderQuerySet(models.QuerySet):
+    def with_rollups(self):
+        """
+        Annotate each PO with ``ordered_qty``, ``ordered_amount``,
+        ``received_qty``, ``paid_amount`` and ``undelivered_value`` using
+        independent correlated subqueries. The matching properties read these
+        instead of running their own aggregates.
+        """
+        items = PurchaseOrderItem.objects.filter(purchase_order=OuterRef("pk"))
+        return self.annotate(
+            ordered_qty=_rollup(
+                items, "purchase_order", Sum("ordered_quantity"), IntegerField()
+            ),
+            ordered_amount=_rollup(
+                items,
+                "purchase_order",
+                Sum(F("ordered_quantity") * F("unit_price_at_order")),
+                MONEY,
+            ),
+            received_qty=_rollup(
+                GoodsReceiptItem.objects.filter(
+                    purchase_order_item__purchase_order=OuterRef("pk")
+                ),
+                "purchase_order_item__purchase_order",
+                Sum("received_quantity"),
+                IntegerField(),
+            ),
+            paid_amount=_rollup(
+                Payment.objects.filter(purchase_order=OuterRef("pk")).exclude(
+                    status=Payment.Status.VOIDED
+                ),
+                "purchase_order",
+                Sum("amount_paid"),
+                MONEY,
+            ),
+            undelivered_value=_undelivered_value(items, "purchase_order"),
+        )
+
+    def recompute_statuses(self):
+        """
+        Recalculate delivery, payment and overall status for every PO in the
+        queryset from a single rollup query, writing only the columns that
+        changed. Returns a mapping of pk -> new status values.
+        """
+        rows = self.with_rollups().order_by().values_list(
+            "pk",
+            "delivery_status",
+            "payment_status",
+            "status",
+            "ordered_qty",
+            "received_qty",
+            "ordered_amount",
+            "paid_amount",
+        )
+        return _write_status_changes(
+            self.model,
+            (
+                (pk, {"delivery_status": d, "payment_status": p, "status": s}, *figures)
+                for pk, d, p, s, *figures in rows
+            ),
+            self.model.derive_statuses,
+        )
+
+
 class PurchaseOrder(models.Model):
     class DeliveryStatus(models.TextChoices):
         PENDING = "pending", "Pending"
@@ -97,15 +287,16 @@ class PurchaseOrder(models.Model):
         INACTIVE = "inactive", "Inactive"
         CLOSED = "closed", "Closed"
 
+    @staticmethod
     def gen_po_number():
-        return f"PO-{uuid.uuid4().hex[:8].upper()}"
+        return next_number("PO")
 
     po_id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
     supplier = models.ForeignKey(
         Supplier, on_delete=models.PROTECT, related_name="purchase_orders"
     )
     po_number = models.CharField(
-        max_length=50, editable=False, unique=True, default=gen_po_number
+        max_length=50, editable=False, unique=True
     )
     order_date = models.DateTimeField(default=timezone.now)
     delivery_status = models.CharField(
@@ -133,6 +324,8 @@ class PurchaseOrder(models.Model):
         related_name="updated_%(class)s_set",
     )
 
+    objects = PurchaseOrderQuerySet.as_manager()
+
     class Meta:
         ordering = ["-updated_at"]
 
@@ -155,45 +348,46 @@ class PurchaseOrder(models.Model):
     def get_delete_url(self):
         return reverse("delete_po", kwargs={"pk": self.pk})
 
+    def _rollup_value(self, name, fresh=False):
+        """
+        Read a with_rollups() annotation, or query just that figure when the
+        instance was loaded without it (or *fresh* is requested).
+        """
+        if not fresh and hasattr(self, name):
+            return getattr(self, name)
+        if self._state.adding:
+            return 0
+        value = (
+            PurchaseOrder.objects.filter(pk=self.pk)
+            .with_rollups()
+            .values_list(name, flat=True)
+            .get()
+        )
+        return value or 0
+
     # Total value of undelivered units for this purchase order
     @property
     def po_total_undelivered_value(self):
-        total_value = sum(
-            [po_item.remaining_qty_value for po_item in self.po_items.all()]
-        )
-        return total_value
+        return self._rollup_value("undelivered_value")
 
     # Total quantity of units received for this purchase order
     @property
     def total_received(self):
-        total_received = self.po_items.aggregate(
-            total=Sum(F("receipt_items__received_quantity"))
-        )["total"]
-        return total_received or 0
+        return self._rollup_value("received_qty")
 
     # Total quantity of units ordered for this purchase order
     @property
     def total_ordered(self):
-        total_ordered = self.po_items.aggregate(total=Sum(F("ordered_quantity")))[
-            "total"
-        ]
-        return total_ordered or 0
+        return self._rollup_value("ordered_qty")
 
     # Total value of all ordered items for this purchase order
     @property
     def total_amount(self):
-        total_amount = self.po_items.aggregate(
-            total=Sum(F("ordered_quantity") * F("unit_price_at_order"))
-        )["total"]
-
-        return total_amount or 0
+        return self._rollup_value("ordered_amount")
 
     @property
     def total_payment_made(self):
-        total = self.payments.exclude(status="voided").aggregate(
-            total_payment=Sum("amount_paid")
-        )["total_payment"]
-        return total or 0
+        return self._rollup_value("paid_amount")
 
     @property
     def can_delete(self):
@@ -222,23 +416,63 @@ class PurchaseOrder(models.Model):
         else:
             return False
 
+    @classmethod
+    def derive_statuses(cls, ordered_qty, received_qty, ordered_amount, paid_amount):
+        """Delivery, payment and overall status implied by the PO's totals."""
+        if ordered_qty == received_qty:
+            delivery_status = cls.DeliveryStatus.RECEIVED
+        elif received_qty > 0:
+            delivery_status = cls.DeliveryStatus.PARTIALLY_RECEIVED
+        else:
+            delivery_status = cls.DeliveryStatus.PENDING
+
+        if paid_amount == ordered_amount:
+            payment_status = cls.PaymentStatus.FULFILLED
+        elif paid_amount > 0:
+            payment_status = cls.PaymentStatus.PARTIAL
+        else:
+            payment_status = cls.PaymentStatus.PENDING
+
+        if (
+            payment_status == cls.PaymentStatus.FULFILLED
+            and delivery_status == cls.DeliveryStatus.RECEIVED
+        ):
+            status = cls.Status.CLOSED
+        else:
+            status = cls.Status.ACTIVE
+
+        return {
+            "delivery_status": delivery_status,
+            "payment_status": payment_status,
+            "status": status,
+        }
+
+    def recompute_statuses(self):
+        """Recalculate and persist all three statuses in one read and one write."""
+        statuses = PurchaseOrder.objects.filter(pk=self.pk).recompute_statuses()
+        for column, value in statuses.get(self.pk, {}).items():
+            setattr(self, column, value)
+
     def update_po_payment_status(self):
-        if self.total_payment_made == self.total_amount:
+        # Always recompute: annotations may predate the payment being recorded.
+        paid = self._rollup_value("paid_amount", fresh=True)
+        if paid == self._rollup_value("ordered_amount", fresh=True):
             self.payment_status = self.PaymentStatus.FULFILLED
-        elif self.total_payment_made > 0:
+        elif paid > 0:
             self.payment_status = self.PaymentStatus.PARTIAL
         else:
             self.payment_status = self.PaymentStatus.PENDING
-        self.save()
+        self.save(update_fields=["payment_status", "updated_at"])
 
     def update_po_delivery_status(self):
-        if self.total_ordered == self.total_received:
+        received = self._rollup_value("received_qty", fresh=True)
+        if self._rollup_value("ordered_qty", fresh=True) == received:
             self.delivery_status = self.DeliveryStatus.RECEIVED
-        elif self.total_received > 0:
+        elif received > 0:
             self.delivery_status = self.DeliveryStatus.PARTIALLY_RECEIVED
         else:
             self.delivery_status = self.DeliveryStatus.PENDING
-        self.save()
+        self.save(update_fields=["delivery_status", "updated_at"])
 
     def update_po_status(self):
         if (
@@ -248,7 +482,34 @@ class PurchaseOrder(models.Model):
             self.status = self.Status.CLOSED
         else:
             self.status = self.Status.ACTIVE
-        self.save()
+        self.save(update_fields=["status", "updated_at"])
+
+    def save(self, *args, **kwargs):
+        # Numbered on first save, not as a field default, so unsaved instances
+        # (empty forms) do not draw numbers.
+        if not self.po_number:
+            self.po_number = self.gen_po_number()
+        super().save(*args, **kwargs)
+
+
+class PurchaseOrderItemQuerySet(models.QuerySet):
+    def with_received(self):
+        """Annotate ``received_qty`` (net of reversals) for each item."""
+        return self.annotate(received_qty=_received_per_item())
+
+    def recompute_statuses(self):
+        """
+        Recalculate each item's receiving status from one query, writing only
+        the rows whose status changed. Returns a mapping of pk -> new status.
+        """
+        rows = self.with_received().order_by().values_list(
+            "pk", "status", "ordered_quantity", "received_qty"
+        )
+        return _write_status_changes(
+            self.model,
+            ((pk, {"status": status}, *figures) for pk, status, *figures in rows),
+            self.model.derive_statuses,
+        )
 
 
 class PurchaseOrderItem(models.Model):
@@ -287,6 +548,8 @@ class PurchaseOrderItem(models.Model):
         related_name="updated_%(class)s_set",
     )
 
+    objects = PurchaseOrderItemQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
 
@@ -316,6 +579,11 @@ class PurchaseOrderItem(models.Model):
     # Total received qty for an item
     @property
     def received_quantity(self):
+        if hasattr(self, "received_qty"):
+            return self.received_qty
+        return self._calculate_received_quantity()
+
+    def _calculate_received_quantity(self):
         received_total = self.receipt_items.aggregate(
             total_received=Sum("received_quantity")
         )["total_received"]
@@ -336,14 +604,21 @@ class PurchaseOrderItem(models.Model):
 
         return remaining_qty_value
 
-    def update_po_item_status(self):
-        if self.ordered_quantity == self.received_quantity:
-            self.status = self.Status.RECEIVED
-        elif self.received_quantity > 0:
-            self.status = self.Status.PARTIALLY_RECEIVED
+    @classmethod
+    def derive_statuses(cls, ordered_quantity, received_quantity):
+        """Receiving status implied by the ordered and received quantities."""
+        if ordered_quantity == received_quantity:
+            status = cls.Status.RECEIVED
+        elif received_quantity > 0:
+            status = cls.Status.PARTIALLY_RECEIVED
         else:
-            self.status = self.Status.PENDING
-        self.save()
+            status = cls.Status.PENDING
+        return {"status": status}
+
+    def update_po_item_status(self):
+        received = self._calculate_received_quantity()
+        self.status = self.derive_statuses(self.ordered_quantity, received)["status"]
+        self.save(update_fields=["status", "updated_at"])
 
 
 class Payment(models.Model):
@@ -419,8 +694,7 @@ class Payment(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.trxn_ref:
-            year = timezone.now().year
-            self.trxn_ref = f"TXN-{year}-{uuid.uuid4().hex[:8].upper()}"
+            self.trxn_ref = next_number("TXN")
         super().save(*args, **kwargs)
 
 
@@ -500,7 +774,7 @@ class GoodsReceipt(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.gr_number:
-            self.gr_number = f"GR-{uuid.uuid4().hex[:8].upper()}"
+            self.gr_number = next_number("GR")
         super().save(*args, **kwargs)
 
 
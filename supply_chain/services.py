@@ -1,7 +1,10 @@
+import csv
 import logging
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from .models import *
 from core.utils import audit
+from core.versions import INVENTORY, SUPPLY_CHAIN, bump
 
 logger = logging.getLogger(__name__)
 
@@ -10,11 +13,23 @@ class BusinessRuleViolation(Exception):
     pass
 
 
-def _update_po_status(po):
-    """Update PO delivery status, payment status, and overall status."""
-    po.update_po_delivery_status()
-    po.update_po_payment_status()
-    po.update_po_status()
+def _update_po_status(*pos):
+    """
+    Update delivery, payment and overall status for one or more POs.
+
+    All POs are recomputed from a single rollup query and only changed status
+    columns are written, so a batch costs one read plus at most a handful of
+    UPDATEs. The passed instances are refreshed in place.
+    """
+    statuses = PurchaseOrder.objects.filter(pk__in=[po.pk for po in pos]).recompute_statuses()
+    for po in pos:
+        for column, value in statuses.get(po.pk, {}).items():
+            setattr(po, column, value)
+
+
+def _update_po_item_statuses(po_item_ids):
+    """Update receiving status for the given PO items in one read."""
+    PurchaseOrderItem.objects.filter(pk__in=set(po_item_ids)).recompute_statuses()
 
 
 def process_po(form, formset, user):
@@ -44,9 +59,6 @@ def process_receipt(form, formset, user):
     Replaces update_inventory, create_inventory_trxn, update_po_status,
     update_po_item_status signals.
     """
-    from inventory.models import Inventory, InventoryTransaction, InventoryCostLayer
-    from inventory.utils import create_inventory_transaction
-
     with transaction.atomic():
         receipt = form.save(commit=False)
         receipt.created_by = user
@@ -58,66 +70,226 @@ def process_receipt(form, formset, user):
         for obj in formset.deleted_objects:
             obj.delete()
 
-        delivery_cost = receipt.delivery_cost
-        total_received_qty = sum(item.received_quantity for item in items)
-        allocated_delivery_cost_per_unit = (
-            delivery_cost / total_received_qty
-            if delivery_cost != 0 and total_received_qty > 0
-            else 0
-        )
+        post_receipt_items(receipt, items, user)
+    return receipt
 
-        for item in items:
-            item.goods_receipt = receipt
-            item.allocated_delivery_cost_per_unit = allocated_delivery_cost_per_unit
-            item.unit_cost_at_receipt = (
-                item.purchase_order_item.unit_price_at_order
-                + allocated_delivery_cost_per_unit
-            )
-            item.created_by = user
-            item.updated_by = user
-            item.save()
 
-            # WAC recalculation and inventory update (replaces update_inventory signal)
-            inventory = Inventory.objects.select_for_update().get(product=item.product)
-            qty = item.received_quantity
-            cost = item.unit_cost_at_receipt
+def post_receipt_items(receipt, items, user):
+    """
+    Post unsaved receipt *items* against a saved *receipt* in bulk.
 
-            new_qty = inventory.quantity + qty
-            total_value = (inventory.quantity * inventory.weighted_average_cost) + (
-                qty * cost
-            )
-            wac = total_value / new_qty if new_qty > 0 else 0
+    Every affected Inventory row is locked up front in one query ordered by
+    pk, so concurrent receipts always acquire locks in the same order. WAC is
+    rolled forward in memory line by line, then receipt items, FIFO cost
+    layers and inventory transactions are written with bulk_create and the
+    inventories with a single bulk_update. Must run inside a transaction.
+    """
+    from inventory.models import Inventory, InventoryTransaction, InventoryCostLayer
+    from inventory.utils import build_inventory_transaction
+    from django.utils import timezone
+
+    if not items:
+        return []
+
+    delivery_cost = receipt.delivery_cost
+    total_received_qty = sum(item.received_quantity for item in items)
+    allocated_delivery_cost_per_unit = (
+        delivery_cost / total_received_qty
+        if delivery_cost != 0 and total_received_qty > 0
+        else 0
+    )
+
+    inventories = {
+        inventory.product_id: inventory
+        for inventory in Inventory.objects.select_for_update()
+        .filter(product_id__in={item.product_id for item in items})
+        .order_by("pk")
+    }
+
+    cost_layers, transactions = [], []
+    for item in items:
+        item.goods_receipt = receipt
+        item.allocated_delivery_cost_per_unit = allocated_delivery_cost_per_unit
+        item.unit_cost_at_receipt = (
+            item.purchase_order_item.unit_price_at_order
+            + allocated_delivery_cost_per_unit
+        )
+        item.created_by = user
+        item.updated_by = user
 
-            inventory.quantity = new_qty
-            inventory.weighted_average_cost = wac
-            inventory.save(update_fields=["quantity", "weighted_average_cost", "updated_at"])
+        inventory = inventories.get(item.product_id)
+        if inventory is None:
+            raise Inventory.DoesNotExist(f"No inventory record for {item.product}.")
 
-            # Create FIFO cost layer for this receipt batch
-            InventoryCostLayer.objects.create(
-                product=item.product,
+        # WAC recalculation and inventory update (replaces update_inventory signal)
+        qty = item.received_quantity
+        cost = item.unit_cost_at_receipt
+
+        new_qty = inventory.quantity + qty
+        total_value = (inventory.quantity * inventory.weighted_average_cost) + (
+            qty * cost
+        )
+        inventory.quantity = new_qty
+        inventory.weighted_average_cost = total_value / new_qty if new_qty > 0 else 0
+
+        # FIFO cost layer for this receipt batch
+        cost_layers.append(
+            InventoryCostLayer(
+                product_id=item.product_id,
                 quantity=qty,
                 remaining_quantity=qty,
                 unit_cost=cost,
                 goods_receipt_item=item,
             )
+        )
 
-            # Create inventory transaction (replaces create_inventory_trxn signal)
-            if not item.reverses:
-                create_inventory_transaction(
-                    inventory=item.product.inventory,
+        # Inventory transaction (replaces create_inventory_trxn signal)
+        if not item.reverses:
+            transactions.append(
+                build_inventory_transaction(
+                    inventory=inventory,
                     source=item,
                     transaction_type=InventoryTransaction.TransactionType.RECEIPT,
-                    quantity_change=item.received_quantity,
-                    cost_impact=item.received_quantity * item.unit_cost_at_receipt,
+                    quantity_change=qty,
+                    cost_impact=qty * cost,
                 )
+            )
 
-            # Update PO item status (replaces update_po_item_status signal)
-            po_item = item.purchase_order_item
-            po_item.update_po_item_status()
+    GoodsReceiptItem.objects.bulk_create(items)
+    InventoryCostLayer.objects.bulk_create(cost_layers)
+    InventoryTransaction.objects.bulk_create(transactions)
 
-        # Update PO statuses (replaces update_po_status signal)
-        po = receipt.purchase_order
-        _update_po_status(po)
+    now = timezone.now()
+    for inventory in inventories.values():
+        inventory.updated_at = now
+    Inventory.objects.bulk_update(
+        inventories.values(), ["quantity", "weighted_average_cost", "updated_at"]
+    )
+    bump(INVENTORY, SUPPLY_CHAIN)
+
+    # Update PO item statuses (replaces update_po_item_status signal)
+    _update_po_item_statuses(item.purchase_order_item_id for item in items)
+
+    # Update PO statuses (replaces update_po_status signal)
+    _update_po_status(receipt.purchase_order)
+    return items
+
+
+def _read_receipt_csv(lines):
+    """
+    Stream CSV *lines*, summing quantities per SKU.
+
+    Returns ``(totals, first_line, row_count, errors)`` where *totals* maps a
+    normalised SKU to its quantity and *first_line* to the CSV line it first
+    appeared on, for error messages.
+    """
+    reader = csv.DictReader(lines)
+    columns = {name.strip().lower() for name in reader.fieldnames or []}
+    if "sku" not in columns:
+        return {}, {}, 0, ["The CSV must have a 'sku' column."]
+
+    totals, first_line, errors, row_count = {}, {}, [], 0
+    for row in reader:
+        row_count += 1
+        row = {
+            key.strip().lower(): (value or "").strip()
+            for key, value in row.items()
+            if key is not None
+        }
+        line = reader.line_num
+        sku = row.get("sku", "").upper()
+        if not sku:
+            errors.append(f"Line {line}: SKU is required.")
+            continue
+        try:
+            quantity = int(row.get("quantity") or 1)
+        except ValueError:
+            errors.append(f"Line {line}: '{row['quantity']}' is not a whole number.")
+            continue
+        if quantity <= 0:
+            errors.append(f"Line {line}: quantity must be greater than zero.")
+            continue
+        totals[sku] = totals.get(sku, 0) + quantity
+        first_line.setdefault(sku, line)
+    return totals, first_line, row_count, errors
+
+
+def import_goods_receipt(
+    po, lines, user, delivery_cost=0, delivery_date=None, dry_run=False, request=None
+):
+    """
+    Import a goods receipt for *po* from CSV *lines* (any iterable of text
+    lines, read as a stream).
+
+    The CSV needs a ``sku`` column; ``quantity`` is optional and defaults to
+    1, so one-row-per-unit manifests import as-is. Other columns (engine or
+    chassis numbers, descriptions) are ignored. Quantities are summed per PO
+    item and checked against remaining quantities loaded in one query, then
+    posted through post_receipt_items() in a single transaction.
+
+    Returns ``(receipt, quantities, row_count, errors)``. *quantities* maps
+    each PurchaseOrderItem to the quantity being received. Nothing is written
+    when there are errors or *dry_run* is set, and *receipt* is None.
+    """
+    totals, first_line, row_count, errors = _read_receipt_csv(lines)
+    if not errors and not totals:
+        errors.append("The CSV has no receipt lines.")
+
+    with transaction.atomic():
+        po = PurchaseOrder.objects.select_for_update().get(pk=po.pk)
+        po_items = {}
+        for item in po.po_items.with_received().select_related("product"):
+            po_items.setdefault(item.product.sku.upper(), item)
+
+        quantities = {}
+        for sku, quantity in totals.items():
+            item = po_items.get(sku)
+            if item is None:
+                errors.append(f"Line {first_line[sku]}: SKU {sku} is not on {po.po_number}.")
+            elif quantity > item.remaining_qty:
+                errors.append(
+                    f"SKU {sku}: {quantity} received but only {item.remaining_qty} remaining."
+                )
+            else:
+                quantities[item] = quantity
+
+        receipt = GoodsReceipt(
+            purchase_order=po,
+            delivery_cost=delivery_cost,
+            received_by=user,
+            created_by=user,
+            updated_by=user,
+        )
+        if delivery_date:
+            receipt.delivery_date = delivery_date
+        try:
+            receipt.full_clean()
+        except ValidationError as e:
+            errors.extend(e.messages)
+
+        if errors or dry_run:
+            return None, quantities, row_count, errors
+
+        receipt.save()
+        post_receipt_items(
+            receipt,
+            [
+                GoodsReceiptItem(
+                    purchase_order_item=item,
+                    product=item.product,
+                    received_quantity=quantity,
+                )
+                for item, quantity in quantities.items()
+            ],
+            user,
+        )
+        audit(user, 'import_receipt', receipt, detail={
+            'gr_number': receipt.gr_number,
+            'po_number': po.po_number,
+            'rows': row_count,
+            'units': sum(quantities.values()),
+        }, request=request)
+    return receipt, quantities, row_count, errors
 
 
 def can_void_receipt(receipt):
@@ -186,9 +358,10 @@ def void_and_correct(receipt_id, user, void_reason="", request=None):
             inventory.weighted_average_cost = wac
             inventory.save(update_fields=["quantity", "weighted_average_cost", "updated_at"])
 
-            # Update PO item status
-            po_item = item.purchase_order_item
-            po_item.update_po_item_status()
+        # Update PO item statuses
+        _update_po_item_statuses(
+            receipt.receipt_items.values_list("purchase_order_item_id", flat=True)
+        )
 
         receipt.status = GoodsReceipt.Status.VOIDED
         receipt.save(update_fields=["status"])
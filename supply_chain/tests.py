@@ -1,14 +1,31 @@
+import io
+import tempfile
 import uuid
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.contrib.auth import get_user_model
-from .models import Supplier, PurchaseOrder, PurchaseOrderItem
-from inventory.models import Brand, Product
+from django.contrib.contenttypes.models import ContentType
+from .models import (
+    Supplier, PurchaseOrder, PurchaseOrderItem, Payment, GoodsReceipt, GoodsReceiptItem,
+)
+from inventory.models import Brand, InventoryCostLayer, InventoryTransaction, Product
+from .forms import GoodsReceiptForm, GoodsReceiptItemFormset
+from .services import (
+    _update_po_status, import_goods_receipt, process_receipt, record_supplier_payment,
+    void_and_correct,
+)
+from core.testing import QueryBudgetTestMixin
 
 CustomUser = get_user_model()
 
 
-class PurchaseOrderViewTests(TestCase):
+class PurchaseOrderViewTests(QueryBudgetTestMixin, TestCase):
 
     @classmethod
     def setUpTestData(cls):
@@ -158,3 +175,388 @@ class PurchaseOrderViewTests(TestCase):
         self.assertEqual(self.po.po_items.count(), 2)
         self.assertFalse(PurchaseOrderItem.objects.filter(pk=self.po_item2.pk).exists())
         self.assertTrue(self.po.po_items.filter(product=self.product3).exists())
+
+    def test_purchases_list_within_query_budget(self):
+        response = self.assertViewQueryBudget(reverse("purchases"))
+        self.assertEqual(response.status_code, 200)
+
+
+class SupplyChainRollupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username="rollup", password="password123")
+        cls.brand = Brand.objects.create(name="Rollup Brand", created_by=cls.user)
+        cls.product = Product.objects.create(
+            brand=cls.brand,
+            modelname="Rollup Part",
+            category=Product.Category.SPARE_PART,
+            created_by=cls.user,
+        )
+        cls.supplier = Supplier.objects.create(company_name="Rollup Supplier", created_by=cls.user)
+        cls.po = cls._make_po(received=4)
+
+    @classmethod
+    def _make_po(cls, received=0):
+        po = PurchaseOrder.objects.create(supplier=cls.supplier, created_by=cls.user)
+        items = [
+            PurchaseOrderItem.objects.create(
+                purchase_order=po, product=cls.product, ordered_quantity=qty,
+                unit_price_at_order=Decimal(price), created_by=cls.user,
+            )
+            for qty, price in [(10, "15.00"), (5, "100.00")]
+        ]
+        Payment.objects.create(purchase_order=po, amount_paid=Decimal("400.00"), created_by=cls.user)
+        Payment.objects.create(
+            purchase_order=po, amount_paid=Decimal("50.00"),
+            status=Payment.Status.VOIDED, created_by=cls.user,
+        )
+        receipt = GoodsReceipt.objects.create(
+            purchase_order=po, delivery_cost=Decimal("0.00"), created_by=cls.user
+        )
+        for item in items:
+            GoodsReceiptItem.objects.create(
+                goods_receipt=receipt, purchase_order_item=item,
+                product=cls.product, received_quantity=received,
+            )
+        # A reversed receipt nets out to zero.
+        reversed_item = GoodsReceiptItem.objects.create(
+            goods_receipt=receipt, purchase_order_item=items[0],
+            product=cls.product, received_quantity=2,
+        )
+        GoodsReceiptItem.objects.create(
+            goods_receipt=receipt, purchase_order_item=items[0], product=cls.product,
+            received_quantity=-2, reverses=reversed_item,
+        )
+        return po
+
+    def test_po_rollups_match_properties(self):
+        po = PurchaseOrder.objects.with_rollups().get(pk=self.po.pk)
+        fresh = PurchaseOrder.objects.get(pk=self.po.pk)
+        for name, expected in [
+            ("total_ordered", 15),
+            ("total_amount", Decimal("650.00")),
+            ("total_received", 8),
+            ("total_payment_made", Decimal("400.00")),
+            # (10 - 4) * 15 + (5 - 4) * 100
+            ("po_total_undelivered_value", Decimal("190.00")),
+        ]:
+            self.assertEqual(getattr(po, name), expected, name)
+            self.assertEqual(getattr(fresh, name), expected, name)
+
+    def test_supplier_rollups(self):
+        self._make_po()
+        supplier = Supplier.objects.with_rollups().get(pk=self.supplier.pk)
+        self.assertEqual(supplier.open_po_count, 2)
+        self.assertEqual(supplier.total_ordered_ytd, Decimal("1300.00"))
+        self.assertEqual(supplier.total_paid, Decimal("800.00"))
+        self.assertEqual(supplier.supp_total_undelivered_value, Decimal("840.00"))
+        self.assertEqual(
+            Supplier.objects.get(pk=self.supplier.pk).supp_total_undelivered_value,
+            Decimal("840.00"),
+        )
+
+    def test_views_query_count_does_not_grow_with_po_history(self):
+        self.client.force_login(self.user)
+        urls = [
+            reverse("purchases"),
+            reverse("suppliers"),
+            reverse("supplier_detail", args=[self.supplier.pk]),
+            reverse("po_detail", args=[self.po.pk]),
+        ]
+        before = {}
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.client.get(url).status_code, 200)
+            before[url] = len(ctx.captured_queries)
+
+        for _ in range(3):
+            self._make_po(received=1)
+
+        for url in urls:
+            with CaptureQueriesContext(connection) as ctx:
+                self.client.get(url)
+            self.assertEqual(len(ctx.captured_queries), before[url], url)
+
+    def test_recompute_statuses_batch(self):
+        settled = self._make_po(received=0)
+        PurchaseOrderItem.objects.filter(purchase_order=settled).update(ordered_quantity=1)
+        for item in settled.po_items.all():
+            GoodsReceiptItem.objects.create(
+                goods_receipt=settled.goods_receipts.get(), purchase_order_item=item,
+                product=self.product, received_quantity=1,
+            )
+        # One unit of each item at 15 + 100, paid in full.
+        settled.payments.exclude(status=Payment.Status.VOIDED).update(amount_paid=Decimal("115.00"))
+
+        # One read, then one UPDATE per distinct set of changed columns.
+        with self.assertNumQueries(3):
+            _update_po_status(self.po, settled)
+        self.assertEqual(settled.status, PurchaseOrder.Status.CLOSED)
+
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.delivery_status, PurchaseOrder.DeliveryStatus.PARTIALLY_RECEIVED)
+        self.assertEqual(self.po.payment_status, PurchaseOrder.PaymentStatus.PARTIAL)
+        self.assertEqual(self.po.status, PurchaseOrder.Status.ACTIVE)
+        settled.refresh_from_db()
+        self.assertEqual(settled.delivery_status, PurchaseOrder.DeliveryStatus.RECEIVED)
+        self.assertEqual(settled.payment_status, PurchaseOrder.PaymentStatus.FULFILLED)
+        self.assertEqual(settled.status, PurchaseOrder.Status.CLOSED)
+
+        # Nothing changed, so nothing is written.
+        with self.assertNumQueries(1):
+            _update_po_status(self.po, settled)
+
+    def test_recompute_item_statuses(self):
+        items = PurchaseOrderItem.objects.filter(purchase_order=self.po)
+        statuses = items.recompute_statuses()
+        self.assertEqual(
+            sorted(s["status"] for s in statuses.values()),
+            [PurchaseOrderItem.Status.PARTIALLY_RECEIVED] * 2,
+        )
+        for item in items:
+            self.assertEqual(item.status, PurchaseOrderItem.Status.PARTIALLY_RECEIVED)
+
+
+class GoodsReceiptPostingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username="receiver", password="password123")
+        cls.brand = Brand.objects.create(name="Receipt Brand", created_by=cls.user)
+        cls.supplier = Supplier.objects.create(company_name="Receipt Supplier", created_by=cls.user)
+        cls.products = [
+            Product.objects.create(
+                brand=cls.brand, modelname=f"Receipt Part {i}",
+                category=Product.Category.SPARE_PART, created_by=cls.user,
+            )
+            for i in range(3)
+        ]
+        inventory = cls.products[0].inventory
+        inventory.quantity = 10
+        inventory.weighted_average_cost = Decimal("100.00")
+        inventory.save()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def _paid_po(self, lines):
+        po = PurchaseOrder.objects.create(supplier=self.supplier, created_by=self.user)
+        items = [
+            PurchaseOrderItem.objects.create(
+                purchase_order=po, product=product, ordered_quantity=qty,
+                unit_price_at_order=Decimal(price), created_by=self.user,
+            )
+            for product, qty, price in lines
+        ]
+        record_supplier_payment(
+            po=po, amount=po.total_amount, method=Payment.PaymentMethod.TRANSFER, user=self.user
+        )
+        return po, items
+
+    def _receipt_data(self, po, items, delivery_cost="0"):
+        data = {
+            "purchase_order": str(po.pk),
+            "delivery_date": "2026-01-15",
+            "delivery_cost": delivery_cost,
+            "items-TOTAL_FORMS": str(len(items)),
+            "items-INITIAL_FORMS": "0",
+            "items-MIN_NUM_FORMS": "0",
+            "items-MAX_NUM_FORMS": "1000",
+        }
+        for i, item in enumerate(items):
+            data[f"items-{i}-purchase_order_item"] = str(item.pk)
+            data[f"items-{i}-product"] = str(item.product_id)
+            data[f"items-{i}-received_quantity"] = str(item.ordered_quantity)
+        return data
+
+    def _post_receipt(self, po, items, delivery_cost="0"):
+        return self.client.post(reverse("add_receipt"), self._receipt_data(po, items, delivery_cost))
+
+    def test_receipt_updates_inventory_layers_and_statuses(self):
+        po, items = self._paid_po(
+            [(self.products[0], 10, "130.00"), (self.products[1], 5, "40.00")]
+        )
+        response = self._post_receipt(po, items, delivery_cost="150")
+        self.assertEqual(response.status_code, 302)
+
+        # 150 delivery over 15 units adds 10 per unit.
+        inventory = self.products[0].inventory
+        inventory.refresh_from_db()
+        self.assertEqual(inventory.quantity, 20)
+        # (10 * 100 + 10 * 140) / 20
+        self.assertEqual(inventory.weighted_average_cost, Decimal("120.00"))
+        inventory = self.products[1].inventory
+        inventory.refresh_from_db()
+        self.assertEqual((inventory.quantity, inventory.weighted_average_cost), (5, Decimal("50.00")))
+
+        receipt = po.goods_receipts.get()
+        receipt_items = list(receipt.receipt_items.all())
+        self.assertEqual(len(receipt_items), 2)
+        self.assertEqual(
+            InventoryCostLayer.objects.filter(goods_receipt_item__in=receipt_items).count(), 2
+        )
+        trxns = InventoryTransaction.objects.filter(
+            source_object_id__in=[item.pk for item in receipt_items]
+        )
+        self.assertEqual(
+            sorted(t.cost_impact for t in trxns), [Decimal("250.00"), Decimal("1400.00")]
+        )
+        self.assertTrue(all(t.source in receipt_items for t in trxns))
+
+        po.refresh_from_db()
+        self.assertEqual(po.delivery_status, PurchaseOrder.DeliveryStatus.RECEIVED)
+        self.assertEqual(po.status, PurchaseOrder.Status.CLOSED)
+        self.assertEqual(
+            set(po.po_items.values_list("status", flat=True)),
+            {PurchaseOrderItem.Status.RECEIVED},
+        )
+
+        void_and_correct(receipt.pk, self.user, void_reason="Wrong delivery")
+        inventory.refresh_from_db()
+        self.assertEqual((inventory.quantity, inventory.weighted_average_cost), (0, Decimal("0.00")))
+        self.assertFalse(
+            InventoryCostLayer.objects.filter(
+                goods_receipt_item__in=receipt_items, is_voided=False
+            ).exists()
+        )
+
+    def test_posting_query_count_does_not_grow_with_lines(self):
+        # Warm the ContentType cache used for the transactions' generic FK.
+        ContentType.objects.get_for_model(GoodsReceiptItem)
+        counts = []
+        for products in (self.products[:1], self.products):
+            po, items = self._paid_po([(product, 2, "10.00") for product in products])
+            data = self._receipt_data(po, items)
+            form = GoodsReceiptForm(data)
+            formset = GoodsReceiptItemFormset(data, prefix="items")
+            self.assertTrue(form.is_valid() and formset.is_valid())
+            with CaptureQueriesContext(connection) as ctx:
+                process_receipt(form, formset, self.user)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+
+class GoodsReceiptImportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username="importer", password="password123")
+        cls.brand = Brand.objects.create(name="Import Brand", created_by=cls.user)
+        cls.supplier = Supplier.objects.create(company_name="Import Supplier", created_by=cls.user)
+        cls.bike = Product.objects.create(
+            brand=cls.brand, modelname="Import Bike",
+            category=Product.Category.MOTORCYCLE, created_by=cls.user,
+        )
+        cls.part = Product.objects.create(
+            brand=cls.brand, modelname="Import Part",
+            category=Product.Category.SPARE_PART, created_by=cls.user,
+        )
+        cls.po = PurchaseOrder.objects.create(supplier=cls.supplier, created_by=cls.user)
+        for product, qty in [(cls.bike, 500), (cls.part, 20)]:
+            PurchaseOrderItem.objects.create(
+                purchase_order=cls.po, product=product, ordered_quantity=qty,
+                unit_price_at_order=Decimal("100.00"), created_by=cls.user,
+            )
+        record_supplier_payment(
+            po=cls.po, amount=cls.po.total_amount,
+            method=Payment.PaymentMethod.TRANSFER, user=cls.user,
+        )
+
+    def _manifest(self, bikes, parts=0):
+        lines = ["sku,engine_number,chassis_number"]
+        # SKUs match case-insensitively.
+        lines += [f"{self.bike.sku.lower()},ENG-{i:05d},CHS-{i:05d}" for i in range(bikes)]
+        if parts:
+            lines = [line + ",quantity" if i == 0 else line + ",1" for i, line in enumerate(lines)]
+            lines.append(f"{self.part.sku},,,{parts}")
+        return io.StringIO("\n".join(lines) + "\n")
+
+    def test_import_sums_rows_per_item_and_posts(self):
+        receipt, quantities, row_count, errors = import_goods_receipt(
+            self.po, self._manifest(300, parts=20), self.user, delivery_cost=Decimal("320")
+        )
+        self.assertEqual(errors, [])
+        self.assertEqual(row_count, 301)
+        self.assertEqual(
+            {item.product_id: qty for item, qty in quantities.items()},
+            {self.bike.pk: 300, self.part.pk: 20},
+        )
+        self.assertEqual(receipt.receipt_items.count(), 2)
+        inventory = self.bike.inventory
+        inventory.refresh_from_db()
+        # 320 delivery cost over 320 units adds 1 per unit.
+        self.assertEqual((inventory.quantity, inventory.weighted_average_cost), (300, Decimal("101.00")))
+        self.po.refresh_from_db()
+        self.assertEqual(self.po.delivery_status, PurchaseOrder.DeliveryStatus.PARTIALLY_RECEIVED)
+
+    def test_dry_run_and_errors_write_nothing(self):
+        receipt, quantities, _, errors = import_goods_receipt(
+            self.po, self._manifest(10), self.user, dry_run=True
+        )
+        self.assertIsNone(receipt)
+        self.assertEqual(errors, [])
+        self.assertEqual(sum(quantities.values()), 10)
+
+        bike, part = self.bike.sku, self.part.sku
+        manifest = io.StringIO(
+            f"sku,quantity\n{bike},499\n{bike},2\nNOPE-1,1\n{part},x\n{part},0\n"
+        )
+        receipt, _, _, errors = import_goods_receipt(self.po, manifest, self.user)
+        self.assertIsNone(receipt)
+        self.assertEqual(len(errors), 4, errors)
+        self.assertIn("only 500 remaining", " ".join(errors))
+        self.assertFalse(GoodsReceipt.objects.filter(purchase_order=self.po).exists())
+
+    def test_query_count_does_not_grow_with_rows(self):
+        # Warm up: the first receipt also flips the statuses to partially received.
+        import_goods_receipt(self.po, self._manifest(1), self.user)
+        counts = []
+        for bikes in (5, 100):
+            with CaptureQueriesContext(connection) as ctx:
+                receipt, _, _, errors = import_goods_receipt(self.po, self._manifest(bikes), self.user)
+            self.assertEqual(errors, [])
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write(self._manifest(3).getvalue())
+        out = io.StringIO()
+        call_command(
+            "import_goods_receipt", self.po.po_number, f.name,
+            "--username", "importer", "--dry-run", stdout=out,
+        )
+        self.assertIn("Dry run", out.getvalue())
+        self.assertFalse(GoodsReceipt.objects.filter(purchase_order=self.po).exists())
+
+        call_command("import_goods_receipt", self.po.po_number, f.name, "--username", "importer", stdout=out)
+        self.assertEqual(GoodsReceipt.objects.get(purchase_order=self.po).received_quantity, 3)
+
+        with self.assertRaises(CommandError):
+            call_command("import_goods_receipt", "PO-MISSING", f.name, "--username", "importer")
+
+    def test_upload_view(self):
+        self.client.force_login(self.user)
+        url = reverse("import_receipt")
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+        data = {
+            "purchase_order": str(self.po.pk),
+            "delivery_cost": "0",
+            "delivery_date": "2026-01-15",
+            "dry_run": "on",
+            "manifest": SimpleUploadedFile(
+                "manifest.csv", f"sku\n{self.bike.sku}\nNOPE-1\n".encode()
+            ),
+        }
+        response = self.client.post(url, data)
+        self.assertContains(response, "NOPE-1 is not on")
+
+        data.pop("dry_run")
+        data["manifest"] = SimpleUploadedFile(
+            "manifest.csv", f"\ufeffsku\n{self.bike.sku}\n{self.bike.sku}\n".encode()
+        )
+        response = self.client.post(url, data)
+        self.assertRedirects(response, self.po.get_absolute_url, fetch_redirect_response=False)
+        self.assertEqual(GoodsReceipt.objects.get(purchase_order=self.po).received_quantity, 2)
@@ -24,6 +24,7 @@ urlpatterns = [
     # =============== GOODS RECEIPT VIEWS ===============
     path("receipts/", good_receipts, name="receipts"),
     path("receipts/add/", manage_receipts, name="add_receipt"),
+    path("receipts/import/", import_receipt, name="import_receipt"),
     path(
         "receipts/receipt_item_form/",
         manage_receipt_item,
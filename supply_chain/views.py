@@ -6,15 +6,19 @@ from django.db import transaction
 from .models import *
 from .forms import *
 from django.forms import modelformset_factory
-from django.db.models import Sum, F, IntegerField, Q, DecimalField, Value, Count, OuterRef, Subquery
-from django.db.models.functions import Coalesce
+from django.db.models import IntegerField, Q, Prefetch
 from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from core.fragments import cache_fragment
+from core.pagination import CursorPaginator
+from core.versions import SUPPLY_CHAIN
 from django.template.loader import render_to_string
 from . import services
 from django.contrib import messages
 from django.urls import reverse
 from . import utils
+import csv
+import io
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,22 +27,8 @@ from core.utils import apply_sorting
 
 def suppliers(request):
     PAGE_SIZE = 100
-    page_number = request.GET.get("page", 1)
     search_query = request.GET.get("q", "")
-    suppliers_list = Supplier.objects.annotate(
-        open_po_count=Count("purchase_orders", filter=~Q(purchase_orders__status="closed")),
-        total_ordered_ytd=Coalesce(
-            Subquery(
-                PurchaseOrder.objects.filter(
-                    supplier=OuterRef("pk"),
-                )
-                .annotate(total=Sum(F("po_items__ordered_quantity") * F("po_items__unit_price_at_order")))
-                .values("total")[:1],
-                output_field=DecimalField(),
-            ),
-            Value(0, output_field=DecimalField()),
-        ),
-    )
+    suppliers_list = Supplier.objects.with_rollups()
 
     if search_query:
         suppliers_list = suppliers_list.filter(
@@ -60,17 +50,18 @@ def suppliers(request):
 
     suppliers_list = apply_sorting(suppliers_list, sort_field, direction, allowed_sort_fields)
 
-    paginator = Paginator(suppliers_list, PAGE_SIZE)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(suppliers_list, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
     context = {
         "suppliers": page_obj,
         "search_query": search_query,
         "sort_field": sort_field,
         "direction": direction,
+        "params": {k: v for k, v in request.GET.items() if k != "cursor"},
     }
 
     if request.htmx:
-        if "q" in request.GET or "sort" in request.GET or "page" in request.GET:
+        if "q" in request.GET or "sort" in request.GET or "page" in request.GET or "cursor" in request.GET:
             return render(request, "supply_chain/suppliers/supplier_list.html#supplier-table-partial", context)
         return render(request, "supply_chain/suppliers/supplier_list.html#supplier-list-partial", context)
 
@@ -109,18 +100,17 @@ def modal_manage_supplier(request, pk=None):
 
 
 def supplier_detail(request, pk):
-    supplier = get_object_or_404(Supplier, pk=pk)
+    supplier = get_object_or_404(Supplier.objects.with_rollups(), pk=pk)
     active_tab = request.GET.get("tab", "pos")
 
     PAGE_SIZE = 50
     page_number = request.GET.get("page", 1)
 
-    purchase_orders = supplier.purchase_orders.annotate(
-        total_amount_val=Coalesce(
-            Sum(F("po_items__ordered_quantity") * F("po_items__unit_price_at_order"), output_field=DecimalField()),
-            Value(0, output_field=DecimalField())
-        )
-    ).prefetch_related("po_items__product").order_by("-order_date")
+    purchase_orders = (
+        supplier.purchase_orders.with_rollups()
+        .prefetch_related("po_items__product")
+        .order_by("-order_date")
+    )
 
     paginator = Paginator(purchase_orders, PAGE_SIZE)
     page_obj = paginator.get_page(page_number)
@@ -129,22 +119,15 @@ def supplier_detail(request, pk):
         purchase_order__supplier=supplier
     ).select_related("purchase_order").order_by("-payment_date")[:50]
 
-    total_ordered_ytd = purchase_orders.aggregate(
-        total=Coalesce(Sum("total_amount_val"), Value(0, output_field=DecimalField()))
-    )["total"] or Decimal("0.00")
-
-    open_po_count = supplier.purchase_orders.filter(~Q(status="closed")).count()
-
-    undelivered_value = sum(po.po_total_undelivered_value for po in purchase_orders)
-
     context = {
         "supplier": supplier,
         "active_tab": active_tab,
         "purchase_orders": page_obj,
         "payments": payments,
-        "total_ordered_ytd": total_ordered_ytd,
-        "open_po_count": open_po_count,
-        "undelivered_value": undelivered_value,
+        "total_ordered_ytd": supplier.total_ordered_ytd,
+        "open_po_count": supplier.open_po_count,
+        "undelivered_value": supplier.undelivered_value,
+        "params": {k: v for k, v in request.GET.items() if k != "page"},
     }
 
     if request.htmx:
@@ -163,20 +146,7 @@ def delete_supplier(request, pk):
 
     if request.method == "DELETE":
         supplier.delete()
-        suppliers = Supplier.objects.annotate(
-            open_po_count=Count("purchase_orders", filter=~Q(purchase_orders__status="closed")),
-            total_ordered_ytd=Coalesce(
-                Subquery(
-                    PurchaseOrder.objects.filter(
-                        supplier=OuterRef("pk"),
-                    )
-                    .annotate(total=Sum(F("po_items__ordered_quantity") * F("po_items__unit_price_at_order")))
-                    .values("total")[:1],
-                    output_field=DecimalField(),
-                ),
-                Value(0, output_field=DecimalField()),
-            ),
-        ).order_by("company_name")
+        suppliers = Supplier.objects.with_rollups().order_by("company_name")
         context = {"suppliers": suppliers}
 
         supplier_list = render_to_string(
@@ -195,21 +165,20 @@ def delete_supplier(request, pk):
     return HttpResponse(status=405)
 
 
+@cache_fragment("supply_chain/po/purchases.html", SUPPLY_CHAIN)
 def purchases(request):
     PAGE_SIZE = 100
-    page_number = request.GET.get("page", 1)
     search_query = request.GET.get("q", "")
     filter_status = request.GET.get("status", "")
     filter_payment = request.GET.get("payment", "")
     filter_delivery = request.GET.get("delivery", "")
     filter_supplier = request.GET.get("supplier", "")
 
-    purchases_list = PurchaseOrder.objects.select_related("supplier").annotate(
-        total_amount_val=Coalesce(
-            Sum(F("po_items__ordered_quantity") * F("po_items__unit_price_at_order"), output_field=DecimalField()),
-            Value(0, output_field=DecimalField()),
-        )
-    ).order_by("-updated_at")
+    purchases_list = (
+        PurchaseOrder.objects.with_rollups()
+        .select_related("supplier")
+        .order_by("-updated_at")
+    )
 
     if search_query:
         purchases_list = purchases_list.filter(
@@ -230,20 +199,22 @@ def purchases(request):
         "po_number",
         "supplier__company_name",
         "order_date",
-        "total_amount_val",
+        "ordered_amount",
+        "paid_amount",
+        "undelivered_value",
         "status",
         "delivery_status",
         "payment_status",
     ]
     sort_field = request.GET.get("sort", "-updated_at")
-    if sort_field == "total_amount":
-        sort_field = "total_amount_val"
+    if sort_field in ("total_amount", "total_amount_val"):
+        sort_field = "ordered_amount"
     direction = request.GET.get("direction", "asc")
 
     purchases_list = apply_sorting(purchases_list, sort_field, direction, allowed_sort_fields)
 
-    paginator = Paginator(purchases_list, PAGE_SIZE)
-    page_obj = paginator.get_page(page_number)
+    paginator = CursorPaginator(purchases_list, PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("cursor"))
 
     all_suppliers = Supplier.objects.filter(status="active").order_by("company_name", "full_name")
 
@@ -257,11 +228,11 @@ def purchases(request):
         "all_suppliers": all_suppliers,
         "sort_field": sort_field,
         "direction": direction,
-        "params": request.GET.dict(),
+        "params": {k: v for k, v in request.GET.items() if k != "cursor"},
     }
 
     if request.htmx:
-        if any(key in request.GET for key in ["page", "q", "status", "payment", "delivery", "supplier", "sort"]):
+        if any(key in request.GET for key in ["page", "cursor", "q", "status", "payment", "delivery", "supplier", "sort"]):
             return render(
                 request,
                 "supply_chain/po/purchases.html#po-table-partial",
@@ -278,10 +249,15 @@ def purchases(request):
 
 def po_detail(request, pk):
     purchase = get_object_or_404(
-        PurchaseOrder.objects.select_related("supplier").prefetch_related(
-            "po_items__product",
+        PurchaseOrder.objects.with_rollups()
+        .select_related("supplier")
+        .prefetch_related(
+            Prefetch(
+                "po_items",
+                queryset=PurchaseOrderItem.objects.with_received().select_related("product"),
+            ),
             "payments",
-            "goods_receipts",
+            "goods_receipts__receipt_items__product",
         ),
         pk=pk,
     )
@@ -440,12 +416,11 @@ def delete_po(request, pk):
 
     if request.method == "DELETE":
         purchase.delete()
-        purchases = PurchaseOrder.objects.select_related("supplier").annotate(
-            total_amount_val=Coalesce(
-                Sum(F("po_items__ordered_quantity") * F("po_items__unit_price_at_order"), output_field=DecimalField()),
-                Value(0, output_field=DecimalField()),
-            )
-        ).order_by("-updated_at")
+        purchases = (
+            PurchaseOrder.objects.with_rollups()
+            .select_related("supplier")
+            .order_by("-updated_at")
+        )
         context = {"purchases": purchases}
 
         purchase_list = render_to_string(
@@ -492,7 +467,13 @@ def payments(request):
 
     paginator = Paginator(payments_list, PAGE_SIZE)
     page_obj = paginator.get_page(page_number)
-    context = {"payments": page_obj, "search_query": search_query, "sort_field": sort_field, "direction": direction}
+    context = {
+        "payments": page_obj,
+        "search_query": search_query,
+        "sort_field": sort_field,
+        "direction": direction,
+        "params": {k: v for k, v in request.GET.items() if k != "page"},
+    }
 
     if request.htmx:
         if "q" in request.GET or "sort" in request.GET or "page" in request.GET:
@@ -772,6 +753,55 @@ def manage_receipts(request):
     return render(request, "supply_chain/goods_receipts/form.html", context)
 
 
+@login_required
+def import_receipt(request):
+    errors, quantities, row_count = [], {}, 0
+    if request.method == "POST":
+        form = GoodsReceiptImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            lines = io.TextIOWrapper(
+                form.cleaned_data["manifest"].file, encoding="utf-8-sig", newline=""
+            )
+            try:
+                receipt, quantities, row_count, errors = services.import_goods_receipt(
+                    form.cleaned_data["purchase_order"],
+                    lines,
+                    request.user,
+                    delivery_cost=form.cleaned_data["delivery_cost"],
+                    delivery_date=form.cleaned_data["delivery_date"],
+                    dry_run=form.cleaned_data["dry_run"],
+                    request=request,
+                )
+            except (UnicodeDecodeError, csv.Error) as e:
+                form.add_error("manifest", f"Could not read the CSV file: {e}")
+                receipt = None
+            if receipt:
+                messages.success(
+                    request,
+                    f"Receipt {receipt.gr_number} imported: {sum(quantities.values())} units.",
+                )
+                return redirect(receipt.purchase_order.get_absolute_url)
+    else:
+        form = GoodsReceiptImportForm()
+
+    context = {
+        "form": form,
+        "errors": errors,
+        "quantities": quantities.items(),
+        "row_count": row_count,
+        "form_action_url": reverse("import_receipt"),
+    }
+
+    if request.htmx:
+        return render(
+            request,
+            "supply_chain/goods_receipts/import.html#receipt-import-partial",
+            context,
+        )
+
+    return render(request, "supply_chain/goods_receipts/import.html", context)
+
+
 def manage_receipt_item(request):
     purchase_order = None
 